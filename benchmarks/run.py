@@ -0,0 +1,284 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import aiohttp
+import requests
+
+from serply import Serply, __version__
+from serply.consts import ENDPOINTS
+from serply.decoder import orjson
+
+from .stub_api import StubAPI
+
+MODES = ("sync", "threaded", "async_session_per_call", "async_pooled")
+
+# extra parameters an endpoint needs besides the keyword
+ENDPOINT_PARAMS = {"serp": {"domain": "apple.com"}}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+        nearest rank percentile
+    :param values: list: sorted values
+    :param q: float: percentile (0 to 100)
+    :return: float or None for no values
+    """
+    if not values:
+        return None
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+def summarize(latencies: List[float], errors: int, duration: float) -> Dict:
+    """
+        describe the calls of a mode
+    :param latencies: list: seconds taken by each successful call
+    :param errors: int: number of failed calls
+    :param duration: float: seconds taken by all the calls
+    :return: dict: counts, throughput and latency percentiles in milliseconds
+    """
+    latencies = sorted(latencies)
+    requests_count = len(latencies) + errors
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 3)
+
+    return {
+        "requests": requests_count,
+        "errors": errors,
+        "duration": round(duration, 6),
+        "throughput": round(requests_count / duration, 3) if duration else None,
+        "latency_ms": {
+            "mean": ms(sum(latencies) / len(latencies)) if latencies else None,
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+            "max": ms(latencies[-1] if latencies else None),
+        },
+    }
+
+
+def get_calls(endpoints: List[str], count: int) -> List[Tuple[str, Dict]]:
+    """
+        get the calls of a run, cycling through the endpoints
+    :param endpoints: list: endpoint names
+    :param count: int: number of calls
+    :return: list: (endpoint, parameters) tuples
+    """
+    return [
+        (
+            endpoints[i % len(endpoints)],
+            {
+                "keyword": f"query {i}",
+                **ENDPOINT_PARAMS.get(endpoints[i % len(endpoints)], {}),
+            },
+        )
+        for i in range(count)
+    ]
+
+
+def call(serply: Serply, endpoint: str, params: Dict) -> Tuple[float, bool]:
+    start = time.perf_counter()
+    try:
+        ok = "error" not in getattr(serply, endpoint)(**params)
+    except Exception:
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+async def call_async(serply: Serply, endpoint: str, params: Dict) -> Tuple[float, bool]:
+    start = time.perf_counter()
+    try:
+        ok = "error" not in await getattr(serply, f"{endpoint}_async")(**params)
+    except Exception:
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def run_sync(base_url: str, calls: List, concurrency: int, **options) -> List:
+    with Serply(api_key="benchmark", base_url=base_url, **options) as serply:
+        return [call(serply, endpoint, params) for endpoint, params in calls]
+
+
+def run_threaded(base_url: str, calls: List, concurrency: int, **options) -> List:
+    with Serply(
+        api_key="benchmark", base_url=base_url, pool_maxsize=concurrency, **options
+    ) as serply:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(lambda c: call(serply, c[0], c[1]), calls))
+
+
+def run_async_session_per_call(
+    base_url: str, calls: List, concurrency: int, **options
+) -> List:
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(endpoint, params):
+            async with semaphore:
+                # a client and session per call, as before connection pooling
+                async with Serply(
+                    api_key="benchmark", base_url=base_url, **options
+                ) as serply:
+                    return await call_async(serply, endpoint, params)
+
+        return await asyncio.gather(*(one(*c) for c in calls))
+
+    return asyncio.run(run())
+
+
+def run_async_pooled(base_url: str, calls: List, concurrency: int, **options) -> List:
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+        async with Serply(
+            api_key="benchmark",
+            base_url=base_url,
+            pool_limit=concurrency,
+            **options,
+        ) as serply:
+
+            async def one(endpoint, params):
+                async with semaphore:
+                    return await call_async(serply, endpoint, params)
+
+            return await asyncio.gather(*(one(*c) for c in calls))
+
+    return asyncio.run(run())
+
+
+RUNNERS = {
+    "sync": run_sync,
+    "threaded": run_threaded,
+    "async_session_per_call": run_async_session_per_call,
+    "async_pooled": run_async_pooled,
+}
+
+
+def run_benchmark(
+    modes: List[str] = MODES,
+    endpoints: List[str] = ENDPOINTS,
+    requests_count: int = 200,
+    concurrency: int = 16,
+    warmup: int = 10,
+    latency: float = 0.01,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    compress: bool = False,
+    seed: int = 0,
+) -> Dict:
+    """
+        run every mode against a local stub of the API
+    :param modes: list: modes to run [sync, threaded, async_session_per_call, async_pooled]
+    :param endpoints: list: endpoints called in turn
+    :param requests_count: int: number of measured calls per mode
+    :param concurrency: int: calls in flight for the threaded and async modes
+    :param warmup: int: calls made per mode before measuring
+    :param latency: float: seconds the stub waits before answering
+    :param jitter: float: max extra seconds added at random to the latency
+    :param error_rate: float: share of calls the stub fails (0 to 1)
+    :param compress: bool: serve gzipped bodies
+    :param seed: int: seed of the stub latency and error draws
+    :return: dict: config, environment and results by mode
+    """
+    config = {
+        "modes": list(modes),
+        "endpoints": list(endpoints),
+        "requests": requests_count,
+        "concurrency": concurrency,
+        "warmup": warmup,
+        "latency": latency,
+        "jitter": jitter,
+        "error_rate": error_rate,
+        "compress": compress,
+        "seed": seed,
+    }
+    calls = get_calls(list(endpoints), requests_count)
+    options = {"compression": compress}
+    results = {}
+    with StubAPI(
+        latency=latency,
+        jitter=jitter,
+        error_rate=error_rate,
+        compress=compress,
+        seed=seed,
+    ) as stub:
+        for mode in modes:
+            runner = RUNNERS[mode]
+            if warmup:
+                runner(stub.base_url, calls[:warmup], concurrency, **options)
+            start = time.perf_counter()
+            timings = runner(stub.base_url, calls, concurrency, **options)
+            duration = time.perf_counter() - start
+            results[mode] = summarize(
+                [seconds for seconds, ok in timings if ok],
+                sum(1 for _, ok in timings if not ok),
+                duration,
+            )
+    return {
+        "config": config,
+        "environment": {
+            "serply": __version__,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "aiohttp": aiohttp.__version__,
+            "requests": requests.__version__,
+            "orjson": orjson is not None,
+        },
+        "results": results,
+    }
+
+
+def main(argv: List[str] = None) -> Dict:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="benchmark the client against a local stub of the Serply API",
+    )
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=200, dest="requests_count")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--compress", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark.json")
+    args = parser.parse_args(argv)
+    # failed calls are counted, not logged
+    logging.getLogger("serply").setLevel(logging.CRITICAL)
+
+    report = run_benchmark(
+        modes=[mode for mode in args.modes.split(",") if mode],
+        endpoints=[endpoint for endpoint in args.endpoints.split(",") if endpoint],
+        requests_count=args.requests_count,
+        concurrency=args.concurrency,
+        warmup=args.warmup,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        compress=args.compress,
+        seed=args.seed,
+    )
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(
+        f"{'mode':<24}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}"
+    )
+    for mode, result in report["results"].items():
+        latency = result["latency_ms"]
+        print(
+            f"{mode:<24}{result['throughput']:>10}{latency['p50']!s:>10}"
+            f"{latency['p95']!s:>10}{latency['p99']!s:>10}{result['errors']:>8}"
+        )
+    print(f"results written to {args.output}", file=sys.stderr)
+    return report
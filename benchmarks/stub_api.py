@@ -0,0 +1,130 @@
+import asyncio
+import gzip
+import multiprocessing
+import os
+import random
+from typing import Dict
+
+from aiohttp import web
+
+PAYLOADS_DIR = os.path.join(os.path.dirname(__file__), "payloads")
+
+
+def load_payloads(directory: str = PAYLOADS_DIR) -> Dict[str, bytes]:
+    """
+        load the recorded response bodies
+    :param directory: str: folder holding one <endpoint>.json file per endpoint
+    :return: dict: JSON bodies by endpoint name
+    """
+    payloads = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".json"):
+            with open(os.path.join(directory, name), "rb") as f:
+                payloads[name[: -len(".json")]] = f.read()
+    return payloads
+
+
+class StubAPI(object):
+    def __init__(
+        self,
+        payloads: Dict[str, bytes] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        compress: bool = False,
+        seed: int = None,
+    ):
+        """
+            local stand-in for the Serply API serving recorded payloads
+            it runs in its own process so serving doesn't compete with the benchmarked client for the GIL
+        :param payloads: dict: JSON bodies by endpoint name (defaults to the recorded payloads)
+        :param latency: float: seconds to wait before answering
+        :param jitter: float: max extra seconds added at random to the latency
+        :param error_rate: float: share of requests answered with error_status (0 to 1)
+        :param error_status: int: status code of injected errors (defaults to 503)
+        :param compress: bool: gzip the bodies for clients accepting it
+        :param seed: int: seed of the latency and error draws, for repeatable runs
+        """
+        self.payloads = payloads if payloads is not None else load_payloads()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.compress = compress
+        self._random = random.Random(seed)
+        self._gzipped = {}
+        self._process = None
+        self.port = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/"
+
+    @staticmethod
+    def __get_endpoint__(path: str) -> str:
+        # /v1/<endpoint>/... with bing searches under /v1/b/search/
+        parts = path.strip("/").split("/")
+        endpoint = parts[1] if len(parts) > 1 else ""
+        return "search" if endpoint == "b" else endpoint
+
+    async def __handle__(self, request: web.Request) -> web.Response:
+        delay = self.latency + (
+            self._random.uniform(0, self.jitter) if self.jitter else 0
+        )
+        if delay:
+            await asyncio.sleep(delay)
+        if self.error_rate and self._random.random() < self.error_rate:
+            return web.json_response(
+                {"error": "injected error"}, status=self.error_status
+            )
+
+        endpoint = self.__get_endpoint__(request.path)
+        body = self.payloads.get(endpoint)
+        if body is None:
+            return web.json_response(
+                {"error": f"no payload for {endpoint}"}, status=404
+            )
+        headers = {"Content-Type": "application/json"}
+        if self.compress and "gzip" in request.headers.get("Accept-Encoding", ""):
+            if endpoint not in self._gzipped:
+                self._gzipped[endpoint] = gzip.compress(body)
+            body = self._gzipped[endpoint]
+            headers["Content-Encoding"] = "gzip"
+        return web.Response(body=body, headers=headers)
+
+    async def __serve__(self, conn):
+        app = web.Application()
+        app.router.add_route("*", "/{path:.*}", self.__handle__)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        conn.send(runner.addresses[0][1])
+        # served until the process is terminated
+        await asyncio.Event().wait()
+
+    def __run__(self, conn):
+        asyncio.run(self.__serve__(conn))
+
+    def start(self) -> "StubAPI":
+        conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=self.__run__, args=(child_conn,), daemon=True
+        )
+        self._process.start()
+        if not conn.poll(30):
+            self.stop()
+            raise RuntimeError("stub API server didn't start")
+        self.port = conn.recv()
+        return self
+
+    def stop(self):
+        self._process.terminate()
+        self._process.join()
+
+    def __enter__(self) -> "StubAPI":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
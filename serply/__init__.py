@@ -1,3 +1,21 @@
 __version__ = "0.0.1"
 
 from .serply import Serply as Serply
+from .ratelimit import RateLimiter as RateLimiter
+from .retry import RetryPolicy as RetryPolicy
+from .cache import ResponseCache as ResponseCache
+from .cache import SQLiteCache as SQLiteCache
+from .cache import TieredCache as TieredCache
+from .stream import StreamedResponse as StreamedResponse
+from .stream import AsyncStreamedResponse as AsyncStreamedResponse
+from .models import Result as Result
+from .models import SearchResult as SearchResult
+from .models import NewsArticle as NewsArticle
+from .models import Place as Place
+from .models import Job as Job
+from .models import Product as Product
+from .models import ScholarArticle as ScholarArticle
+from .stream import SpooledFile as SpooledFile
+from .timing import RequestTiming as RequestTiming
+from .metrics import MetricsRegistry as MetricsRegistry
+from .cassette import Cassette as Cassette
@@ -0,0 +1,353 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+from .decoder import get_json_decoder, orjson
+
+# request headers changing the response for the same url
+CACHE_KEY_HEADERS = ("X-User-Agent", "X-Proxy-Location")
+
+_loads = get_json_decoder()
+
+
+def _dumps(value: Dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def make_cache_key(url: str, headers: Dict) -> str:
+    """
+        build the cache key of a request
+    :param url: str: generated url of the request
+    :param headers: dict: request headers
+    :return: str: key identifying the response
+    """
+    return "|".join([url] + [headers.get(name, "") for name in CACHE_KEY_HEADERS])
+
+
+class ResponseCache(object):
+    def __init__(
+        self, maxsize: int = 1024, ttl: float = 300.0, endpoint_ttls: Dict = None
+    ):
+        """
+            in memory cache of API responses with LRU eviction and per endpoint expiry
+            responses are kept encoded, so changing a returned response doesn't change the cached one
+        :param maxsize: int: max number of responses kept (defaults to 1024)
+        :param ttl: float: seconds a response stays fresh (defaults to 300)
+        :param endpoint_ttls: dict: seconds a response stays fresh by endpoint (e.g. {"news": 60}), 0 disables caching
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.endpoint_ttls = dict(endpoint_ttls or {})
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # locks can't be pickled, a copy starts empty
+        return {
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "endpoint_ttls": self.endpoint_ttls,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str, endpoint: str = "") -> Dict:
+        """
+            get a fresh response
+        :param key: str: cache key of the request
+        :param endpoint: str: endpoint of the request, freshness only depends on the ttl it was stored with
+        :return: dict: cached response or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # decoded outside the lock, every caller gets its own copy
+        return _loads(entry[1])
+
+    def set(self, key: str, value: Dict, endpoint: str = ""):
+        """
+            store a response, evicting the least recently used ones when full
+        :param key: str: cache key of the request
+        :param value: dict: response to store
+        :param endpoint: str: endpoint of the request, selects the ttl
+        :return:
+        """
+        ttl = self.endpoint_ttls.get(endpoint, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        value = _dumps(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """
+            drop all responses
+        :return:
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """
+            get the cache statistics
+        :return: dict: hits, misses, evictions and current size
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+
+class SQLiteCache(object):
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 86400.0,
+        endpoint_ttls: Dict = None,
+        max_entries: int = 100000,
+        compress: bool = False,
+        timeout: float = 30.0,
+    ):
+        """
+            on disk cache of API responses shared by every process on the machine
+            the database runs in WAL mode so readers don't block the writer
+        :param path: str: path to the database file
+        :param ttl: float: seconds a response stays fresh (defaults to one day)
+        :param endpoint_ttls: dict: seconds a response stays fresh by endpoint (e.g. {"news": 600}), 0 disables caching
+        :param max_entries: int: max number of responses kept, the oldest are evicted first (defaults to 100000)
+        :param compress: bool: store payloads compressed with zlib (defaults to False)
+        :param timeout: float: seconds to wait for a lock held by another writer (defaults to 30)
+        """
+        self.path = path
+        self.ttl = ttl
+        self.endpoint_ttls = dict(endpoint_ttls or {})
+        self.max_entries = max_entries
+        self.compress = compress
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # eviction runs every so many writes rather than on each one
+        self._evict_every = max(min(max_entries // 10, 1000), 1)
+        self._writes = 0
+        self._local = threading.local()
+
+    def __getstate__(self):
+        # connections can't be pickled, a copy opens its own
+        return {
+            "path": self.path,
+            "ttl": self.ttl,
+            "endpoint_ttls": self.endpoint_ttls,
+            "max_entries": self.max_entries,
+            "compress": self.compress,
+            "timeout": self.timeout,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __len__(self):
+        return (
+            self.__get_connection__()
+            .execute("SELECT COUNT(*) FROM responses")
+            .fetchone()[0]
+        )
+
+    def __get_connection__(self) -> sqlite3.Connection:
+        """
+            get the connection of the current thread, connections aren't shared across threads or forks
+        :return: sqlite3.Connection
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, "
+                "created REAL NOT NULL, "
+                "expires REAL NOT NULL, "
+                "compressed INTEGER NOT NULL, "
+                "payload BLOB NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_created ON responses (created)"
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key: str, endpoint: str = "") -> Dict:
+        """
+            get a fresh response
+        :param key: str: cache key of the request
+        :param endpoint: str: endpoint of the request, freshness only depends on the ttl it was stored with
+        :return: dict: cached response or None
+        """
+        row = (
+            self.__get_connection__()
+            .execute(
+                "SELECT compressed, payload FROM responses WHERE key = ? AND expires > ?",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        if row is None:
+            self.misses += 1
+            return None
+        compressed, payload = row
+        if compressed:
+            payload = zlib.decompress(payload)
+        self.hits += 1
+        return json.loads(payload)
+
+    def set(self, key: str, value: Dict, endpoint: str = ""):
+        """
+            store a response, evicting expired and oldest ones when over max_entries
+        :param key: str: cache key of the request
+        :param value: dict: response to store
+        :param endpoint: str: endpoint of the request, selects the ttl
+        :return:
+        """
+        ttl = self.endpoint_ttls.get(endpoint, self.ttl)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        payload = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        if self.compress:
+            payload = zlib.compress(payload)
+        now = time.time()
+        connection = self.__get_connection__()
+        connection.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+            (key, now, now + ttl, int(self.compress), sqlite3.Binary(payload)),
+        )
+        self._writes += 1
+        if self._writes % self._evict_every == 0:
+            self.evict()
+
+    def evict(self):
+        """
+            drop expired responses and the oldest ones above max_entries
+        :return:
+        """
+        connection = self.__get_connection__()
+        expired = connection.execute(
+            "DELETE FROM responses WHERE expires <= ?", (time.time(),)
+        ).rowcount
+        overflow = connection.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        self.evictions += expired + overflow
+
+    def clear(self):
+        """
+            drop all responses
+        :return:
+        """
+        self.__get_connection__().execute("DELETE FROM responses")
+
+    def stats(self) -> Dict:
+        """
+            get the cache statistics, hits and misses are counted by this process
+        :return: dict: hits, misses, evictions and current size
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self),
+        }
+
+
+class TieredCache(object):
+    def __init__(self, *caches):
+        """
+            chain caches from fastest to slowest, e.g. in memory in front of on disk
+            a hit in a slower cache is copied into the faster ones
+        :param caches: caches to check in order
+        """
+        self.caches = list(caches)
+
+    def get(self, key: str, endpoint: str = "") -> Dict:
+        """
+            get a fresh response from the first cache holding it
+        :param key: str: cache key of the request
+        :param endpoint: str: endpoint of the request, selects the ttl of the copies in the faster caches
+        :return: dict: cached response or None
+        """
+        for index, cache in enumerate(self.caches):
+            value = cache.get(key, endpoint)
+            if value is not None:
+                for faster in self.caches[:index]:
+                    faster.set(key, value, endpoint)
+                return value
+        return None
+
+    def set(self, key: str, value: Dict, endpoint: str = ""):
+        """
+            store a response in every cache
+        :param key: str: cache key of the request
+        :param value: dict: response to store
+        :param endpoint: str: endpoint of the request, selects the ttl
+        :return:
+        """
+        for cache in self.caches:
+            cache.set(key, value, endpoint)
+
+    def clear(self):
+        """
+            drop all responses from every cache
+        :return:
+        """
+        for cache in self.caches:
+            cache.clear()
+
+    def stats(self) -> List[Dict]:
+        """
+            get the statistics of every cache
+        :return: list: statistics in cache order
+        """
+        return [cache.stats() for cache in self.caches]
+
+
+def get_cache(cache):
+    """
+        build the cache used by a client, chaining a list of caches
+    :param cache: cache or list of caches from fastest to slowest
+    :return: cache or None when caching is disabled
+    """
+    if isinstance(cache, (list, tuple)):
+        return TieredCache(*cache) if cache else None
+    return cache
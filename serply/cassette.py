@@ -0,0 +1,349 @@
+import io
+import os
+import gzip
+import json
+import time
+import base64
+import threading
+from http import HTTPStatus
+from typing import Dict, Union
+
+from .cache import CACHE_KEY_HEADERS
+
+# response headers describing the body as sent, bodies are stored decoded
+_SKIPPED_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+CASSETTE_MODES = ("auto", "record", "replay")
+
+# cassettes by path, so clients recording to the same file share it
+_cassettes = {}
+_cassettes_lock = threading.Lock()
+
+
+class CassetteMiss(LookupError):
+    pass
+
+
+class Cassette(object):
+    def __init__(self, path: str, mode: str = "auto", simulate_latency: bool = False):
+        """
+            file of recorded API responses, replayed instead of sending the requests
+            each line holds one response as JSON (gzipped when the path ends with .gz), the api key isn't recorded
+            responses to the same request are replayed in the order they were recorded
+        :param path: str: path of the cassette file
+        :param mode: str: auto replays recorded responses and sends the request again once they are used up,
+            record sends every request and starts a new file, replay never sends a request and repeats the last
+            response (defaults to auto) [auto, record, replay]
+        :param simulate_latency: bool: wait as long as the recorded response took before replaying it
+        """
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"cassette mode must be one of {CASSETTE_MODES}")
+        self.path = path
+        self.mode = mode
+        self.simulate_latency = simulate_latency
+        self._lock = threading.Lock()
+        self._interactions = {}
+        self._played = {}
+        if mode == "record":
+            if os.path.exists(path):
+                os.remove(path)
+        else:
+            self.__load__()
+
+    def __getstate__(self):
+        # a copy in another process appends to the file instead of starting it over
+        mode = "auto" if self.mode == "record" else self.mode
+        return {
+            "path": self.path,
+            "mode": mode,
+            "simulate_latency": self.simulate_latency,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __repr__(self):
+        return f"Cassette(path={self.path!r}, mode={self.mode!r})"
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(entries) for entries in self._interactions.values())
+
+    def __open__(self, mode: str):
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, mode + "t", encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def __load__(self):
+        if not os.path.exists(self.path):
+            return
+        with self.__open__("r") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._interactions.setdefault(entry["key"], []).append(entry)
+
+    @staticmethod
+    def make_key(method: str, url: str, body=None, headers: Dict = None) -> str:
+        """
+            identify a request
+        :param method: str: method of the request
+        :param url: str: url of the request
+        :param body: dict, str or bytes: body of the request, if any
+        :param headers: dict: request headers, the ones changing the response (device, proxy location) are part of the key
+        :return: str
+        """
+        key = f"{method.upper()} {url}"
+        for name in CACHE_KEY_HEADERS:
+            value = (headers or {}).get(name)
+            if value:
+                key = f"{key} {name}={value}"
+        if body is not None:
+            if isinstance(body, bytes):
+                body = body.decode("utf-8", "replace")
+            elif not isinstance(body, str):
+                body = json.dumps(body, sort_keys=True)
+            key = f"{key} {body}"
+        return key
+
+    def play(self, key: str) -> Dict:
+        """
+            get the next recorded response to a request
+        :param key: str: key of the request
+        :return: dict: recorded response or None when it has to be sent
+        """
+        if self.mode == "record":
+            return None
+        with self._lock:
+            entries = self._interactions.get(key)
+            if not entries:
+                if self.mode == "replay":
+                    raise CassetteMiss(f"no recorded response for {key}")
+                return None
+            index = self._played.get(key, 0)
+            if index >= len(entries):
+                if self.mode == "auto":
+                    # used up, e.g. by the retries of a recorded failure
+                    return None
+                return entries[-1]
+            self._played[key] = index + 1
+            return entries[index]
+
+    def record(
+        self, key: str, status: int, headers, content: bytes, elapsed: float
+    ) -> Dict:
+        """
+            add a response to the cassette and its file
+        :param key: str: key of the request
+        :param status: int: status code
+        :param headers: mapping: response headers
+        :param content: bytes: decoded body
+        :param elapsed: float: seconds until the response headers were received
+        :return: dict: recorded response
+        """
+        entry = {
+            "key": key,
+            "status": status,
+            "headers": {
+                name: value
+                for name, value in headers.items()
+                if name.lower() not in _SKIPPED_HEADERS
+            },
+            "elapsed": round(elapsed, 6),
+        }
+        try:
+            entry["body"] = content.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["body"] = base64.b64encode(content).decode("ascii")
+            entry["base64"] = True
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            entries = self._interactions.setdefault(key, [])
+            entries.append(entry)
+            # recorded responses are played after the ones already there
+            self._played[key] = len(entries)
+            with self.__open__("a") as f:
+                f.write(line + "\n")
+        return entry
+
+    @staticmethod
+    def get_content(entry: Dict) -> bytes:
+        if entry.get("base64"):
+            return base64.b64decode(entry["body"])
+        return entry["body"].encode("utf-8")
+
+
+def get_cassette(cassette: Union[str, Cassette, None]) -> Cassette:
+    """
+        get the cassette used by a client
+        SERPLY_CASSETTE and SERPLY_CASSETTE_MODE set a cassette for clients created without one
+    :param cassette: str or Cassette: cassette or path of its file opened in auto mode
+    :return: Cassette or None when requests are sent
+    """
+    if isinstance(cassette, Cassette):
+        return cassette
+    mode = "auto"
+    if cassette is None:
+        cassette = os.getenv("SERPLY_CASSETTE")
+        if not cassette:
+            return None
+        mode = os.getenv("SERPLY_CASSETTE_MODE") or mode
+    path = os.path.abspath(cassette)
+    with _cassettes_lock:
+        if path not in _cassettes:
+            _cassettes[path] = Cassette(path, mode)
+        return _cassettes[path]
+
+
+def _get_request_key(
+    cassette: Cassette, headers: Dict, method: str, url: str, kwargs: Dict
+) -> str:
+    headers = dict(headers or {})
+    headers.update(kwargs.get("headers") or {})
+    body = kwargs.get("json", kwargs.get("data"))
+    return cassette.make_key(method, url, body, headers)
+
+
+class CassetteSession(object):
+    def __init__(self, cassette: Cassette, session, headers: Dict = None):
+        """
+            requests session replaying responses from a cassette, or sending the requests and recording them
+        :param cassette: Cassette
+        :param session: requests.Session: session sending the requests to record
+        :param headers: dict: headers the session sends with every request
+        """
+        self.cassette = cassette
+        self.session = session
+        self.headers = headers
+
+    def request(self, method: str, url: str, *args, stream: bool = False, **kwargs):
+        key = _get_request_key(self.cassette, self.headers, method, url, kwargs)
+        entry = self.cassette.play(key)
+        if entry is None:
+            resp = self.session.request(method, url, *args, **kwargs)
+            entry = self.cassette.record(
+                key,
+                resp.status_code,
+                resp.headers,
+                resp.content,
+                resp.elapsed.total_seconds(),
+            )
+            resp.close()
+        elif self.cassette.simulate_latency:
+            time.sleep(entry["elapsed"])
+        return self.__build_response__(entry, method, url)
+
+    @staticmethod
+    def __build_response__(entry: Dict, method: str, url: str):
+        import datetime
+        import requests
+        from requests.structures import CaseInsensitiveDict
+        from requests.utils import get_encoding_from_headers
+
+        resp = requests.Response()
+        resp.status_code = entry["status"]
+        resp.headers = CaseInsensitiveDict(entry["headers"])
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp.reason = _get_reason(entry["status"])
+        resp.url = url
+        resp.elapsed = datetime.timedelta(seconds=entry["elapsed"])
+        # read by resp.content and iter_content like a socket
+        resp.raw = io.BytesIO(Cassette.get_content(entry))
+        return resp
+
+
+class CassetteStream(object):
+    def __init__(self, content: bytes):
+        """
+            body of a replayed aiohttp response
+        :param content: bytes: decoded body
+        """
+        self._body = io.BytesIO(content)
+        self.total_raw_bytes = len(content)
+
+    async def read(self, n: int = -1) -> bytes:
+        return self._body.read(n)
+
+
+class CassetteResponse(object):
+    def __init__(self, entry: Dict, method: str, url: str):
+        """
+            aiohttp response replayed from a cassette
+        :param entry: dict: recorded response
+        :param method: str: method of the request
+        :param url: str: url of the request
+        """
+        from multidict import CIMultiDict, CIMultiDictProxy
+
+        self.method = method.upper()
+        self.url = url
+        self.status = entry["status"]
+        self.reason = _get_reason(self.status)
+        self.headers = CIMultiDictProxy(CIMultiDict(entry["headers"]))
+        self._content = Cassette.get_content(entry)
+        self.content = CassetteStream(self._content)
+
+    async def read(self) -> bytes:
+        return self._content
+
+    def release(self):
+        pass
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        if self.status < 400:
+            return
+        import aiohttp
+        from multidict import CIMultiDict, CIMultiDictProxy
+        from yarl import URL
+
+        url = URL(self.url)
+        raise aiohttp.ClientResponseError(
+            aiohttp.RequestInfo(url, self.method, CIMultiDictProxy(CIMultiDict()), url),
+            (),
+            status=self.status,
+            message=self.reason,
+            headers=self.headers,
+        )
+
+
+class AsyncCassetteSession(object):
+    def __init__(self, cassette: Cassette, session, headers: Dict = None):
+        """
+            aiohttp session replaying responses from a cassette, or sending the requests and recording them
+        :param cassette: Cassette
+        :param session: aiohttp.ClientSession: session sending the requests to record
+        :param headers: dict: headers the session sends with every request
+        """
+        self.cassette = cassette
+        self.session = session
+        self.headers = headers
+
+    async def request(self, method: str, url: str, *args, **kwargs):
+        import asyncio
+
+        key = _get_request_key(self.cassette, self.headers, method, url, kwargs)
+        entry = self.cassette.play(key)
+        if entry is None:
+            start = time.monotonic()
+            resp = await self.session.request(method, url, *args, **kwargs)
+            elapsed = time.monotonic() - start
+            try:
+                content = await resp.read()
+            finally:
+                resp.release()
+            entry = self.cassette.record(
+                key, resp.status, resp.headers, content, elapsed
+            )
+        elif self.cassette.simulate_latency:
+            await asyncio.sleep(entry["elapsed"])
+        return CassetteResponse(entry, method, url)
+
+
+def _get_reason(status: int) -> str:
+    try:
+        return HTTPStatus(status).phrase
+    except ValueError:
+        return ""
@@ -0,0 +1,94 @@
+import threading
+from functools import lru_cache
+from typing import Dict
+
+
+@lru_cache(maxsize=None)
+def get_accept_encoding(transport: str = "requests") -> str:
+    """
+        get the content codings a transport can decode, brotli and zstd only when their package is installed
+    :param transport: str: http client decoding the responses [requests, aiohttp]
+    :return: str: value of the Accept-Encoding header
+    """
+    encodings = ["gzip", "deflate"]
+    if transport == "aiohttp":
+        try:
+            from aiohttp import compression_utils
+        except ImportError:
+            compression_utils = None
+        # each flag is looked up on its own, older aiohttp versions only have HAS_BROTLI
+        if getattr(compression_utils, "HAS_BROTLI", False):
+            encodings.append("br")
+        if getattr(compression_utils, "HAS_ZSTD", False):
+            encodings.append("zstd")
+    else:
+        # urllib3 lists the codings it can decode (br with brotli, zstd with zstandard on 2.x)
+        from urllib3.util.request import ACCEPT_ENCODING
+
+        encodings = [encoding.strip() for encoding in ACCEPT_ENCODING.split(",")]
+    return ", ".join(encodings)
+
+
+def get_wire_size(resp) -> int:
+    """
+        get the number of body bytes received for an aiohttp response, before decoding
+    :param resp: aiohttp.ClientResponse: response whose body has been read
+    :return: int: size on the wire or None if unknown
+    """
+    # aiohttp 3.12+ counts the raw bytes, older versions only give the Content-Length
+    size = getattr(resp.content, "total_raw_bytes", None)
+    if size is None:
+        length = resp.headers.get("Content-Length")
+        size = int(length) if length and length.isdigit() else None
+    return size
+
+
+class TransferStats(object):
+    def __init__(self):
+        """
+        bytes received by endpoint, as sent over the wire (compressed) and after decoding (decompressed)
+        """
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint: str, compressed: int, decompressed: int):
+        """
+            add a response to the totals
+        :param endpoint: str: endpoint name
+        :param compressed: int: size of the body on the wire, None if unknown
+        :param decompressed: int: size of the decoded body
+        :return:
+        """
+        with self._lock:
+            totals = self._endpoints.get(endpoint)
+            if totals is None:
+                totals = self._endpoints[endpoint] = [0, 0, 0]
+            totals[0] += 1
+            # an unknown wire size is counted as uncompressed
+            totals[1] += decompressed if compressed is None else compressed
+            totals[2] += decompressed
+
+    def stats(self) -> Dict[str, Dict]:
+        """
+            get the totals by endpoint
+        :return: dict: responses, compressed_bytes, decompressed_bytes and ratio by endpoint
+        """
+        with self._lock:
+            totals = {endpoint: list(t) for endpoint, t in self._endpoints.items()}
+        return {
+            endpoint: self.__summarize__(responses, compressed, decompressed)
+            for endpoint, (responses, compressed, decompressed) in totals.items()
+        }
+
+    @staticmethod
+    def __summarize__(responses: int, compressed: int, decompressed: int) -> Dict:
+        return {
+            "responses": responses,
+            "compressed_bytes": compressed,
+            "decompressed_bytes": decompressed,
+            "ratio": decompressed / compressed if compressed else 1.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._endpoints.clear()
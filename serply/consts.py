@@ -13,3 +13,52 @@ PROXY_LOCATIONS = [
     "AU",
     "BR",
 ]
+
+# endpoints with a public method (and a matching *_async method) on Serply
+ENDPOINTS = [
+    "search",
+    "video",
+    "image",
+    "product",
+    "news",
+    "job",
+    "crawl",
+    "serp",
+    "maps",
+    "scholar",
+]
+
+# key of the list of results in the response of each paginated endpoint
+RESULT_KEYS = {
+    "search": "results",
+    "video": "results",
+    "image": "image_results",
+    "product": "products",
+    "news": "entries",
+    "job": "jobs",
+    "crawl": "results",
+    "maps": "places",
+    "scholar": "articles",
+}
+
+# optional url parameters, in the order they are encoded when set
+URL_PARAMS = ("start", "gl", "lr", "hl", "cr", "loc", "domain", "website")
+
+# url layout of each endpoint: path under the API version, whether it takes num
+# and the parameters of which at least one is required
+ENDPOINT_ROUTES = {
+    "search": ("search/", True, ()),
+    "video": ("video/", True, ()),
+    "image": ("image/", True, ()),
+    "product": ("product/search/", False, ()),
+    "news": ("news/", True, ()),
+    "job": ("job/search/", True, ()),
+    "crawl": ("crawl/", True, ()),
+    "serp": ("serp/", True, ("domain", "website")),
+    "maps": ("maps/", True, ()),
+    "scholar": ("scholar/", True, ()),
+}
+
+# searches with engine set to one of these are routed to bing
+BING_ENGINES = ("bing", "b")
+BING_SEARCH_PATH = "b/search/"
@@ -0,0 +1,32 @@
+import json
+from typing import Any, Callable, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def json_loads(data: Union[bytes, str]) -> Any:
+    """
+        decode a JSON document with the standard library
+    :param data: bytes or str: raw JSON document
+    :return: decoded document
+    """
+    if isinstance(data, (bytes, bytearray)):
+        # json.loads detects the encoding itself but doesn't skip a utf-8 BOM
+        data = data.decode("utf-8-sig")
+    return json.loads(data)
+
+
+def get_json_decoder(decoder: Callable = None) -> Callable:
+    """
+        get the function decoding response bodies
+    :param decoder: callable: function taking the raw body bytes and returning the decoded document
+    :return: callable: decoder, else orjson.loads when installed, else the standard library
+    """
+    if decoder is not None:
+        return decoder
+    if orjson is not None:
+        return orjson.loads
+    return json_loads
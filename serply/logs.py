@@ -0,0 +1,123 @@
+import json
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from typing import Dict
+
+
+class KeyValues(object):
+    __slots__ = ("event", "fields")
+
+    def __init__(self, event: str, fields: Dict):
+        """
+            structured log message, only rendered as key=value pairs if a handler emits it
+        :param event: str: name of the event (e.g. request, retry)
+        :param fields: dict: values describing the event
+        """
+        self.event = event
+        self.fields = fields
+
+    def __str__(self) -> str:
+        pairs = [f"event={self.event}"]
+        for key, value in self.fields.items():
+            pairs.append(f"{key}={self.__format_value__(value)}")
+        return " ".join(pairs)
+
+    @staticmethod
+    def __format_value__(value) -> str:
+        if isinstance(value, float):
+            return f"{value:.6f}"
+        if isinstance(value, BaseException):
+            value = repr(value)
+        text = str(value)
+        if not text or any(char in text for char in ' ="\n'):
+            return json.dumps(text, ensure_ascii=False)
+        return text
+
+
+class DeferredQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+            queue the record as is, the listener thread formats it when a handler emits it
+        :param record: logging.LogRecord
+        :return: logging.LogRecord
+        """
+        return record
+
+
+class PropagatingHandler(logging.Handler):
+    def __init__(self, logger: logging.Logger, last_resort: bool = True):
+        """
+            pass records on to the handlers of the ancestors of a logger, looked up for every record
+            so handlers added after queue logging is enabled (e.g. by logging.basicConfig) still get them
+        :param logger: logging.Logger: logger whose ancestors handle the records
+        :param last_resort: bool: use logging.lastResort when no ancestor has a handler
+        """
+        super().__init__()
+        self.logger = logger
+        self.last_resort = last_resort
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # what Logger.callHandlers does for a propagating record
+        found = 0
+        current = self.logger.parent
+        while current is not None:
+            for handler in current.handlers:
+                found += 1
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+            if not current.propagate:
+                break
+            current = current.parent
+        if not found and self.last_resort and logging.lastResort is not None:
+            if record.levelno >= logging.lastResort.level:
+                logging.lastResort.handle(record)
+        return True
+
+    def emit(self, record: logging.LogRecord):
+        self.handle(record)
+
+
+class QueueLogger(logging.Logger):
+    def __init__(self, logger: logging.Logger):
+        """
+            logger of one client handing records to a background thread, so log I/O never blocks a request
+            records reach the handlers of logger and of its ancestors as if they were logged on it,
+            logger itself is left as it is for the code and clients logging on it directly
+        :param logger: logging.Logger: logger whose level, filters and handlers apply
+        """
+        super().__init__(logger.name)
+        # not registered with the logging manager, it goes away with its client
+        self.parent = logger
+        self.propagate = False
+        queue = SimpleQueue()
+        self.addHandler(DeferredQueueHandler(queue))
+        self.listener = QueueListener(
+            queue, PropagatingHandler(self), respect_handler_level=True
+        )
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def isEnabledFor(self, level: int) -> bool:
+        return self.parent.isEnabledFor(level)
+
+    def getEffectiveLevel(self) -> int:
+        return self.parent.getEffectiveLevel()
+
+    def filter(self, record: logging.LogRecord):
+        return self.parent.filter(record)
+
+    def handle(self, record: logging.LogRecord):
+        if not self.parent.disabled:
+            super().handle(record)
+
+    def stop(self):
+        """
+            handle the records still queued and stop the background thread
+        :return:
+        """
+        atexit.unregister(self.stop)
+        # stop() can't be called twice before python 3.12
+        if self.listener._thread is not None:
+            self.listener.stop()
@@ -0,0 +1,185 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, Tuple
+
+from .timing import RequestTiming
+
+# upper bounds in seconds of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# name, type and help of the exported metrics
+_METRICS = (
+    ("requests_total", "counter", "Calls to the Serply API."),
+    ("errors_total", "counter", "Calls that failed, by status code or exception."),
+    ("retries_total", "counter", "Requests retried by the retry policy."),
+    ("cache_hits_total", "counter", "Calls answered by the response cache."),
+    ("response_bytes_total", "counter", "Bytes of response bodies received."),
+    ("request_duration_seconds", "histogram", "Latency of calls to the API."),
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Series(object):
+    __slots__ = (
+        "requests",
+        "errors",
+        "retries",
+        "cache_hits",
+        "bytes",
+        "counts",
+        "sum",
+    )
+
+    def __init__(self, buckets: int):
+        self.requests = 0
+        self.errors = {}
+        self.retries = 0
+        self.cache_hits = 0
+        self.bytes = 0
+        # observations by bucket, the last one is +Inf
+        self.counts = [0] * (buckets + 1)
+        self.sum = 0.0
+
+
+class MetricsRegistry(object):
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        """
+            in process request metrics labelled by endpoint and engine, exported as a dict or in Prometheus text format
+            observing a call only takes a lock and a few additions, so it can stay on in production
+        :param buckets: tuple: upper bounds in seconds of the latency histogram buckets
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def __getstate__(self):
+        # locks can't be pickled, a copy starts empty
+        return {"buckets": self.buckets}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def observe(self, timing: RequestTiming):
+        """
+            add a finished call to the metrics
+        :param timing: RequestTiming: timing of the call
+        :return:
+        """
+        seconds = timing.total
+        index = bisect_left(self.buckets, seconds)
+        status = None
+        if timing.error is not None or (
+            timing.status is not None and timing.status != 200
+        ):
+            status = (
+                str(timing.status)
+                if timing.status is not None
+                else type(timing.error).__name__
+            )
+        key = (timing.endpoint, timing.engine)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.buckets))
+            series.requests += 1
+            if status is not None:
+                series.errors[status] = series.errors.get(status, 0) + 1
+            if timing.attempts > 1:
+                series.retries += timing.attempts - 1
+            if timing.cached:
+                series.cache_hits += 1
+            if timing.size:
+                series.bytes += timing.size
+            series.counts[index] += 1
+            series.sum += seconds
+
+    def add_bytes(self, endpoint: str, engine: str, size: int):
+        """
+            add the body of an observed call read after it was observed, e.g. a streamed response
+        :param endpoint: str: endpoint name
+        :param engine: str: search engine queried
+        :param size: int: bytes of the body as received
+        :return:
+        """
+        with self._lock:
+            series = self._series.get((endpoint, engine))
+            if series is None:
+                series = self._series[(endpoint, engine)] = _Series(len(self.buckets))
+            series.bytes += size
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict]]:
+        """
+            get a copy of the metrics
+        :return: dict: requests, errors by status, retries, cache_hits, bytes and latency by endpoint then engine
+        """
+        snapshot = {}
+        with self._lock:
+            for (endpoint, engine), series in self._series.items():
+                cumulative = 0
+                buckets = {}
+                for bound, count in zip(self.buckets + (float("inf"),), series.counts):
+                    cumulative += count
+                    buckets[bound] = cumulative
+                snapshot.setdefault(endpoint, {})[engine] = {
+                    "requests": series.requests,
+                    "errors": dict(series.errors),
+                    "retries": series.retries,
+                    "cache_hits": series.cache_hits,
+                    "bytes": series.bytes,
+                    "latency": {
+                        "count": cumulative,
+                        "sum": series.sum,
+                        "buckets": buckets,
+                    },
+                }
+        return snapshot
+
+    def to_prometheus(self, prefix: str = "serply") -> str:
+        """
+            render the metrics in the Prometheus text exposition format
+        :param prefix: str: prefix of the metric names
+        :return: str
+        """
+        samples = {name: [] for name, _, _ in _METRICS}
+        for endpoint, engines in sorted(self.snapshot().items()):
+            for engine, values in sorted(engines.items()):
+                labels = f'endpoint="{_escape(endpoint)}",engine="{_escape(engine)}"'
+                samples["requests_total"].append(("", labels, values["requests"]))
+                for status, count in sorted(values["errors"].items()):
+                    samples["errors_total"].append(
+                        ("", f'{labels},status="{_escape(status)}"', count)
+                    )
+                samples["retries_total"].append(("", labels, values["retries"]))
+                samples["cache_hits_total"].append(("", labels, values["cache_hits"]))
+                samples["response_bytes_total"].append(("", labels, values["bytes"]))
+                latency = values["latency"]
+                histogram = samples["request_duration_seconds"]
+                for bound, count in latency["buckets"].items():
+                    histogram.append(
+                        ("_bucket", f'{labels},le="{_format_number(bound)}"', count)
+                    )
+                histogram.append(("_sum", labels, latency["sum"]))
+                histogram.append(("_count", labels, latency["count"]))
+
+        lines = []
+        for base, kind, description in _METRICS:
+            name = f"{prefix}_{base}"
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            # (suffix, labels, value), the suffix names histogram series
+            for suffix, labels, value in samples[base]:
+                lines.append(f"{name}{suffix}{{{labels}}} {_format_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
@@ -0,0 +1,257 @@
+import json
+from abc import ABCMeta
+from collections.abc import Mapping
+from typing import Dict, Iterator
+
+from .decoder import get_json_decoder, orjson
+
+_loads = get_json_decoder()
+
+
+def _dumps(data: Dict) -> bytes:
+    """
+        encode a value of a result to compact JSON bytes
+    :param data: dict or list: decoded value
+    :return: bytes: JSON document
+    """
+    if orjson is not None:
+        # orjson leaves small documents in a 1KB buffer, a copy is sized to fit
+        return bytes(memoryview(orjson.dumps(data)))
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+# value of the slot of a field missing from the result
+_MISSING = object()
+
+
+def _decode(value):
+    # nested lists and dicts are kept encoded, JSON never decodes to bytes
+    return _loads(value) if isinstance(value, bytes) else value
+
+
+def _get_slot(name: str) -> str:
+    return f"_{name}"
+
+
+class Field(object):
+    def __init__(self, key: str = None):
+        """
+            typed attribute of a result, stored in a slot of its own
+            numbers, strings and booleans are kept decoded, nested lists and dicts are decoded on access
+        :param key: str: key of the field in the API response (defaults to the attribute name)
+        """
+        self.key = key
+        self.slot = None
+
+    def __set_name__(self, owner, name: str):
+        if self.key is None:
+            self.key = name
+        self.slot = _get_slot(name)
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = getattr(instance, self.slot, None)
+        if value.__class__ is bytes:
+            return _loads(value)
+        return value
+
+
+class _ResultMeta(ABCMeta):
+    def __new__(mcs, name, bases, namespace, **kwargs):
+        # a slot per field, declared before the class is created
+        slots = tuple(namespace.get("__slots__", ()))
+        namespace["__slots__"] = slots + tuple(
+            _get_slot(attr)
+            for attr, value in namespace.items()
+            if isinstance(value, Field)
+        )
+        cls = super().__new__(mcs, name, bases, namespace, **kwargs)
+        fields = {}
+        for klass in reversed(cls.__mro__):
+            for value in vars(klass).values():
+                if isinstance(value, Field):
+                    fields[value.key] = value
+        cls._fields = fields
+        return cls
+
+
+class Result(Mapping, metaclass=_ResultMeta):
+    __slots__ = ("_extra",)
+
+    def __init__(self, data: Dict):
+        """
+            compact read only result, each field has a slot instead of a dict entry
+            nested lists and dicts and the keys without a field are kept as encoded JSON and decoded on access
+            it is a Mapping so code indexing results like dicts keeps working
+        :param data: dict: result as returned by the API
+        """
+        extra = dict(data)
+        for key, field in self._fields.items():
+            value = extra.pop(key, _MISSING)
+            if value is not _MISSING:
+                if isinstance(value, (list, dict)):
+                    value = _dumps(value)
+                setattr(self, field.slot, value)
+        self._extra = _dumps(extra) if extra else None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Result":
+        """
+            build a result from a decoded API result
+        :param data: dict: result as returned by the API
+        :return: Result
+        """
+        return cls(data)
+
+    def __get_extra__(self) -> Dict:
+        return _loads(self._extra) if self._extra is not None else {}
+
+    @property
+    def raw(self) -> Dict:
+        """
+            the result as a plain dict, decoded on every access
+        :return: dict
+        """
+        raw = {}
+        for key, field in self._fields.items():
+            value = getattr(self, field.slot, _MISSING)
+            if value is not _MISSING:
+                raw[key] = _decode(value)
+        raw.update(self.__get_extra__())
+        return raw
+
+    def to_dict(self) -> Dict:
+        return self.raw
+
+    def __getitem__(self, key: str):
+        field = self._fields.get(key)
+        if field is None:
+            return self.__get_extra__()[key]
+        value = getattr(self, field.slot, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return _decode(value)
+
+    def __iter__(self) -> Iterator[str]:
+        for key, field in self._fields.items():
+            if hasattr(self, field.slot):
+                yield key
+        yield from self.__get_extra__()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key) -> bool:
+        field = self._fields.get(key)
+        if field is None:
+            return key in self.__get_extra__()
+        return hasattr(self, field.slot)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def items(self):
+        return self.raw.items()
+
+    def values(self):
+        return self.raw.values()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Result):
+            return self.raw == other.raw
+        if isinstance(other, Mapping):
+            return self.raw == dict(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __getstate__(self):
+        # the slots as they are, nested values stay encoded
+        state = {"_extra": self._extra}
+        for field in self._fields.values():
+            value = getattr(self, field.slot, _MISSING)
+            if value is not _MISSING:
+                state[field.slot] = value
+        return state
+
+    def __setstate__(self, state: Dict):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.raw!r})"
+
+
+class SearchResult(Result):
+    title = Field()
+    link = Field()
+    description = Field()
+    position = Field("realPosition")
+    cite = Field()
+    additional_links = Field()
+
+
+class NewsArticle(Result):
+    id = Field()
+    title = Field()
+    link = Field()
+    published = Field()
+    source = Field()
+    sub_articles = Field()
+
+
+class Place(Result):
+    title = Field()
+    address = Field()
+    category = Field()
+    rating = Field()
+    reviews = Field()
+    phone = Field()
+    website = Field()
+    latitude = Field()
+    longitude = Field()
+
+
+class Job(Result):
+    title = Field()
+    company = Field()
+    location = Field()
+    via = Field()
+    description = Field()
+    link = Field()
+    posted = Field()
+
+
+class Product(Result):
+    title = Field()
+    link = Field()
+    price = Field()
+    source = Field()
+    rating = Field()
+    reviews = Field()
+    thumbnail = Field()
+
+
+class ScholarArticle(Result):
+    title = Field()
+    link = Field()
+    description = Field()
+    authors = Field()
+    publication = Field()
+    cited_by = Field()
+
+
+# model of the items under RESULT_KEYS by endpoint
+MODELS = {
+    "search": SearchResult,
+    "crawl": SearchResult,
+    "news": NewsArticle,
+    "maps": Place,
+    "job": Job,
+    "product": Product,
+    "scholar": ScholarArticle,
+}
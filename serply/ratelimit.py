@@ -0,0 +1,85 @@
+import time
+import threading
+from typing import Union
+
+
+class RateLimiter(object):
+    def __init__(self, rate: float, burst: int = 1):
+        """
+            token bucket limiting how many requests are sent per second
+            it is shared by the sync and async request paths, threads and coroutines queue up in order
+        :param rate: float: requests per second allowed on average
+        :param burst: int: max number of requests sent at once after being idle (defaults to 1)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0.")
+        self.rate = float(rate)
+        self.burst = max(int(burst), 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # locks can't be pickled, a copy starts with a full bucket
+        return {"rate": self.rate, "burst": self.burst}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __repr__(self):
+        return f"RateLimiter(rate={self.rate}, burst={self.burst})"
+
+    def __reserve__(self) -> float:
+        """
+            take a token, going into debt when the bucket is empty
+        :return: float: seconds to wait until the token is available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """
+            block the current thread until a request may be sent
+        :return:
+        """
+        wait = self.__reserve__()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """
+            wait without blocking the event loop until a request may be sent
+        :return:
+        """
+        import asyncio
+
+        wait = self.__reserve__()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def split(self, parts: int) -> "RateLimiter":
+        """
+            create a limiter with an equal share of this one's budget
+        :param parts: int: number of shares
+        :return: RateLimiter: limiter allowing 1/parts of the rate and burst
+        """
+        return RateLimiter(self.rate / parts, max(self.burst // parts, 1))
+
+
+def get_rate_limiter(rate_limit: Union[float, RateLimiter, None]) -> RateLimiter:
+    """
+        build a limiter from a number of requests per second, passing limiters through
+    :param rate_limit: float or RateLimiter: requests per second or limiter
+    :return: RateLimiter: limiter or None when there is no limit
+    """
+    if rate_limit is None or isinstance(rate_limit, RateLimiter):
+        return rate_limit
+    return RateLimiter(rate_limit)
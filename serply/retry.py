@@ -0,0 +1,129 @@
+import sys
+import time
+import random
+from email.utils import parsedate_to_datetime
+from importlib import import_module
+from typing import Iterable, Tuple, Type
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+def get_retry_exceptions(load: bool = False) -> Tuple[Type[BaseException], ...]:
+    """
+        get the connection errors and timeouts retried by default
+        an error can only come from a transport already imported, so the others are left unloaded
+    :param load: bool: import both transports
+    :return: tuple: exception types
+    """
+    if load:
+        import_module("requests")
+        import_module("aiohttp")
+    exceptions = []
+    asyncio = sys.modules.get("asyncio")
+    if asyncio is not None:
+        exceptions.append(asyncio.TimeoutError)
+    requests = sys.modules.get("requests")
+    if requests is not None:
+        exceptions += [requests.ConnectionError, requests.Timeout]
+    aiohttp = sys.modules.get("aiohttp")
+    if aiohttp is not None:
+        exceptions.append(aiohttp.ClientConnectionError)
+    return tuple(exceptions)
+
+
+def __getattr__(name: str):
+    # RETRY_EXCEPTIONS needs both transports, it is only built when asked for
+    if name == "RETRY_EXCEPTIONS":
+        return get_retry_exceptions(load=True)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class RetryPolicy(object):
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        status_codes: Iterable[int] = RETRY_STATUS_CODES,
+        exceptions: Tuple[Type[BaseException], ...] = None,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        respect_retry_after: bool = True,
+    ):
+        """
+            decide which failed requests are retried and how long to wait in between
+            waits use exponential backoff with full jitter: a random delay up to backoff * 2 ** (attempt - 1)
+        :param max_attempts: int: max number of attempts, including the first one (defaults to 3)
+        :param status_codes: iterable: response status codes to retry (defaults to 429, 500, 502, 503, 504)
+        :param exceptions: tuple: exception types to retry (defaults to connection errors and timeouts)
+        :param backoff: float: base delay in seconds (defaults to 0.5)
+        :param max_backoff: float: max delay in seconds between attempts (defaults to 30)
+        :param respect_retry_after: bool: wait as long as the Retry-After header asks (defaults to True)
+        """
+        self.max_attempts = max(int(max_attempts), 1)
+        self.status_codes = frozenset(status_codes)
+        self._exceptions = tuple(exceptions) if exceptions is not None else None
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.respect_retry_after = respect_retry_after
+
+    def __repr__(self):
+        return (
+            f"RetryPolicy(max_attempts={self.max_attempts}, "
+            f"status_codes={sorted(self.status_codes)}, backoff={self.backoff})"
+        )
+
+    @property
+    def exceptions(self) -> Tuple[Type[BaseException], ...]:
+        if self._exceptions is None:
+            return get_retry_exceptions()
+        return self._exceptions
+
+    def should_retry_status(self, status: int, attempt: int) -> bool:
+        """
+            check if a response status is worth another attempt
+        :param status: int: response status code
+        :param attempt: int: number of attempts made so far
+        :return: bool
+        """
+        return attempt < self.max_attempts and status in self.status_codes
+
+    def should_retry_exception(self, e: BaseException, attempt: int) -> bool:
+        """
+            check if a request error is worth another attempt
+        :param e: exception raised by the transport
+        :param attempt: int: number of attempts made so far
+        :return: bool
+        """
+        return attempt < self.max_attempts and isinstance(e, self.exceptions)
+
+    def get_delay(self, attempt: int, retry_after: str = None) -> float:
+        """
+            get the number of seconds to wait before the next attempt
+        :param attempt: int: number of attempts made so far
+        :param retry_after: str: value of the Retry-After response header
+        :return: float: seconds to wait
+        """
+        if retry_after and self.respect_retry_after:
+            delay = parse_retry_after(retry_after)
+            if delay is not None:
+                return delay
+        return random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        )
+
+
+def parse_retry_after(value: str) -> float:
+    """
+        parse a Retry-After header given in seconds or as an HTTP date
+    :param value: str: header value
+    :return: float: seconds to wait or None if the value can't be parsed
+    """
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_at is None:
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
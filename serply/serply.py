@@ -1,12 +1,88 @@
+from __future__ import annotations
+
+import os
+import re
+import copy
 import time
 import platform
-import requests
-import aiohttp
 import logging
-from typing import Dict
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from collections import deque
+from functools import lru_cache
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Union,
+)
 from . import __version__
-from .consts import PROXY_LOCATIONS
-from urllib.parse import urlencode, unquote
+from .consts import (
+    BING_ENGINES,
+    BING_SEARCH_PATH,
+    ENDPOINT_ROUTES,
+    ENDPOINTS,
+    PROXY_LOCATIONS,
+    RESULT_KEYS,
+    URL_PARAMS,
+)
+from .ratelimit import RateLimiter, get_rate_limiter
+from .retry import RetryPolicy
+from .cache import ResponseCache, get_cache, make_cache_key
+from .decoder import get_json_decoder
+from .models import MODELS
+from .compression import TransferStats, get_accept_encoding, get_wire_size
+from .logs import KeyValues, QueueLogger
+from .metrics import MetricsRegistry
+from .stream import CHUNK_SIZE, AsyncStreamedResponse, StreamedResponse
+from .shard import run_sharded
+from .cassette import AsyncCassetteSession, Cassette, CassetteSession, get_cassette
+from .timing import RequestTiming, build_trace_config, set_current_timing
+from .tracing import (
+    end_span,
+    get_tracer,
+    open_span,
+    set_request_attributes,
+    start_span,
+    use_span,
+)
+from urllib.parse import quote_plus, unquote
+
+# the transports are imported on first sync or async use, see session and __get_async_session__
+if TYPE_CHECKING:  # pragma: no cover
+    import aiohttp
+    import requests
+    from requests.adapters import HTTPAdapter
+
+# characters quote_plus leaves as they are
+_URL_SAFE = re.compile(r"[A-Za-z0-9_.~-]*")
+_URL_PARAM_PREFIXES = tuple((name, f"&{name}=") for name in URL_PARAMS)
+
+
+def _quote(value) -> str:
+    """
+        encode a url parameter value like urlencode does
+    :param value: str, bytes or number: value of the parameter
+    :return: str: encoded value
+    """
+    if not isinstance(value, (str, bytes)):
+        value = str(value)
+    if isinstance(value, str) and _URL_SAFE.fullmatch(value):
+        return value
+    return quote_plus(value)
+
+
+@lru_cache(maxsize=None)
+def _get_platform() -> str:
+    """
+        get the platform of the user agent once per process, platform.platform() runs subprocesses on some systems
+    :return: str
+    """
+    return platform.platform()
 
 
 class Serply(object):
@@ -17,6 +93,29 @@ class Serply(object):
         device_type: str = "",
         proxy_location: str = "",
         logger: logging.Logger = logging.getLogger(__name__),
+        pool_limit: int = 100,
+        pool_limit_per_host: int = 0,
+        base_url: str = "https://api.serply.io/",
+        rate_limit: Union[float, RateLimiter] = None,
+        endpoint_rate_limits: Dict[str, Union[float, RateLimiter]] = None,
+        retry: RetryPolicy = None,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        adapter: HTTPAdapter = None,
+        cache: Union[ResponseCache, List] = None,
+        single_flight: bool = False,
+        json_decoder: Callable = None,
+        models: bool = False,
+        compression: bool = True,
+        structured_logging: bool = False,
+        log_queue: bool = False,
+        on_request_start: Callable = None,
+        on_request_end: Callable = None,
+        metrics: Union[bool, MetricsRegistry] = True,
+        tracer=None,
+        cassette: Union[str, Cassette] = None,
     ):
         """
             create a instance of Serply object
@@ -24,20 +123,50 @@ class Serply(object):
         :param api_version: str: the version
         :param device_type: str: device type to use (defaults to desktop) [desktop, mobile]
         :param logger:
+        :param pool_limit: int: max number of open connections in the async pool (0 for no limit)
+        :param pool_limit_per_host: int: max number of open connections per host in the async pool (0 for no limit)
+        :param base_url: str: root url of the API service
+        :param rate_limit: float or RateLimiter: max requests per second for all endpoints (defaults to no limit)
+        :param endpoint_rate_limits: dict: max requests per second by endpoint (e.g. {"crawl": 2}), on top of rate_limit
+        :param retry: RetryPolicy: policy to retry failed requests (defaults to no retries)
+        :param pool_connections: int: number of hosts to keep sync connection pools for (defaults to 10)
+        :param pool_maxsize: int: max number of connections kept in each sync pool (defaults to 10)
+        :param pool_block: bool: wait for a free sync connection instead of opening a throwaway one (defaults to False)
+        :param keep_alive: bool: keep sync connections open between requests (defaults to True)
+        :param adapter: HTTPAdapter: custom adapter for the sync session, overrides the pool options
+        :param cache: ResponseCache, SQLiteCache or list: cache for successful get responses, a list is checked in order (defaults to no caching)
+        :param single_flight: bool: share one request between concurrent identical get requests (defaults to False)
+        :param json_decoder: callable: function decoding the raw response bytes (defaults to orjson when installed, else json)
+        :param models: bool: return results as compact typed models instead of dicts (defaults to False)
+        :param compression: bool: ask for compressed responses, gzip and deflate plus br and zstd when installed (defaults to True)
+        :param structured_logging: bool: log records as event=name key=value pairs, the values are also set on the record as serply_fields (defaults to False)
+        :param log_queue: bool: hand the log records of this client to a background thread so handlers never block requests, stopped by close (defaults to False)
+        :param on_request_start: callable: called with the RequestTiming of each call to the API before it is sent
+        :param on_request_end: callable: called with the RequestTiming once the call is done, with the time spent by phase
+        :param metrics: bool or MetricsRegistry: count requests, errors, retries, cache hits, bytes and latencies, a registry can be shared between clients (defaults to True)
+        :param tracer: opentelemetry.trace.Tracer: tracer for spans around API calls, bulk and pagination (defaults to the global tracer when opentelemetry is installed, False to disable)
+        :param cassette: str or Cassette: record responses to a cassette file and replay them instead of sending requests, a path is opened in auto mode (defaults to $SERPLY_CASSETTE when set)
         """
         self.logger = logger
-        self.base_url = "https://api.serply.io/"
+        self.base_url = base_url
         self.api_version = api_version
         self.api_key = api_key
-        self.logger.info(
-            f"Serply Python SDK version: {__version__} using API version {self.api_version} of the API."
+        self.structured_logging = structured_logging
+        # records of this client only go through the queue, the logger is shared with other code
+        self._queue_logger = QueueLogger(logger) if log_queue else None
+        self.__log__(
+            logging.INFO,
+            "init",
+            "Serply Python SDK version: %(version)s using API version %(api_version)s of the API.",
+            version=__version__,
+            api_version=api_version,
         )
 
         self.headers = {
-            "User-Agent": f"serply-python/{__version__}  ({platform.platform()}) API/{self.api_version}"
+            "User-Agent": f"serply-python/{__version__}  ({_get_platform()}) API/{self.api_version}"
         }
         if not self.api_key:
-            self.logger.error("API key is required.")
+            self.__log__(logging.ERROR, "missing_api_key", "API key is required.")
         else:
             self.headers["apikey"] = self.api_key
 
@@ -51,8 +180,253 @@ class Serply(object):
             if proxy_location.upper() in PROXY_LOCATIONS:
                 self.headers["X-Proxy-Location"] = proxy_location.upper()
 
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        self.compression = compression
+        # bytes received by endpoint, see transfer_stats.stats()
+        self.transfer_stats = TransferStats()
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self._custom_adapter = adapter is not None
+        # the adapter and session are built on first sync use so requests is only imported then
+        self._adapter = adapter
+        self._session = None
+        self._session_lock = threading.Lock()
+        # sessions used by map() worker threads, see __get_session__
+        self._local = threading.local()
+
+        # the async session is created lazily as it has to be bound to a running event loop
+        self.pool_limit = pool_limit
+        self.pool_limit_per_host = pool_limit_per_host
+        self._async_session = None
+        self._async_session_loop = None
+        self._async_session_closer = None
+        # token buckets shared by the sync and async request paths
+        self.rate_limiter = get_rate_limiter(rate_limit)
+        self.endpoint_rate_limiters = {
+            endpoint: get_rate_limiter(limit)
+            for endpoint, limit in (endpoint_rate_limits or {}).items()
+        }
+        self.retry = retry
+        self.cache = get_cache(cache)
+        # [request in flight, number of callers waiting for it] by cache key, for single flight
+        self.single_flight = single_flight
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._inflight_async = {}
+        self.json_decoder = get_json_decoder(json_decoder)
+        self.models = models
+        # the transports are only instrumented when a hook wants the timings
+        self.on_request_start = on_request_start
+        self.on_request_end = on_request_end
+        self._timed = on_request_start is not None or on_request_end is not None
+        # request metrics by endpoint and engine, see metrics.to_prometheus()
+        if metrics is True:
+            metrics = MetricsRegistry()
+        self.metrics = metrics or None
+        # resolved on first use so opentelemetry is only imported then
+        self._tracer = tracer
+        self._tracer_resolved = False
+        self.cassette = get_cassette(cassette)
+
+        # picklable options to rebuild an equivalent client in another process
+        self._options = {
+            "api_key": api_key,
+            "api_version": api_version,
+            "device_type": device_type,
+            "proxy_location": proxy_location,
+            "pool_limit": pool_limit,
+            "pool_limit_per_host": pool_limit_per_host,
+            "base_url": base_url,
+            "rate_limit": self.rate_limiter,
+            "endpoint_rate_limits": self.endpoint_rate_limiters,
+            "retry": retry,
+            "pool_connections": pool_connections,
+            "pool_maxsize": pool_maxsize,
+            "pool_block": pool_block,
+            "keep_alive": keep_alive,
+            "cache": self.cache,
+            "single_flight": single_flight,
+            "json_decoder": json_decoder,
+            "models": models,
+            "compression": compression,
+            "structured_logging": structured_logging,
+            "log_queue": log_queue,
+            "on_request_start": on_request_start,
+            "on_request_end": on_request_end,
+            # a process gets its own registry
+            "metrics": self.metrics is not None,
+            # tracers can't be pickled, a process uses its global tracer
+            "tracer": False if tracer is False else None,
+            "cassette": self.cassette,
+        }
+
+    def __log__(self, level: int, event: str, msg: str, **fields):
+        """
+            log an event, nothing is formatted unless the level is enabled and a handler emits the record
+        :param level: int: logging level
+        :param event: str: name of the event for structured logging (e.g. request, retry)
+        :param msg: str: message with %(field)s placeholders for plain logging
+        :param fields: values of the event
+        :return:
+        """
+        logger = self._queue_logger or self.logger
+        if not logger.isEnabledFor(level):
+            return
+        if self.structured_logging:
+            logger.log(
+                level,
+                "%s",
+                KeyValues(event, fields),
+                extra={"serply_event": event, "serply_fields": fields},
+            )
+        elif fields:
+            logger.log(level, msg, fields)
+        else:
+            logger.log(level, msg)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+            close the sync session and release its connections, and stop the log queue after handling its records
+        :return:
+        """
+        if self._session is not None:
+            self._session.close()
+        self.__stop_log_queue__()
+
+    def __stop_log_queue__(self):
+        # records logged afterwards are handled on the calling thread
+        if self._queue_logger is not None:
+            self._queue_logger.stop()
+            self._queue_logger = None
+
+    @property
+    def adapter(self) -> HTTPAdapter:
+        """
+            adapter holding the sync connection pool, shared by the session and the map() workers
+        :return: HTTPAdapter
+        """
+        if self._adapter is None:
+            with self._session_lock:
+                if self._adapter is None:
+                    self._adapter = self.__build_adapter__(self.pool_maxsize)
+        return self._adapter
+
+    @property
+    def session(self) -> requests.Session:
+        """
+            sync session, created on first use
+        :return: requests.Session
+        """
+        if self._session is None:
+            adapter = self.adapter
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self.__build_session__(adapter)
+        return self._session
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    async def aclose(self):
+        """
+            close the pooled aiohttp session and release its connections, and stop the log queue after handling its records
+        :return:
+        """
+        if self._async_session_closer is not None:
+            await self._async_session_closer.aclose()
+        self._async_session = None
+        self._async_session_loop = None
+        self._async_session_closer = None
+        self.__stop_log_queue__()
+
+    @staticmethod
+    async def __close_async_session_on_shutdown__(session: aiohttp.ClientSession):
+        """
+            suspended until the event loop shuts down its async generators (asyncio.run does),
+            then closes the session while the loop is still alive
+        :param session: aiohttp.ClientSession: session to close
+        :return:
+        """
+        try:
+            yield
+        finally:
+            if not session.closed:
+                await session.close()
+
+    async def __get_async_session__(self) -> aiohttp.ClientSession:
+        """
+            get the pooled aiohttp session, creating it on first use
+            a session can't outlive its event loop so a new one is created when the loop changes
+        :return: aiohttp.ClientSession: session shared by all async requests
+        """
+        import asyncio
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        if (
+            self._async_session is None
+            or self._async_session.closed
+            or self._async_session_loop is not loop
+        ):
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_limit, limit_per_host=self.pool_limit_per_host
+            )
+            self._async_session = aiohttp.ClientSession(
+                headers=self.__get_headers__("aiohttp"),
+                connector=connector,
+                trace_configs=[build_trace_config()] if self._timed else None,
+            )
+            self._async_session_loop = loop
+            self._async_session_closer = self.__close_async_session_on_shutdown__(
+                self._async_session
+            )
+            await self._async_session_closer.__anext__()
+        return self._async_session
+
+    @property
+    def base_url(self) -> str:
+        return self._base_url
+
+    @base_url.setter
+    def base_url(self, base_url: str):
+        self._base_url = base_url
+        self._routes = None
+
+    @property
+    def api_version(self) -> str:
+        return self._api_version
+
+    @api_version.setter
+    def api_version(self, api_version: str):
+        self._api_version = api_version
+        self._routes = None
+
+    def __get_routes__(self) -> Dict:
+        """
+            get the url prefix, num flag and required parameters of each endpoint
+            built once and again only when base_url or api_version change
+        :return: dict: routes by endpoint
+        """
+        if self._routes is None:
+            prefix = f"{self._base_url}{self._api_version}/"
+            routes = {
+                endpoint: (f"{prefix}{path}", num, required)
+                for endpoint, (path, num, required) in ENDPOINT_ROUTES.items()
+            }
+            self._bing_route = (f"{prefix}{BING_SEARCH_PATH}",) + routes["search"][1:]
+            self._api_prefix = prefix
+            self._routes = routes
+        return self._routes
 
     def __generate_url__(
         self, keyword: str, num: int = 10, endpoint: str = "search", *args, **kwargs
@@ -63,134 +437,1239 @@ class Serply(object):
         :param kwargs:
         :return:
         """
-        params = {
-            "q": unquote(keyword),
-            "num": num,
-        }
+        routes = self._routes if self._routes is not None else self.__get_routes__()
+        if (
+            endpoint == "search"
+            and "engine" in kwargs
+            and kwargs["engine"].lower() in BING_ENGINES
+        ):
+            route = self._bing_route
+        else:
+            route = routes.get(endpoint)
+        if route is None:
+            e = f"endpoint selected: {endpoint} is not supported."
+            self.__log__(
+                logging.ERROR,
+                "unsupported_endpoint",
+                "endpoint selected: %(endpoint)s is not supported.",
+                endpoint=endpoint,
+            )
+            raise ValueError(e)
+        prefix, takes_num, required = route
+        if required and not any(kwargs.get(name) for name in required):
+            raise ValueError(
+                f"{' or '.join(required)} is required for the {endpoint.upper()} endpoint."
+            )
+
+        # same output as urlencode, the parameter names are encoded up front
+        parts = [prefix, "q=", _quote(unquote(keyword))]
+        if takes_num:
+            parts += ("&num=", _quote(num))
+        if kwargs:
+            for name, encoded in _URL_PARAM_PREFIXES:
+                value = kwargs.get(name)
+                if value:
+                    parts += (encoded, _quote(value))
+        return "".join(parts)
+
+    def __get_session__(self) -> requests.Session:
+        """
+            get the requests session for the current thread
+        :return: requests.Session: the worker session inside map(), the shared session otherwise
+        """
+        return getattr(self._local, "session", None) or self.session
 
-        if "start" in kwargs and kwargs["start"]:
-            params["start"] = kwargs["start"]
-        if "gl" in kwargs and kwargs["gl"]:
-            params["gl"] = kwargs["gl"]
-        if "lr" in kwargs and kwargs["lr"]:
-            params["lr"] = kwargs["lr"]
-        if "hl" in kwargs and kwargs["hl"]:
-            params["hl"] = kwargs["hl"]
-        if "cr" in kwargs and kwargs["cr"]:
-            params["cr"] = kwargs["cr"]
-        if "loc" in kwargs and kwargs["loc"]:
-            params["loc"] = kwargs["loc"]
-        if "domain" in kwargs and kwargs["domain"]:
-            params["domain"] = kwargs["domain"]
-        if "website" in kwargs and kwargs["website"]:
-            params["website"] = kwargs["website"]
-
-        if endpoint == "image":
-            return f"{self.base_url}{self.api_version}/image/{urlencode(params)}"
-        elif endpoint == "video":
-            return f"{self.base_url}{self.api_version}/video/{urlencode(params)}"
-        elif endpoint == "scholar":
-            return f"{self.base_url}{self.api_version}/scholar/{urlencode(params)}"
-        elif endpoint == "job":
-            return f"{self.base_url}{self.api_version}/job/search/{urlencode(params)}"
-        elif endpoint == "news":
-            return f"{self.base_url}{self.api_version}/news/{urlencode(params)}"
-        elif endpoint == "maps":
-            return f"{self.base_url}{self.api_version}/maps/{urlencode(params)}"
-        elif endpoint == "product":
-            # product doesn't take num
-            if "num" in params:
-                del params["num"]
-            return (
-                f"{self.base_url}{self.api_version}/product/search/{urlencode(params)}"
+    def __get_headers__(self, transport: str) -> Dict:
+        """
+            get the headers of a session, negotiating the compression the transport can decode
+        :param transport: str: http client of the session [requests, aiohttp]
+        :return: dict: client headers with Accept-Encoding
+        """
+        headers = dict(self.headers)
+        headers["Accept-Encoding"] = (
+            get_accept_encoding(transport) if self.compression else "identity"
+        )
+        return headers
+
+    def __record_transfer__(
+        self, results: Dict, url: str, compressed: int, decompressed: int
+    ):
+        """
+            record the size of a response body in the response and the transfer stats
+        :param results: dict: decoded response
+        :param url: str: url of the request
+        :param compressed: int: size of the body on the wire, None if unknown
+        :param decompressed: int: size of the decoded body
+        :return:
+        """
+        results["compressed_size"] = compressed
+        results["decompressed_size"] = decompressed
+        self.transfer_stats.record(self.__get_endpoint__(url), compressed, decompressed)
+
+    def __build_adapter__(self, pool_maxsize: int) -> HTTPAdapter:
+        """
+            build an adapter holding a sync connection pool
+        :param pool_maxsize: int: max number of connections kept in each pool
+        :return: HTTPAdapter: adapter configured with the client pool options
+        """
+        if self._timed:
+            from .timed_adapter import TimedHTTPAdapter as HTTPAdapter
+        else:
+            from requests.adapters import HTTPAdapter
+
+        return HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=self.pool_block,
+        )
+
+    def __build_session__(self, adapter: HTTPAdapter) -> requests.Session:
+        """
+            build a session on top of a connection pool, adapters are thread safe and can be shared
+        :param adapter: HTTPAdapter: adapter holding the pool
+        :return: requests.Session: session with the client headers
+        """
+        import requests
+
+        session = requests.Session()
+        session.headers.update(self.__get_headers__("requests"))
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def __get_endpoint__(self, url: str) -> str:
+        """
+            get the endpoint name from a generated url
+        :param url: str: url of the request
+        :return: str: endpoint name (e.g. search, crawl), empty if the url is not an API url
+        """
+        self.__get_routes__()
+        prefix = self._api_prefix
+        if not url.startswith(prefix):
+            return ""
+        endpoint = url[len(prefix) :].split("/", 1)[0]
+        # bing searches are routed through /b/search/
+        return "search" if endpoint == "b" else endpoint
+
+    def __get_engine__(self, url: str) -> str:
+        """
+            get the search engine a generated url queries
+        :param url: str: url of the request
+        :return: str: engine name [google, bing]
+        """
+        self.__get_routes__()
+        return "bing" if url.startswith(self._bing_route[0]) else "google"
+
+    def __get_rate_limiters__(self, url: str) -> List[RateLimiter]:
+        """
+            get the rate limiters a request has to go through
+        :param url: str: url of the request
+        :return: list: global limiter then endpoint limiter, when configured
+        """
+        limiters = []
+        if self.rate_limiter is not None:
+            limiters.append(self.rate_limiter)
+        if self.endpoint_rate_limiters:
+            limiter = self.endpoint_rate_limiters.get(self.__get_endpoint__(url))
+            if limiter is not None:
+                limiters.append(limiter)
+        return limiters
+
+    def __get_cache_key__(self, url: str, method: str) -> str:
+        """
+            get the cache key of a request
+        :param url: str: url of the request
+        :param method: str: method of the request, only get requests are cached
+        :return: str: cache key or None if the request isn't cached
+        """
+        if self.cache is None or method != "get":
+            return None
+        return make_cache_key(url, self.headers)
+
+    def __get_cached__(self, cache_key: str, url: str, start: float) -> Dict:
+        """
+            get a cached response
+        :param cache_key: str: cache key of the request
+        :param url: str: url of the request
+        :param start: float: time the request started
+        :return: dict: copy of the cached response or None
+        """
+        cached = self.cache.get(cache_key, self.__get_endpoint__(url))
+        if cached is None:
+            return None
+        results = dict(cached)
+        results["request_time"] = time.monotonic() - start
+        results["attempts"] = 0
+        results["cached"] = True
+        return results
+
+    def __get_models__(self, results: Dict, url: str) -> Dict:
+        """
+            replace the results of a response with typed models when models is on
+        :param results: dict: decoded response
+        :param url: str: url of the request
+        :return: dict: the response, its results converted to the model of the endpoint
+        """
+        if not self.models:
+            return results
+        endpoint = self.__get_endpoint__(url)
+        model = MODELS.get(endpoint)
+        items = results.get(RESULT_KEYS.get(endpoint))
+        if model is not None and isinstance(items, list):
+            results[RESULT_KEYS[endpoint]] = [
+                model.from_dict(item) if isinstance(item, dict) else item
+                for item in items
+            ]
+        return results
+
+    def __get_streamed_response__(
+        self,
+        resp: requests.Response,
+        url: str,
+        method: str,
+        start: float,
+        attempt: int,
+        spool: Dict = None,
+        timing: RequestTiming = None,
+    ) -> StreamedResponse:
+        """
+            wrap a response whose body hasn't been read yet
+        :param resp: requests.Response: response opened with stream=True
+        :param url: str: url of the request
+        :param method: str: method of the request
+        :param start: float: time the request started
+        :param attempt: int: number of attempts made
+        :param spool: dict: paths string fields are written to by key (None for a temporary file)
+        :param timing: RequestTiming: timing of the call, None when nothing observes it
+        :return: StreamedResponse: response parsed as the body is read, or holding the error
+        """
+        fields = {"request_time": time.monotonic() - start, "attempts": attempt}
+        result_key = RESULT_KEYS.get(self.__get_endpoint__(url), "results")
+        if resp.status_code != 200:
+            resp.close()
+            fields[
+                "error"
+            ] = f"Error making request to {method} {url} status code: {resp.status_code}"
+            self.__log__(
+                logging.ERROR,
+                "request_error",
+                "Error making request to %(method)s %(url)s status code: %(status)s",
+                method=method,
+                url=url,
+                status=resp.status_code,
             )
-        elif endpoint == "crawl":
-            return f"{self.base_url}{self.api_version}/crawl/{urlencode(params)}"
-        elif endpoint == "serp":
-            if "domain" not in params and "website" not in params:
-                raise ValueError("domain or website is required for the SERP endpoint.")
-            return f"{self.base_url}{self.api_version}/serp/{urlencode(params)}"
-        elif endpoint == "search":
-            # default to search
-            if "engine" in kwargs and kwargs["engine"].lower() in ["bing", "b"]:
-                return f"{self.base_url}{self.api_version}/b/search/{urlencode(params)}"
+            return StreamedResponse(result_key, fields=fields)
+        # urllib3 counts the bytes read from the socket, before decoding
+        tell = getattr(resp.raw, "tell", None)
+        return StreamedResponse(
+            result_key,
+            resp.iter_content(chunk_size=CHUNK_SIZE),
+            fields=fields,
+            close=resp.close,
+            files=spool,
+            on_finish=self.__get_stream_finisher__(
+                url, start, timing, tell if tell is not None else lambda: None
+            ),
+        )
+
+    def __get_stream_finisher__(
+        self,
+        url: str,
+        start: float,
+        timing: RequestTiming,
+        get_wire_size: Callable[[], int],
+    ) -> Callable[[Dict, int], None]:
+        """
+            build the callback recording the duration and size of a streamed body once it is read
+        :param url: str: url of the request
+        :param start: float: time the request started
+        :param timing: RequestTiming: timing of the call, None when nothing observes it
+        :param get_wire_size: callable: returns the size of the body on the wire, None if unknown
+        :return: callable: called by the streamed response with its fields and the decoded size
+        """
+
+        def finish(fields: Dict, decompressed: int):
+            # like the request_time of a response read whole, the body download is included
+            fields["request_time"] = time.monotonic() - start
+            compressed = get_wire_size()
+            self.__record_transfer__(fields, url, compressed, decompressed)
+            if timing is not None:
+                # the call was observed when the headers arrived, the body is added now
+                timing.size = decompressed if compressed is None else compressed
+                if self.metrics is not None:
+                    self.metrics.add_bytes(timing.endpoint, timing.engine, timing.size)
+
+        return finish
+
+    def __make_request__(
+        self,
+        url: str,
+        method: str = "get",
+        *args,
+        stream: bool = False,
+        spool: Dict = None,
+        **kwargs,
+    ) -> Dict:
+        """
+            make a request to the API, sharing identical get requests in flight when single_flight is on
+        :param url: str: url to make request to
+        :param method: str: method to use for request (defaults to get) [get, post]
+        :param args:
+        :param stream: bool: return a StreamedResponse parsed as the body is read
+        :param spool: dict: paths string fields of a streamed response are written to by key (None for a temporary file)
+        :param kwargs:
+        :return:
+        """
+        if stream or not self.single_flight or method.lower() == "post":
+            return self.__request__(
+                url, method, *args, stream=stream, spool=spool, **kwargs
+            )
+
+        key = make_cache_key(url, self.headers)
+        with self._inflight_lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = [Future(), 0]
             else:
-                # defaults to google
-                return f"{self.base_url}{self.api_version}/search/{urlencode(params)}"
-        else:
-            e = "endpoint selected: {endpoint} is not supported."
-            self.logger.error(e)
-            raise ValueError(e)
+                flight[1] += 1
+        future = flight[0]
+        if not leader:
+            self.__log__(
+                logging.DEBUG,
+                "coalesced",
+                "Waiting for in flight request to %(url)s",
+                url=url,
+            )
+            # nested lists and dicts are copied too, so callers can't change each other's results
+            return copy.deepcopy(future.result())
+
+        try:
+            results = self.__request__(url, method, *args, **kwargs)
+        except BaseException as e:
+            with self._inflight_lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        # no caller can join once the request is removed, the count is final
+        with self._inflight_lock:
+            del self._inflight[key]
+        future.set_result(results)
+        return copy.deepcopy(results) if flight[1] else results
+
+    def __get_tracer__(self):
+        """
+            get the tracer of the client
+        :return: opentelemetry.trace.Tracer or None when tracing is off
+        """
+        if not self._tracer_resolved:
+            self._tracer = get_tracer(self._tracer)
+            self._tracer_resolved = True
+        return self._tracer
+
+    def __start_request_span__(self, tracer, timing: RequestTiming):
+        """
+            start the span of a call to the API
+        :param tracer: opentelemetry.trace.Tracer: or None to skip the span
+        :param timing: RequestTiming: timing of the call
+        :return: context manager giving the span or None
+        """
+        return start_span(
+            tracer,
+            f"serply.{timing.endpoint or 'request'}",
+            {
+                "serply.endpoint": timing.endpoint,
+                "serply.engine": timing.engine,
+                "http.request.method": timing.method.upper(),
+                "url.full": timing.url,
+            },
+            client=True,
+        )
+
+    def __start_timing__(self, url: str, method: str) -> RequestTiming:
+        """
+            start timing a call to the API and run the start hook, if any
+        :param url: str: url of the request
+        :param method: str: method of the request
+        :return: RequestTiming
+        """
+        timing = RequestTiming(
+            self.__get_endpoint__(url),
+            "post" if method.lower() == "post" else "get",
+            url,
+            self.__get_engine__(url),
+        )
+        self.__run_hook__(self.on_request_start, timing)
+        return timing
+
+    def __end_timing__(self, timing: RequestTiming, span=None):
+        """
+            stop timing a call to the API, add it to the metrics and its span and run the end hook, if any
+        :param timing: RequestTiming
+        :param span: span of the call or None
+        :return:
+        """
+        timing.end = time.monotonic()
+        if self.metrics is not None:
+            self.metrics.observe(timing)
+        set_request_attributes(span, timing)
+        self.__run_hook__(self.on_request_end, timing)
+
+    def __run_hook__(self, hook: Callable, timing: RequestTiming):
+        # a failing hook is logged, it never fails the request
+        if hook is None:
+            return
+        try:
+            hook(timing)
+        except Exception as e:
+            self.__log__(
+                logging.ERROR,
+                "hook_error",
+                "Error in request hook %(hook)r: %(error)r",
+                hook=hook,
+                error=e,
+            )
 
-    def __make_request__(self, url: str, method: str = "get", *args, **kwargs) -> Dict:
+    def __request__(
+        self,
+        url: str,
+        method: str = "get",
+        *args,
+        stream: bool = False,
+        spool: Dict = None,
+        **kwargs,
+    ) -> Dict:
         """
-            make a request to the API
+            send a request to the API, timing it for the metrics and request hooks
         :param url: str: url to make request to
         :param method: str: method to use for request (defaults to get) [get, post]
         :param args:
+        :param stream: bool: return a StreamedResponse parsed as the body is read
+        :param spool: dict: paths string fields of a streamed response are written to by key (None for a temporary file)
+        :param kwargs:
+        :return:
+        """
+        tracer = self.__get_tracer__()
+        if not self._timed and self.metrics is None and tracer is None:
+            return self.__send__(
+                url, method, *args, stream=stream, spool=spool, **kwargs
+            )
+        timing = self.__start_timing__(url, method)
+        with self.__start_request_span__(tracer, timing) as span:
+            try:
+                return self.__send__(
+                    url,
+                    method,
+                    *args,
+                    stream=stream,
+                    spool=spool,
+                    timing=timing,
+                    **kwargs,
+                )
+            except Exception as e:
+                timing.error = e
+                raise
+            finally:
+                if self._timed:
+                    set_current_timing(None)
+                self.__end_timing__(timing, span)
+
+    def __send__(
+        self,
+        url: str,
+        method: str = "get",
+        *args,
+        stream: bool = False,
+        spool: Dict = None,
+        timing: RequestTiming = None,
+        **kwargs,
+    ) -> Dict:
+        """
+            send a request to the API, retrying failures allowed by the retry policy
+        :param url: str: url to make request to
+        :param method: str: method to use for request (defaults to get) [get, post]
+        :param args:
+        :param stream: bool: return a StreamedResponse parsed as the body is read
+        :param spool: dict: paths string fields of a streamed response are written to by key (None for a temporary file)
+        :param timing: RequestTiming: filled with the outcome and phases of the request, None when nothing observes it
         :param kwargs:
         :return:
         """
         results = {}
-        start = time.time()
-        if method.lower() == "post":
-            resp = self.session.post(url, *args, **kwargs)
-        else:
-            resp = self.session.get(url, *args, **kwargs)
+        method = "post" if method.lower() == "post" else "get"
+        start = time.monotonic()
+        cache_key = None if stream else self.__get_cache_key__(url, method)
+        if cache_key is not None:
+            cached = self.__get_cached__(cache_key, url, start)
+            if cached is not None:
+                if timing is not None:
+                    timing.cached = True
+                return self.__get_models__(cached, url)
+        session = self.__get_session__()
+        if self.cassette is not None:
+            session = CassetteSession(self.cassette, session, self.headers)
+        attempt = 0
+        while True:
+            attempt += 1
+            for limiter in self.__get_rate_limiters__(url):
+                limiter.acquire()
+            if timing is not None:
+                timing.attempts = attempt
+                if self._timed:
+                    # read by the instrumented connections of this thread
+                    set_current_timing(timing)
+            try:
+                resp = session.request(method, url, *args, stream=stream, **kwargs)
+            except Exception as e:
+                if self.retry is None or not self.retry.should_retry_exception(
+                    e, attempt
+                ):
+                    raise
+                delay = self.retry.get_delay(attempt)
+                self.__log__(
+                    logging.WARNING,
+                    "retry",
+                    "Error making request to %(method)s %(url)s: %(error)r, retrying in %(delay).2f seconds",
+                    method=method,
+                    url=url,
+                    error=e,
+                    attempt=attempt,
+                    delay=delay,
+                )
+                time.sleep(delay)
+                continue
+
+            if timing is not None:
+                timing.status = resp.status_code
+                if not stream:
+                    # the body is read by session.request after the response headers
+                    timing.done("body")
+            if (
+                resp.status_code != 200
+                and self.retry is not None
+                and self.retry.should_retry_status(resp.status_code, attempt)
+            ):
+                delay = self.retry.get_delay(attempt, resp.headers.get("Retry-After"))
+                self.__log__(
+                    logging.WARNING,
+                    "retry",
+                    "Error making request to %(method)s %(url)s status code: %(status)s, retrying in %(delay).2f seconds",
+                    method=method,
+                    url=url,
+                    status=resp.status_code,
+                    attempt=attempt,
+                    delay=delay,
+                )
+                resp.close()
+                time.sleep(delay)
+                continue
+            break
+
+        if stream:
+            return self.__get_streamed_response__(
+                resp, url, method, start, attempt, spool, timing
+            )
 
         if resp.status_code == 200:
-            results = resp.json()
+            content = resp.content
+            decode_start = time.monotonic()
+            results = self.json_decoder(content)
+            if timing is not None:
+                timing.add("decode", time.monotonic() - decode_start)
+            if cache_key is not None:
+                self.cache.set(cache_key, dict(results), self.__get_endpoint__(url))
+            # urllib3 counts the bytes read from the socket, before decoding
+            tell = getattr(resp.raw, "tell", None)
+            compressed = tell() if tell is not None else None
+            self.__record_transfer__(results, url, compressed, len(content))
+            if timing is not None:
+                timing.size = len(content) if compressed is None else compressed
         else:
-            self.logger.error(
-                f"Error making request to {method} {url} status code: {resp.status_code}"
+            self.__log__(
+                logging.ERROR,
+                "request_error",
+                "Error making request to %(method)s %(url)s status code: %(status)s",
+                method=method,
+                url=url,
+                status=resp.status_code,
             )
             results = {
                 "error": f"Error making request to {method} {url} status code: {resp.status_code}"
             }
 
-        end = time.time()
+        end = time.monotonic()
 
-        self.logger.debug(f"Request took {end - start} seconds")
+        self.__log__(
+            logging.DEBUG,
+            "request",
+            "Request took %(request_time)s seconds",
+            method=method,
+            url=url,
+            request_time=end - start,
+            attempts=attempt,
+        )
         results["request_time"] = end - start
+        results["attempts"] = attempt
 
-        return results
+        return self.__get_models__(results, url)
 
     async def __make_request_async__(
-        self, url: str, method: str = "get", *args, **kwargs
+        self,
+        url: str,
+        method: str = "get",
+        *args,
+        stream: bool = False,
+        spool: Dict = None,
+        **kwargs,
     ) -> Dict:
         """
-            make a request to the API
+            make a request to the API, sharing identical get requests in flight when single_flight is on
         :param url: str: url to make request to
         :param method: str: method to use for request (defaults to get) [get, post]
         :param args:
+        :param stream: bool: return an AsyncStreamedResponse parsed as the body is read
+        :param spool: dict: paths string fields of a streamed response are written to by key (None for a temporary file)
+        :param kwargs:
+        :return:
+        """
+        if stream or not self.single_flight or method.lower() == "post":
+            return await self.__request_async__(
+                url, method, *args, stream=stream, spool=spool, **kwargs
+            )
+
+        import asyncio
+
+        # tasks belong to their event loop, so the loop is part of the key
+        key = (asyncio.get_running_loop(), make_cache_key(url, self.headers))
+        flight = self._inflight_async.get(key)
+        leader = flight is None
+        if leader:
+            task = asyncio.ensure_future(
+                self.__request_async__(url, method, *args, **kwargs)
+            )
+            flight = self._inflight_async[key] = [task, 0]
+            task.add_done_callback(lambda _: self._inflight_async.pop(key, None))
+        else:
+            flight[1] += 1
+            self.__log__(
+                logging.DEBUG,
+                "coalesced",
+                "Waiting for in flight request to %(url)s",
+                url=url,
+            )
+        # a cancelled caller must not cancel the request shared with the others
+        results = await asyncio.shield(flight[0])
+        # nested lists and dicts are copied too, so callers can't change each other's results
+        if leader and not flight[1]:
+            return results
+        return copy.deepcopy(results)
+
+    async def __request_async__(
+        self,
+        url: str,
+        method: str = "get",
+        *args,
+        stream: bool = False,
+        spool: Dict = None,
+        **kwargs,
+    ) -> Dict:
+        """
+            send a request to the API, timing it for the metrics and request hooks
+        :param url: str: url to make request to
+        :param method: str: method to use for request (defaults to get) [get, post]
+        :param args:
+        :param stream: bool: return an AsyncStreamedResponse parsed as the body is read
+        :param spool: dict: paths string fields of a streamed response are written to by key (None for a temporary file)
+        :param kwargs:
+        :return:
+        """
+        tracer = self.__get_tracer__()
+        if not self._timed and self.metrics is None and tracer is None:
+            return await self.__send_async__(
+                url, method, *args, stream=stream, spool=spool, **kwargs
+            )
+        timing = self.__start_timing__(url, method)
+        with self.__start_request_span__(tracer, timing) as span:
+            try:
+                return await self.__send_async__(
+                    url,
+                    method,
+                    *args,
+                    stream=stream,
+                    spool=spool,
+                    timing=timing,
+                    **kwargs,
+                )
+            except Exception as e:
+                timing.error = e
+                raise
+            finally:
+                self.__end_timing__(timing, span)
+
+    async def __send_async__(
+        self,
+        url: str,
+        method: str = "get",
+        *args,
+        stream: bool = False,
+        spool: Dict = None,
+        timing: RequestTiming = None,
+        **kwargs,
+    ) -> Dict:
+        """
+            send a request to the API, retrying failures allowed by the retry policy
+        :param url: str: url to make request to
+        :param method: str: method to use for request (defaults to get) [get, post]
+        :param args:
+        :param stream: bool: return an AsyncStreamedResponse parsed as the body is read
+        :param spool: dict: paths string fields of a streamed response are written to by key (None for a temporary file)
+        :param timing: RequestTiming: filled with the outcome and phases of the request, None when nothing observes it
         :param kwargs:
         :return:
         """
         results = {}
-        start = time.time()
-        async with aiohttp.ClientSession(headers=self.headers) as session:
-            if method.lower() == "post":
-                async with session.post(url, *args, **kwargs) as resp:
+        method = "post" if method.lower() == "post" else "get"
+        start = time.monotonic()
+        cache_key = None if stream else self.__get_cache_key__(url, method)
+        if cache_key is not None:
+            cached = self.__get_cached__(cache_key, url, start)
+            if cached is not None:
+                if timing is not None:
+                    timing.cached = True
+                return self.__get_models__(cached, url)
+        session = await self.__get_async_session__()
+        if self.cassette is not None:
+            session = AsyncCassetteSession(self.cassette, session, self.headers)
+        if self._timed:
+            # filled by the trace config of the session
+            kwargs["trace_request_ctx"] = timing
+        # already loaded by __get_async_session__
+        import asyncio
+        import aiohttp
+
+        attempt = 0
+        while True:
+            attempt += 1
+            for limiter in self.__get_rate_limiters__(url):
+                await limiter.acquire_async()
+            if timing is not None:
+                timing.attempts = attempt
+            try:
+                resp = await session.request(method, url, *args, **kwargs)
+                if timing is not None:
+                    timing.status = resp.status
+                if (
+                    resp.status != 200
+                    and self.retry is not None
+                    and self.retry.should_retry_status(resp.status, attempt)
+                ):
+                    delay = self.retry.get_delay(
+                        attempt, resp.headers.get("Retry-After")
+                    )
+                    self.__log__(
+                        logging.WARNING,
+                        "retry",
+                        "Error making request to %(method)s %(url)s status code: %(status)s, retrying in %(delay).2f seconds",
+                        method=method,
+                        url=url,
+                        status=resp.status,
+                        attempt=attempt,
+                        delay=delay,
+                    )
+                    resp.release()
+                else:
                     if resp.status != 200:
-                        self.logger.error(
-                            f"Error making request to {method} {url} status code: {resp.status}"
+                        self.__log__(
+                            logging.ERROR,
+                            "request_error",
+                            "Error making request to %(method)s %(url)s status code: %(status)s",
+                            method=method,
+                            url=url,
+                            status=resp.status,
                         )
                     resp.raise_for_status()
-                    results = await resp.json()
-            else:
-                async with session.get(url) as resp:
-                    if resp.status != 200:
-                        self.logger.error(
-                            f"Error making request to {method} {url} status code: {resp.status}"
+                    if stream:
+                        # the body is released by the streamed response once read
+                        break
+                    try:
+                        body_start = time.monotonic()
+                        content = await resp.read()
+                        decode_start = time.monotonic()
+                        compressed = get_wire_size(resp)
+                    finally:
+                        resp.release()
+                    results = self.json_decoder(content)
+                    if timing is not None:
+                        timing.add("body", decode_start - body_start)
+                        timing.add("decode", time.monotonic() - decode_start)
+                        timing.size = len(content) if compressed is None else compressed
+                    if cache_key is not None:
+                        self.cache.set(
+                            cache_key, dict(results), self.__get_endpoint__(url)
                         )
-                    resp.raise_for_status()
-                    results = await resp.json()
+                    self.__record_transfer__(results, url, compressed, len(content))
+                    break
+            except aiohttp.ClientResponseError:
+                raise
+            except Exception as e:
+                if self.retry is None or not self.retry.should_retry_exception(
+                    e, attempt
+                ):
+                    raise
+                delay = self.retry.get_delay(attempt)
+                self.__log__(
+                    logging.WARNING,
+                    "retry",
+                    "Error making request to %(method)s %(url)s: %(error)r, retrying in %(delay).2f seconds",
+                    method=method,
+                    url=url,
+                    error=e,
+                    attempt=attempt,
+                    delay=delay,
+                )
+            await asyncio.sleep(delay)
 
-        end = time.time()
-        self.logger.debug(f"Request took {end - start} seconds")
+        if stream:
+            return AsyncStreamedResponse(
+                RESULT_KEYS.get(self.__get_endpoint__(url), "results"),
+                resp,
+                fields={"request_time": time.monotonic() - start, "attempts": attempt},
+                files=spool,
+                on_finish=self.__get_stream_finisher__(
+                    url, start, timing, lambda: get_wire_size(resp)
+                ),
+            )
+
+        end = time.monotonic()
+        self.__log__(
+            logging.DEBUG,
+            "request",
+            "Request took %(request_time)s seconds",
+            method=method,
+            url=url,
+            request_time=end - start,
+            attempts=attempt,
+        )
         results["request_time"] = end - start
+        results["attempts"] = attempt
+        return self.__get_models__(results, url)
+
+    def __get_endpoint_method__(
+        self, endpoint: str, is_async: bool = False
+    ) -> Callable:
+        """
+            get the public method performing requests against an endpoint
+        :param endpoint: str: endpoint name [search, video, image, product, news, job, crawl, serp, maps, scholar]
+        :param is_async: bool: return the *_async variant
+        :return: callable: bound method
+        """
+        if endpoint not in ENDPOINTS:
+            e = f"endpoint selected: {endpoint} is not supported."
+            self.__log__(
+                logging.ERROR,
+                "unsupported_endpoint",
+                "endpoint selected: %(endpoint)s is not supported.",
+                endpoint=endpoint,
+            )
+            raise ValueError(e)
+        return getattr(self, f"{endpoint}_async" if is_async else endpoint)
+
+    @staticmethod
+    def __get_item_params__(item, params: Dict) -> Dict:
+        """
+            merge a bulk item with the shared parameters
+        :param item: str or dict: keyword or dict of parameters including keyword
+        :param params: dict: parameters shared by all items
+        :return: dict: keyword arguments for the endpoint method
+        """
+        if isinstance(item, dict):
+            return {**params, **item}
+        return {**params, "keyword": item}
+
+    async def bulk(
+        self, endpoint: str, items: Iterable, concurrency: int = 64, *args, **kwargs
+    ) -> List[Dict]:
+        """
+            run an endpoint over many keywords with a bounded number of requests in flight
+            a fixed set of workers pulls items so memory doesn't grow with the number of items
+        :param endpoint: str: endpoint to use [search, video, image, product, news, job, crawl, serp, maps, scholar]
+        :param items: iterable: keywords, or dicts of per item parameters including keyword
+        :param concurrency: int: max number of requests in flight (defaults to 64)
+        :param kwargs: parameters shared by all items (e.g. num, gl, hl, lr)
+        :return: list: results in the same order as items, failed items hold an error
+        """
+        import asyncio
+
+        method = self.__get_endpoint_method__(endpoint, is_async=True)
+        items = list(items)
+        results = [None] * len(items)
+        pending = iter(enumerate(items))
+
+        async def worker():
+            # the iterator is shared, every item is taken by exactly one worker
+            for index, item in pending:
+                try:
+                    results[index] = await method(
+                        *args, **self.__get_item_params__(item, kwargs)
+                    )
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.__log__(
+                        logging.ERROR,
+                        "item_error",
+                        "Error running %(endpoint)s for %(item)s: %(error)r",
+                        endpoint=endpoint,
+                        item=item,
+                        error=e,
+                    )
+                    results[index] = {"error": f"Error running {endpoint}: {e!r}"}
+
+        with start_span(
+            self.__get_tracer__(),
+            "serply.bulk",
+            {
+                "serply.endpoint": endpoint,
+                "serply.items": len(items),
+                "serply.concurrency": concurrency,
+            },
+        ):
+            # the workers run in tasks copying the context, so their calls are children of the span
+            await asyncio.gather(
+                *(worker() for _ in range(min(max(concurrency, 1), len(items))))
+            )
         return results
 
+    def map(
+        self,
+        endpoint: str,
+        items: Iterable,
+        max_workers: int = 8,
+        ordered: bool = True,
+        *args,
+        **kwargs,
+    ) -> Iterator:
+        """
+            run an endpoint over many keywords on a pool of threads
+            each worker gets its own session, all of them share one connection pool with room for max_workers
+        :param endpoint: str: endpoint to use [search, video, image, product, news, job, crawl, serp, maps, scholar]
+        :param items: iterable: keywords, or dicts of per item parameters including keyword
+        :param max_workers: int: number of threads (defaults to 8)
+        :param ordered: bool: yield results in input order, otherwise yield (index, result) as they complete
+        :param kwargs: parameters shared by all items (e.g. num, gl, hl, lr)
+        :return: iterator: results, failed items hold an error
+        """
+        method = self.__get_endpoint_method__(endpoint)
+        if self._custom_adapter or self.pool_maxsize >= max_workers:
+            adapter = self.adapter
+        else:
+            adapter = self.__build_adapter__(max_workers)
+
+        def init_worker():
+            self._local.session = self.__build_session__(adapter)
+
+        # worker threads don't inherit the context, the span is made current in each of them
+        span = open_span(
+            self.__get_tracer__(),
+            "serply.map",
+            {"serply.endpoint": endpoint, "serply.max_workers": max_workers},
+        )
+
+        def run(item):
+            try:
+                with use_span(span):
+                    return method(*args, **self.__get_item_params__(item, kwargs))
+            except Exception as e:
+                self.__log__(
+                    logging.ERROR,
+                    "item_error",
+                    "Error running %(endpoint)s for %(item)s: %(error)r",
+                    endpoint=endpoint,
+                    item=item,
+                    error=e,
+                )
+                return {"error": f"Error running {endpoint}: {e!r}"}
+
+        executor = ThreadPoolExecutor(max_workers=max_workers, initializer=init_worker)
+        futures = [executor.submit(run, item) for item in items]
+        error = None
+        try:
+            if ordered:
+                for future in futures:
+                    yield future.result()
+            else:
+                indexes = {future: index for index, future in enumerate(futures)}
+                for future in as_completed(futures):
+                    yield indexes[future], future.result()
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            # stop queued work when the caller stops consuming early
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+            if adapter is not self.adapter:
+                adapter.close()
+            end_span(span, error)
+
+    def stream(self, endpoint: str, keyword: str, *args, **kwargs) -> StreamedResponse:
+        """
+            perform a search parsing the response as it is read instead of loading it whole
+            iterate over the returned response to get results one at a time, html is spooled to a file
+        :param endpoint: str: endpoint to use [search, video, image, product, news, job, crawl, serp, maps, scholar]
+        :param keyword: str: keywords to search for
+        :param kwargs: parameters of the endpoint (e.g. num, start, gl, hl, lr, engine)
+        :return: StreamedResponse: results as they are parsed, other fields in fields, html in html
+        """
+        url = self.__generate_url__(keyword=keyword, endpoint=endpoint, *args, **kwargs)
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing streamed %(endpoint)s with %(url)s",
+            endpoint=endpoint,
+            url=url,
+        )
+        return self.__make_request__(url=url, stream=True)
+
+    async def stream_async(
+        self, endpoint: str, keyword: str, *args, **kwargs
+    ) -> AsyncStreamedResponse:
+        """
+            perform a search asynchronously parsing the response as it is read instead of loading it whole
+            iterate over the returned response with async for to get results one at a time
+        :param endpoint: str: endpoint to use [search, video, image, product, news, job, crawl, serp, maps, scholar]
+        :param keyword: str: keywords to search for
+        :param kwargs: parameters of the endpoint (e.g. num, start, gl, hl, lr, engine)
+        :return: AsyncStreamedResponse: results as they are parsed, other fields in fields
+        """
+        url = self.__generate_url__(keyword=keyword, endpoint=endpoint, *args, **kwargs)
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing async streamed %(endpoint)s with %(url)s",
+            endpoint=endpoint,
+            url=url,
+        )
+        return await self.__make_request_async__(url=url, stream=True)
+
+    @staticmethod
+    def __get_html_spool__(html_file: Union[bool, str]) -> Dict:
+        """
+            get where a streamed response writes its html
+        :param html_file: bool or str: path of the file, or True for a temporary file
+        :return: dict: spool option of __make_request__
+        """
+        return {"html": None if html_file is True else os.fspath(html_file)}
+
+    def __get_result_key__(self, endpoint: str) -> str:
+        """
+            get the key of the list of results in the responses of an endpoint
+        :param endpoint: str: endpoint name
+        :return: str: key of the results (e.g. results, entries, places)
+        """
+        if endpoint not in RESULT_KEYS:
+            e = f"endpoint selected: {endpoint} does not support pagination."
+            self.__log__(
+                logging.ERROR,
+                "unsupported_endpoint",
+                "endpoint selected: %(endpoint)s does not support pagination.",
+                endpoint=endpoint,
+            )
+            raise ValueError(e)
+        return RESULT_KEYS[endpoint]
+
+    def iter_results(
+        self,
+        endpoint: str,
+        keyword: str,
+        max_results: int = 100,
+        page_size: int = 10,
+        *args,
+        **kwargs,
+    ) -> Iterator[Dict]:
+        """
+            iterate over results across pages, the next page is fetched in the background
+            while the current one is consumed
+        :param endpoint: str: endpoint to use [search, video, image, product, news, job, crawl, maps, scholar]
+        :param keyword: str: keywords to search for
+        :param max_results: int: max number of results to return (defaults to 100)
+        :param page_size: int: number of results requested per page (defaults to 10)
+        :param start: int: start index for results (defaults to 0)
+        :param kwargs: parameters of the endpoint (e.g. gl, hl, lr)
+        :return: iterator: results, stops at max_results or after a short page, raises RuntimeError with the error of a failed page
+        """
+        method = self.__get_endpoint_method__(endpoint)
+        result_key = self.__get_result_key__(endpoint)
+        offset = kwargs.pop("start", 0) or 0
+
+        span = open_span(
+            self.__get_tracer__(),
+            "serply.iter_results",
+            {
+                "serply.endpoint": endpoint,
+                "serply.max_results": max_results,
+                "serply.page_size": page_size,
+            },
+        )
+
+        def fetch(start: int) -> Dict:
+            # pages are fetched on a worker thread, which doesn't inherit the context
+            with use_span(span):
+                return method(
+                    keyword=keyword, num=page_size, start=start, *args, **kwargs
+                )
+
+        def init_worker():
+            self._local.session = self.__build_session__(self.adapter)
+
+        executor = ThreadPoolExecutor(max_workers=1, initializer=init_worker)
+        future = executor.submit(fetch, offset)
+        count = 0
+        error = None
+        try:
+            while future is not None:
+                page = future.result()
+                if "error" in page:
+                    # a page that failed can't be told apart from the end of the results
+                    raise RuntimeError(page["error"])
+                items = page.get(result_key) or []
+                offset += page_size
+                if len(items) >= page_size and count + len(items) < max_results:
+                    future = executor.submit(fetch, offset)
+                else:
+                    future = None
+                for item in items[: max_results - count]:
+                    count += 1
+                    yield item
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if future is not None:
+                future.cancel()
+            executor.shutdown(wait=False)
+            end_span(span, error)
+
+    async def aiter_results(
+        self,
+        endpoint: str,
+        keyword: str,
+        max_results: int = 100,
+        page_size: int = 10,
+        lookahead: int = 3,
+        *args,
+        **kwargs,
+    ) -> AsyncIterator[Dict]:
+        """
+            iterate asynchronously over results across pages, keeping the next pages in flight
+            so round trips overlap instead of adding up
+        :param endpoint: str: endpoint to use [search, video, image, product, news, job, crawl, maps, scholar]
+        :param keyword: str: keywords to search for
+        :param max_results: int: max number of results to return (defaults to 100)
+        :param page_size: int: number of results requested per page (defaults to 10)
+        :param lookahead: int: number of pages requested concurrently (defaults to 3)
+        :param start: int: start index for results (defaults to 0)
+        :param kwargs: parameters of the endpoint (e.g. gl, hl, lr)
+        :return: async iterator: results in order, stops at max_results or after a short page
+        """
+        import asyncio
+
+        method = self.__get_endpoint_method__(endpoint, is_async=True)
+        result_key = self.__get_result_key__(endpoint)
+        offset = kwargs.pop("start", 0) or 0
+        end = offset + max_results
+        pending = deque()
+
+        span = open_span(
+            self.__get_tracer__(),
+            "serply.aiter_results",
+            {
+                "serply.endpoint": endpoint,
+                "serply.max_results": max_results,
+                "serply.page_size": page_size,
+            },
+        )
+
+        def schedule(start: int) -> int:
+            # the tasks copy the context they are created in, so their calls are children of the span
+            with use_span(span):
+                while len(pending) < max(lookahead, 1) and start < end:
+                    pending.append(
+                        asyncio.ensure_future(
+                            method(
+                                keyword=keyword,
+                                num=page_size,
+                                start=start,
+                                *args,
+                                **kwargs,
+                            )
+                        )
+                    )
+                    start += page_size
+            return start
+
+        count = 0
+        error = None
+        try:
+            next_start = schedule(offset)
+            while pending:
+                page = await pending.popleft()
+                items = page.get(result_key) or []
+                if len(items) < page_size:
+                    for task in pending:
+                        task.cancel()
+                    pending.clear()
+                else:
+                    next_start = schedule(next_start)
+                for item in items[: max_results - count]:
+                    count += 1
+                    yield item
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            for task in pending:
+                task.cancel()
+            end_span(span, error)
+
+    def run_sharded(
+        self,
+        endpoint: str,
+        keywords,
+        processes: int = None,
+        concurrency: int = 64,
+        rate_limit: float = None,
+        shard_size: int = 1000,
+        **kwargs,
+    ) -> Iterator[Dict]:
+        """
+            run an endpoint over a very large keyword list split across worker processes
+            every worker builds its own client with this client's options and runs its shards with bulk()
+        :param endpoint: str: endpoint to use [search, video, image, product, news, job, crawl, serp, maps, scholar]
+        :param keywords: str or iterable: path to a file with one keyword per line, or an iterable of keywords or dicts
+        :param processes: int: number of worker processes (defaults to the number of CPUs, at most concurrency)
+        :param concurrency: int: max number of requests in flight across all workers (defaults to 64)
+        :param rate_limit: float: max requests per second across all workers (defaults to no limit)
+        :param shard_size: int: number of keywords sent to a worker at a time (defaults to 1000)
+        :param kwargs: parameters shared by all items (e.g. num, gl, hl, lr)
+        :return: iterator: results in input order, failed items hold an error
+        """
+        self.__get_endpoint_method__(endpoint)
+        return run_sharded(
+            type(self),
+            self._options,
+            endpoint,
+            keywords,
+            processes=processes,
+            concurrency=concurrency,
+            rate_limit=rate_limit,
+            shard_size=shard_size,
+            **kwargs,
+        )
+
     def search(
         self,
         keyword: str,
@@ -227,7 +1706,13 @@ class Serply(object):
             *args,
             **kwargs,
         )
-        self.logger.debug(f"Performing search with {locals()}")
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing %(endpoint)s with %(url)s",
+            endpoint="search",
+            url=url,
+        )
         return self.__make_request__(url=url)
 
     async def search_async(
@@ -251,10 +1736,16 @@ class Serply(object):
         results = {}
 
         url = self.__generate_url__(
-            keyword=keyword, num=num, endpoint="video", *args, **kwargs
+            keyword=keyword, num=num, engine=engine, *args, **kwargs
         )
 
-        self.logger.debug(f"Performing async search with {locals()}")
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing async %(endpoint)s with %(url)s",
+            endpoint="search",
+            url=url,
+        )
         return await self.__make_request_async__(url=url)
 
     def video(
@@ -291,7 +1782,13 @@ class Serply(object):
             *args,
             **kwargs,
         )
-        self.logger.debug(f"Performing video search with {locals()}")
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing %(endpoint)s with %(url)s",
+            endpoint="video",
+            url=url,
+        )
         return self.__make_request__(url=url)
 
     async def video_async(self, keyword: str, num: int = 10, *args, **kwargs) -> dict:
@@ -315,7 +1812,13 @@ class Serply(object):
             keyword=keyword, num=num, endpoint="video", *args, **kwargs
         )
 
-        self.logger.debug(f"Performing video async search with {locals()}")
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing async %(endpoint)s with %(url)s",
+            endpoint="video",
+            url=url,
+        )
         return await self.__make_request_async__(url=url)
 
     def image(
@@ -352,7 +1855,13 @@ class Serply(object):
             *args,
             **kwargs,
         )
-        self.logger.debug(f"Performing image search with {locals()}")
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing %(endpoint)s with %(url)s",
+            endpoint="image",
+            url=url,
+        )
         return self.__make_request__(url=url)
 
     async def image_async(self, keyword: str, num: int = 10, *args, **kwargs) -> dict:
@@ -376,7 +1885,13 @@ class Serply(object):
             keyword=keyword, num=num, endpoint="image", *args, **kwargs
         )
 
-        self.logger.debug(f"Performing image async search with {locals()}")
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing async %(endpoint)s with %(url)s",
+            endpoint="image",
+            url=url,
+        )
         return await self.__make_request_async__(url=url)
 
     def product(
@@ -401,7 +1916,13 @@ class Serply(object):
             *args,
             **kwargs,
         )
-        self.logger.debug(f"Performing product search with {locals()}")
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing %(endpoint)s with %(url)s",
+            endpoint="product",
+            url=url,
+        )
         return self.__make_request__(url=url)
 
     async def product_async(self, keyword: str, *args, **kwargs) -> dict:
@@ -418,7 +1939,13 @@ class Serply(object):
             keyword=keyword, endpoint="product", *args, **kwargs
         )
 
-        self.logger.debug(f"Performing product async search with {locals()}")
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing async %(endpoint)s with %(url)s",
+            endpoint="product",
+            url=url,
+        )
         return await self.__make_request_async__(url=url)
 
     def news(
@@ -444,7 +1971,13 @@ class Serply(object):
             keyword=keyword, num=num, endpoint="news", engine=engine, *args, **kwargs
         )
 
-        self.logger.debug(f"Performing news search with {locals()}")
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing %(endpoint)s with %(url)s",
+            endpoint="news",
+            url=url,
+        )
         return self.__make_request__(url=url)
 
     async def news_async(
@@ -471,7 +2004,13 @@ class Serply(object):
             keyword=keyword, num=num, endpoint="news", engine=engine, *args, **kwargs
         )
 
-        self.logger.debug(f"Performing news async search with {locals()}")
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing async %(endpoint)s with %(url)s",
+            endpoint="news",
+            url=url,
+        )
         return await self.__make_request_async__(url=url)
 
     def job(
@@ -491,7 +2030,13 @@ class Serply(object):
             keyword=keyword, num=num, endpoint="job", engine=engine, start=start
         )
 
-        self.logger.debug(f"Performing job search with {locals()}")
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing %(endpoint)s with %(url)s",
+            endpoint="job",
+            url=url,
+        )
         return self.__make_request__(url=url)
 
     async def job_async(
@@ -512,7 +2057,13 @@ class Serply(object):
             keyword=keyword, num=num, endpoint="job", engine=engine, start=start
         )
 
-        self.logger.debug(f"Performing job async search with {locals()}")
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing async %(endpoint)s with %(url)s",
+            endpoint="job",
+            url=url,
+        )
         return await self.__make_request_async__(url=url)
 
     def crawl(
@@ -524,6 +2075,7 @@ class Serply(object):
         gl="us",
         lr="lang_en",
         *args,
+        html_file: Union[bool, str] = None,
         **kwargs,
     ) -> dict:
         """
@@ -539,6 +2091,8 @@ class Serply(object):
         :param cr: str: country code to use countrXX for search (e.g countryUS, countryCA, countryGB)
         :param gl: str: geolocation country code (xx) to perform search (e.g 'us', 'ca', 'gb')
         :param loc: str: find results for a given area (e.g. "new york", "san francisco", "london)
+        :param html_file: bool or str: write the html to this path, or to a temporary file if True, as the response streams in
+            html is then a SpooledFile handle instead of a string
         :return: dict: response from API
         """
         url = self.__generate_url__(
@@ -552,11 +2106,28 @@ class Serply(object):
             *args,
             **kwargs,
         )
-        self.logger.debug(f"Performing crawl with {locals()}")
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing %(endpoint)s with %(url)s",
+            endpoint="crawl",
+            url=url,
+        )
+        if html_file:
+            response = self.__make_request__(
+                url=url, stream=True, spool=self.__get_html_spool__(html_file)
+            )
+            return self.__get_models__(response.to_dict(), url)
         return self.__make_request__(url=url)
 
     async def crawl_async(
-        self, keyword: str, num: int = 10, engine: str = "google", *args, **kwargs
+        self,
+        keyword: str,
+        num: int = 10,
+        engine: str = "google",
+        *args,
+        html_file: Union[bool, str] = None,
+        **kwargs,
     ) -> dict:
         """
             perform a search asynchronously returning back the HTML for custom parsing
@@ -571,6 +2142,8 @@ class Serply(object):
         :param cr: str: country code to use countrXX for search (e.g countryUS, countryCA, countryGB)
         :param gl: str: geolocation country code (xx) to perform search (e.g 'us', 'ca', 'gb')
         :param loc: str: find results for a given area (e.g. "new york", "san francisco", "london)
+        :param html_file: bool or str: write the html to this path, or to a temporary file if True, as the response streams in
+            html is then a SpooledFile handle instead of a string
         :return: dict: response from API
         """
         results = {}
@@ -579,7 +2152,18 @@ class Serply(object):
             keyword=keyword, num=num, endpoint="crawl", *args, **kwargs
         )
 
-        self.logger.debug(f"Performing async crawl with {locals()}")
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing async %(endpoint)s with %(url)s",
+            endpoint="crawl",
+            url=url,
+        )
+        if html_file:
+            response = await self.__make_request_async__(
+                url=url, stream=True, spool=self.__get_html_spool__(html_file)
+            )
+            return self.__get_models__(await response.to_dict_async(), url)
         return await self.__make_request_async__(url=url)
 
     def serp(
@@ -622,7 +2206,13 @@ class Serply(object):
             *args,
             **kwargs,
         )
-        self.logger.debug(f"Performing serp with {locals()}")
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing %(endpoint)s with %(url)s",
+            endpoint="serp",
+            url=url,
+        )
         return self.__make_request__(url=url)
 
     async def serp_async(
@@ -656,7 +2246,13 @@ class Serply(object):
             keyword=keyword, num=num, domain=domain, endpoint="serp", *args, **kwargs
         )
 
-        self.logger.debug(f"Performing async serp with {locals()}")
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing async %(endpoint)s with %(url)s",
+            endpoint="serp",
+            url=url,
+        )
         return await self.__make_request_async__(url=url)
 
     def maps(
@@ -692,7 +2288,13 @@ class Serply(object):
             **kwargs,
         )
 
-        self.logger.debug(f"Performing job search with {locals()}")
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing %(endpoint)s with %(url)s",
+            endpoint="maps",
+            url=url,
+        )
         return self.__make_request__(url=url)
 
     async def maps_async(
@@ -728,7 +2330,13 @@ class Serply(object):
             **kwargs,
         )
 
-        self.logger.debug(f"Performing job async search with {locals()}")
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing async %(endpoint)s with %(url)s",
+            endpoint="maps",
+            url=url,
+        )
         return await self.__make_request_async__(url=url)
 
     def scholar(
@@ -764,7 +2372,13 @@ class Serply(object):
             **kwargs,
         )
 
-        self.logger.debug(f"Performing job search with {locals()}")
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing %(endpoint)s with %(url)s",
+            endpoint="scholar",
+            url=url,
+        )
         return self.__make_request__(url=url)
 
     async def scholar_async(
@@ -800,5 +2414,11 @@ class Serply(object):
             **kwargs,
         )
 
-        self.logger.debug(f"Performing job async search with {locals()}")
+        self.__log__(
+            logging.DEBUG,
+            "perform",
+            "Performing async %(endpoint)s with %(url)s",
+            endpoint="scholar",
+            url=url,
+        )
         return await self.__make_request_async__(url=url)
@@ -0,0 +1,134 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterator, List
+from .ratelimit import get_rate_limiter
+
+# state of the current worker process, set up once by _init_worker
+_client = None
+_loop = None
+_concurrency = 1
+
+
+def _read_keywords(path) -> Iterator[str]:
+    """
+        lazily read keywords from a file, one per line, skipping blank lines
+    :param path: str: path to the keyword file
+    :return: iterator: keywords
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            keyword = line.strip()
+            if keyword:
+                yield keyword
+
+
+def _split_options(options: Dict, processes: int, rate_limit: float) -> Dict:
+    """
+        give each worker an equal share of the rate budgets
+    :param options: dict: keyword arguments of the parent client
+    :param processes: int: number of worker processes
+    :param rate_limit: float: max requests per second across all workers, replaces the client limit
+    :return: dict: keyword arguments for the worker clients
+    """
+    options = dict(options)
+    limiter = get_rate_limiter(rate_limit) or options.get("rate_limit")
+    if limiter is not None:
+        options["rate_limit"] = limiter.split(processes)
+    if options.get("endpoint_rate_limits"):
+        options["endpoint_rate_limits"] = {
+            endpoint: endpoint_limiter.split(processes)
+            for endpoint, endpoint_limiter in options["endpoint_rate_limits"].items()
+        }
+    return options
+
+
+def _init_worker(cls, options: Dict, concurrency: int):
+    """
+        build the client of a worker process
+    :param cls: type: Serply class (or subclass) to instantiate
+    :param options: dict: keyword arguments for the client
+    :param concurrency: int: max number of requests in flight in this worker
+    :return:
+    """
+    import asyncio
+
+    global _client, _loop, _concurrency
+    _client = cls(**options)
+    _concurrency = concurrency
+    # one loop for the lifetime of the worker keeps the pooled session open between shards
+    _loop = asyncio.new_event_loop()
+
+
+def _run_shard(endpoint: str, items: List, kwargs: Dict) -> List[Dict]:
+    """
+        run one shard in a worker process
+    :param endpoint: str: endpoint to use
+    :param items: list: keywords or dicts of per item parameters
+    :param kwargs: dict: parameters shared by all items
+    :return: list: results in the same order as items
+    """
+    return _loop.run_until_complete(
+        _client.bulk(endpoint, items, concurrency=_concurrency, **kwargs)
+    )
+
+
+def run_sharded(
+    cls,
+    options: Dict,
+    endpoint: str,
+    keywords,
+    processes: int = None,
+    concurrency: int = 64,
+    rate_limit: float = None,
+    shard_size: int = 1000,
+    **kwargs,
+) -> Iterator[Dict]:
+    """
+        split keywords into shards run by a pool of processes and merge their results into one stream
+        concurrency and rate_limit are budgets for the whole pool, each worker gets an equal share
+    :param cls: type: Serply class (or subclass) built in every worker
+    :param options: dict: keyword arguments to build the client in every worker
+    :param endpoint: str: endpoint to use
+    :param keywords: str or iterable: path to a file with one keyword per line, or an iterable of keywords or dicts
+    :param processes: int: number of worker processes (defaults to the number of CPUs, at most concurrency)
+    :param concurrency: int: max number of requests in flight across all workers
+    :param rate_limit: float: max requests per second across all workers (defaults to the client limits)
+    :param shard_size: int: number of keywords sent to a worker at a time
+    :param kwargs: parameters shared by all items
+    :return: iterator: results in input order
+    """
+    concurrency = max(1, concurrency)
+    # every worker has at least one request in flight, more workers would exceed the budget
+    processes = min(processes or os.cpu_count() or 1, concurrency)
+    if isinstance(keywords, (str, os.PathLike)):
+        keywords = _read_keywords(keywords)
+    keywords = iter(keywords)
+
+    executor = ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(
+            cls,
+            _split_options(options, processes, rate_limit),
+            concurrency // processes,
+        ),
+    )
+    # keep a couple of shards queued per worker so the keyword file is never fully in memory
+    pending = deque()
+    try:
+        while True:
+            while len(pending) < processes * 2:
+                shard = list(islice(keywords, shard_size))
+                if not shard:
+                    break
+                pending.append(executor.submit(_run_shard, endpoint, shard, kwargs))
+            if not pending:
+                break
+            for result in pending.popleft().result():
+                yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
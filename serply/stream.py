@@ -0,0 +1,547 @@
+import os
+import re
+import json
+import mmap
+import codecs
+import weakref
+import tempfile
+from collections import deque
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+CHUNK_SIZE = 65536
+
+# string fields larger than this are spooled to a temporary file instead of memory
+SPOOL_SIZE = 1024 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# characters that can follow a complete number, true, false or null
+_SCALAR_DELIMITERS = frozenset(",}] \t\n\r")
+# run of string content made of whole characters and complete escapes, stops at a closing quote
+_STRING_CHUNK = re.compile(r'(?:[^"\\]|\\u[0-9a-fA-F]{4}|\\[^u])*')
+_HIGH_SURROGATE = re.compile(r"\\u[dD][89abAB][0-9a-fA-F]{2}$")
+_decoder = json.JSONDecoder(strict=False)
+
+
+def _ends_with_high_surrogate(segment: str) -> bool:
+    """
+        check if string content ends with the first half of an escaped surrogate pair
+    :param segment: str: raw JSON string content
+    :return: bool
+    """
+    match = _HIGH_SURROGATE.search(segment)
+    if match is None:
+        return False
+    # the backslash starts an escape only if it isn't itself escaped
+    index = match.start()
+    backslashes = 0
+    while index > 0 and segment[index - 1] == "\\":
+        backslashes += 1
+        index -= 1
+    return backslashes % 2 == 0
+
+
+class JSONStreamParser(object):
+    def __init__(self, items_key: str, stream_keys: Iterable[str] = ()):
+        """
+            incremental parser of a JSON object fed with bytes as they arrive
+            the items of one array field are emitted one at a time and string fields in stream_keys
+            are emitted in pieces, so neither is ever held whole
+            events: ("item", value), ("field", key, value), ("data", key, text), ("end", key)
+        :param items_key: str: key of the array whose items are emitted one at a time
+        :param stream_keys: iterable: keys of string fields emitted in pieces
+        """
+        self.items_key = items_key
+        self.stream_keys = frozenset(stream_keys)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._state = "start"
+        self._key = None
+        # size an incomplete value must reach before decoding it again, keeps large values linear
+        self._retry_size = 0
+        self._eof = False
+
+    @property
+    def done(self) -> bool:
+        return self._state == "done"
+
+    def feed(self, data: bytes) -> List[Tuple]:
+        """
+            parse the next bytes of the document
+        :param data: bytes: next chunk of the body
+        :return: list: events completed by this chunk
+        """
+        self._buf += self._utf8.decode(data)
+        return self.__parse__()
+
+    def close(self) -> List[Tuple]:
+        """
+            parse the end of the document
+        :return: list: remaining events
+        """
+        self._buf += self._utf8.decode(b"", final=True)
+        self._eof = True
+        events = self.__parse__()
+        if self._state != "done":
+            raise ValueError("incomplete JSON document")
+        return events
+
+    def __decode_value__(self, buf: str, pos: int):
+        """
+            decode a complete JSON value starting at pos
+        :return: tuple: value and end position, or None if more data is needed
+        """
+        size = len(buf) - pos
+        if size < self._retry_size and not self._eof:
+            return None
+        try:
+            value, end = _decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if self._eof:
+                raise
+            self._retry_size = size * 2
+            return None
+        # a number is only complete once a delimiter follows it, "2." or "2e" may still have digits to come
+        if (
+            not self._eof
+            and not isinstance(value, (str, list, dict))
+            and (end == len(buf) or buf[end] not in _SCALAR_DELIMITERS)
+        ):
+            return None
+        self._retry_size = 0
+        return value, end
+
+    def __parse__(self) -> List[Tuple]:
+        events = []
+        buf = self._buf
+        pos = 0
+        while True:
+            if self._state == "string":
+                match = _STRING_CHUNK.match(buf, pos)
+                end = match.end()
+                if end < len(buf) and buf[end] == '"':
+                    if end > pos:
+                        text = _decoder.decode(f'"{buf[pos:end]}"')
+                        events.append(("data", self._key, text))
+                    events.append(("end", self._key))
+                    pos = end + 1
+                    self._state = "key"
+                    continue
+                if len(buf) - end > 6:
+                    raise ValueError(
+                        f"invalid escape in JSON string at {buf[end:end + 6]!r}"
+                    )
+                if end > pos and _ends_with_high_surrogate(buf[pos:end]):
+                    end -= 6
+                if end > pos:
+                    events.append(
+                        ("data", self._key, _decoder.decode(f'"{buf[pos:end]}"'))
+                    )
+                    pos = end
+                break
+
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos >= len(buf):
+                break
+            char = buf[pos]
+
+            if self._state == "start":
+                if char != "{":
+                    raise ValueError("expected a JSON object")
+                pos += 1
+                self._state = "key"
+            elif self._state == "key":
+                if char == "}":
+                    pos += 1
+                    self._state = "done"
+                elif char == ",":
+                    pos += 1
+                else:
+                    decoded = self.__decode_value__(buf, pos)
+                    if decoded is None:
+                        break
+                    self._key, pos = decoded
+                    self._state = "colon"
+            elif self._state == "colon":
+                if char != ":":
+                    raise ValueError(f"expected ':' after key {self._key!r}")
+                pos += 1
+                self._state = "value"
+            elif self._state == "value":
+                if self._key == self.items_key and char == "[":
+                    pos += 1
+                    self._state = "items"
+                elif self._key in self.stream_keys and char == '"':
+                    pos += 1
+                    self._state = "string"
+                else:
+                    decoded = self.__decode_value__(buf, pos)
+                    if decoded is None:
+                        break
+                    value, pos = decoded
+                    events.append(("field", self._key, value))
+                    self._state = "key"
+            elif self._state == "items":
+                if char == "]":
+                    pos += 1
+                    self._state = "key"
+                elif char == ",":
+                    pos += 1
+                else:
+                    decoded = self.__decode_value__(buf, pos)
+                    if decoded is None:
+                        break
+                    value, pos = decoded
+                    events.append(("item", value))
+            else:
+                # trailing data after the document is ignored
+                pos = len(buf)
+
+        self._buf = buf[pos:]
+        return events
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class SpooledFile(object):
+    def __init__(self, path: str, delete: bool = False):
+        """
+            handle to a string field written to disk as the response streamed in
+            the content is only loaded when read, or paged in on demand through mmap
+        :param path: str: path of the UTF-8 encoded file
+        :param delete: bool: remove the file when the handle is closed or garbage collected
+        """
+        self.path = path
+        self.delete = delete
+        self._finalizer = weakref.finalize(self, _remove, path) if delete else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    def __len__(self) -> int:
+        return os.path.getsize(self.path)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.path!r})"
+
+    def open(self, mode: str = "r"):
+        """
+            open the file
+        :param mode: str: "r" for text, "rb" for bytes
+        :return: file
+        """
+        if "b" in mode:
+            return open(self.path, mode)
+        return open(self.path, mode, encoding="utf-8", newline="")
+
+    def read(self) -> str:
+        """
+            read the whole field
+        :return: str: content of the field
+        """
+        with self.open() as f:
+            return f.read()
+
+    def mmap(self) -> mmap.mmap:
+        """
+            map the file in memory read only, pages are loaded by the OS as they are accessed
+            an empty file can't be mapped, mmap raises ValueError for an empty field so check len() first
+        :return: mmap.mmap: UTF-8 bytes of the field
+        """
+        with open(self.path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        """
+            remove the file if it is temporary
+        :return:
+        """
+        if self._finalizer is not None:
+            self._finalizer()
+
+
+class StreamedResponse(object):
+    def __init__(
+        self,
+        items_key: str,
+        chunks: Iterator[bytes] = None,
+        stream_keys: Iterable[str] = ("html",),
+        fields: Dict = None,
+        close=None,
+        files: Dict[str, Optional[str]] = None,
+        on_finish: Callable[[Dict, int], None] = None,
+    ):
+        """
+            response parsed while it is read from the socket
+            iterating yields the items of items_key one at a time, other fields land in fields
+            and string fields in stream_keys are written to temporary files as they arrive
+        :param items_key: str: key of the array of results (e.g. results, entries)
+        :param chunks: iterator: chunks of the body, None for a response without a body
+        :param stream_keys: iterable: keys of string fields streamed to files (defaults to html)
+        :param fields: dict: fields known up front (e.g. error, request_time)
+        :param close: callable: releases the underlying response
+        :param files: dict: paths string fields are written to by key, None for a temporary file kept until its handle is dropped
+        :param on_finish: callable: called with fields and the size of the decoded body once it is read, before the response is released
+        """
+        self.items_key = items_key
+        self.fields = dict(fields or {})
+        self.streams = {}
+        self.files = dict(files or {})
+        self._spooled = {}
+        self._pending = deque()
+        self._parser = JSONStreamParser(items_key, set(stream_keys) | set(self.files))
+        self._chunks = iter(chunks) if chunks is not None else None
+        self._close = close
+        self._on_finish = on_finish
+        # bytes of the decoded body read so far
+        self.size = 0
+        self._done = chunks is None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __iter__(self) -> Iterator[Dict]:
+        while True:
+            while self._pending:
+                yield self._pending.popleft()
+            if self._done:
+                return
+            self.__read__()
+
+    def __dispatch__(self, events: List[Tuple]):
+        """
+            apply parser events to the response
+        :param events: list: events from JSONStreamParser
+        :return:
+        """
+        for event in events:
+            kind = event[0]
+            if kind == "item":
+                self._pending.append(event[1])
+            elif kind == "field":
+                self.fields[event[1]] = event[2]
+            elif kind == "data":
+                stream = self.streams.get(event[1])
+                if stream is None:
+                    stream = self.streams[event[1]] = self.__open_stream__(event[1])
+                stream.write(event[2])
+            elif kind == "end" and event[1] not in self.streams:
+                # an empty string has no data, its file is still created
+                self.streams[event[1]] = self.__open_stream__(event[1])
+
+    def __open_stream__(self, key: str):
+        """
+            open the file a streamed string field is written to
+        :param key: str: key of the field
+        :return: file: text file
+        """
+        if key not in self.files:
+            return tempfile.SpooledTemporaryFile(
+                max_size=SPOOL_SIZE, mode="w+", encoding="utf-8"
+            )
+        path = self.files[key]
+        delete = path is None
+        if delete:
+            fd, path = tempfile.mkstemp(prefix=f"serply-{key}-")
+            os.close(fd)
+        # the handle owns a temporary file from now on, even if the response fails midway
+        self._spooled[key] = SpooledFile(path, delete=delete)
+        return open(path, "w+", encoding="utf-8", newline="")
+
+    def __finish__(self, events: List[Tuple]):
+        self.__dispatch__(events)
+        self._done = True
+        for key in self._spooled:
+            self.streams[key].flush()
+        if self._on_finish is not None:
+            self._on_finish(self.fields, self.size)
+        if self._close is not None:
+            self._close()
+
+    def __to_dict__(self) -> Dict:
+        """
+            build the response dict once the body is read
+        :return: dict: fields, items and a SpooledFile handle for each field written to a file
+        """
+        results = dict(self.fields)
+        if not self.fields.get("error"):
+            results[self.items_key] = list(self._pending)
+            self._pending.clear()
+        for key, spooled in self._spooled.items():
+            self.streams.pop(key).close()
+            results[key] = spooled
+        return results
+
+    def __read__(self):
+        """
+            read and parse the next chunk of the body
+        :return:
+        """
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self.__finish__(self._parser.close())
+        else:
+            self.size += len(chunk)
+            self.__dispatch__(self._parser.feed(chunk))
+
+    def get_stream(self, key: str = "html"):
+        """
+            get a streamed string field as a file positioned at its start
+            the rest of the body is read, items not consumed yet stay available to iterate
+        :param key: str: key of the field (defaults to html)
+        :return: file: text file with the field content or None if the field is missing
+        """
+        while not self._done:
+            self.__read__()
+        stream = self.streams.get(key)
+        if stream is not None:
+            stream.seek(0)
+        return stream
+
+    def to_dict(self) -> Dict:
+        """
+            read the rest of the body and release the response
+            items not consumed yet and the fields are returned as a dict, the fields written to files as SpooledFile handles
+        :return: dict: response
+        """
+        while not self._done:
+            self.__read__()
+        results = self.__to_dict__()
+        self.close()
+        return results
+
+    @property
+    def html(self):
+        return self.get_stream("html")
+
+    def close(self):
+        """
+            release the response and the streamed fields
+        :return:
+        """
+        if not self._done:
+            self._done = True
+            if self._close is not None:
+                self._close()
+        for stream in self.streams.values():
+            stream.close()
+
+
+class AsyncStreamedResponse(StreamedResponse):
+    def __init__(
+        self,
+        items_key: str,
+        resp=None,
+        stream_keys=("html",),
+        fields=None,
+        files=None,
+        on_finish=None,
+    ):
+        """
+            asynchronous counterpart of StreamedResponse reading from an aiohttp response
+        :param items_key: str: key of the array of results (e.g. results, entries)
+        :param resp: aiohttp.ClientResponse: response to read, None for a response without a body
+        :param stream_keys: iterable: keys of string fields streamed to files (defaults to html)
+        :param fields: dict: fields known up front (e.g. request_time)
+        :param files: dict: paths string fields are written to by key, None for a temporary file
+        :param on_finish: callable: called with fields and the size of the decoded body once it is read
+        """
+        super().__init__(
+            items_key,
+            chunks=None,
+            stream_keys=stream_keys,
+            fields=fields,
+            close=resp.release if resp is not None else None,
+            files=files,
+            on_finish=on_finish,
+        )
+        self._resp = resp
+        self._done = resp is None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
+    def __iter__(self):
+        raise TypeError("use 'async for' to iterate over an AsyncStreamedResponse")
+
+    async def __aiter__(self) -> AsyncIterator[Dict]:
+        while True:
+            while self._pending:
+                yield self._pending.popleft()
+            if self._done:
+                return
+            await self.__read_async__()
+
+    async def __read_async__(self):
+        """
+            read and parse the next chunk of the body
+        :return:
+        """
+        chunk = await self._resp.content.read(CHUNK_SIZE)
+        if not chunk:
+            self.__finish__(self._parser.close())
+        else:
+            self.size += len(chunk)
+            self.__dispatch__(self._parser.feed(chunk))
+
+    def get_stream(self, key: str = "html"):
+        raise TypeError("use 'await get_stream_async()' on an AsyncStreamedResponse")
+
+    async def get_stream_async(self, key: str = "html"):
+        """
+            get a streamed string field as a file positioned at its start
+            the rest of the body is read, items not consumed yet stay available to iterate
+        :param key: str: key of the field (defaults to html)
+        :return: file: text file with the field content or None if the field is missing
+        """
+        while not self._done:
+            await self.__read_async__()
+        stream = self.streams.get(key)
+        if stream is not None:
+            stream.seek(0)
+        return stream
+
+    def to_dict(self) -> Dict:
+        raise TypeError("use 'await to_dict_async()' on an AsyncStreamedResponse")
+
+    async def to_dict_async(self) -> Dict:
+        """
+            read the rest of the body and release the response
+            items not consumed yet and the fields are returned as a dict, the fields written to files as SpooledFile handles
+        :return: dict: response
+        """
+        while not self._done:
+            await self.__read_async__()
+        results = self.__to_dict__()
+        self.close()
+        return results
+
+    @property
+    def html(self):
+        raise TypeError("use 'await get_stream_async()' on an AsyncStreamedResponse")
@@ -0,0 +1,130 @@
+import socket
+import time
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.connection import allowed_gai_family
+from .timing import get_current_timing
+
+# sync counterpart of timing.build_trace_config: connections and pools report the phases of the
+# request running on their thread, imported only when timing hooks are set
+
+
+class TimedConnectionMixin(object):
+    def _new_conn(self):
+        """
+            open the socket, resolving the host separately so dns and connect are timed apart
+        :return: socket.socket
+        """
+        timing = get_current_timing()
+        if timing is None:
+            return super()._new_conn()
+        start = time.monotonic()
+        try:
+            addresses = socket.getaddrinfo(
+                self._dns_host, self.port, allowed_gai_family(), socket.SOCK_STREAM
+            )
+        except OSError:
+            # let urllib3 raise its own resolution error
+            return super()._new_conn()
+        resolved = time.monotonic()
+        timing.add("dns", resolved - start)
+
+        host = self._dns_host
+        error = None
+        try:
+            # same fallback over the resolved addresses as urllib3's create_connection
+            for address in addresses:
+                self._dns_host = address[4][0]
+                try:
+                    sock = super()._new_conn()
+                    break
+                except ConnectTimeoutError as e:
+                    # also raised as NewConnectionError when the address refuses
+                    error = e
+            else:
+                raise error
+        finally:
+            self._dns_host = host
+        self._connected_at = time.monotonic()
+        timing.add("connect", self._connected_at - resolved)
+        return sock
+
+    def connect(self):
+        super().connect()
+        # the socket is open and the tls handshake done
+        self._ready_at = time.monotonic()
+
+    def request(self, *args, **kwargs):
+        timing = get_current_timing()
+        if timing is None:
+            return super().request(*args, **kwargs)
+        start = time.monotonic()
+        ready = getattr(self, "_ready_at", None)
+        result = super().request(*args, **kwargs)
+        # time to first byte runs from the request being sent, like on_request_headers_sent
+        # a connection opened while sending is counted in dns, connect and tls instead
+        connected = getattr(self, "_ready_at", None)
+        if connected is not None and connected != ready:
+            start = max(start, connected)
+        timing.mark("ttfb", start)
+        return result
+
+    def getresponse(self, *args, **kwargs):
+        timing = get_current_timing()
+        if timing is None:
+            return super().getresponse(*args, **kwargs)
+        start = time.monotonic()
+        resp = super().getresponse(*args, **kwargs)
+        if timing.done("ttfb") is None:
+            # sent by a method other than request()
+            timing.add("ttfb", time.monotonic() - start)
+        timing.mark("body")
+        return resp
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        timing = get_current_timing()
+        self._connected_at = None
+        super().connect()
+        if timing is not None and self._connected_at is not None:
+            # the handshake runs after the socket is open
+            timing.add("tls", time.monotonic() - self._connected_at)
+
+
+class TimedPoolMixin(object):
+    def _get_conn(self, timeout=None):
+        timing = get_current_timing()
+        if timing is None:
+            return super()._get_conn(timeout)
+        start = time.monotonic()
+        conn = super()._get_conn(timeout)
+        timing.add("pool_wait", time.monotonic() - start)
+        return conn
+
+
+class TimedHTTPConnectionPool(TimedPoolMixin, HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(TimedPoolMixin, HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        """
+            create the pool manager with pools of timed connections
+        :return:
+        """
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
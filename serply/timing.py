@@ -0,0 +1,195 @@
+import time
+import threading
+from typing import Dict
+
+# phases of a request, in the order they happen
+PHASES = ("pool_wait", "dns", "connect", "tls", "ttfb", "body", "decode")
+
+# timing of the request running on the current thread, read by the sync instrumented connections
+_current = threading.local()
+
+
+class RequestTiming(object):
+    __slots__ = (
+        "endpoint",
+        "engine",
+        "method",
+        "url",
+        "start",
+        "end",
+        "attempts",
+        "status",
+        "cached",
+        "error",
+        "size",
+        "phases",
+        "_marks",
+    )
+
+    def __init__(self, endpoint: str, method: str, url: str, engine: str = "google"):
+        """
+            timing breakdown of one call to the API, measured on the monotonic clock
+            phases hold seconds spent in each of PHASES, summed over attempts, None when not measured
+            (reused connections have no dns, connect or tls, the sync transport measures dns and connect
+            together with tls when it can't tell them apart)
+        :param endpoint: str: endpoint name
+        :param method: str: method of the request
+        :param url: str: url of the request
+        :param engine: str: search engine queried [google, bing]
+        """
+        self.endpoint = endpoint
+        self.engine = engine
+        self.method = method
+        self.url = url
+        self.start = time.monotonic()
+        self.end = None
+        self.attempts = 0
+        self.status = None
+        self.cached = False
+        self.error = None
+        # bytes of the response body as received, None when it wasn't read
+        self.size = None
+        self.phases = dict.fromkeys(PHASES)
+        # start times of phases in progress
+        self._marks = {}
+
+    def __repr__(self) -> str:
+        phases = ", ".join(
+            f"{phase}={value * 1000:.1f}ms"
+            for phase, value in self.phases.items()
+            if value is not None
+        )
+        return f"RequestTiming({self.method} {self.url} total={self.total * 1000:.1f}ms {phases})"
+
+    @property
+    def total(self) -> float:
+        """
+            seconds from the start of the call to its end, or to now while it runs
+        :return: float
+        """
+        return (self.end if self.end is not None else time.monotonic()) - self.start
+
+    def add(self, phase: str, seconds: float):
+        """
+            add time spent in a phase
+        :param phase: str: one of PHASES
+        :param seconds: float: duration
+        :return:
+        """
+        current = self.phases[phase]
+        self.phases[phase] = seconds if current is None else current + seconds
+
+    def mark(self, phase: str, start: float = None):
+        """
+            start timing a phase, finished with done
+        :param phase: str: one of PHASES
+        :param start: float: monotonic time the phase started (defaults to now)
+        :return:
+        """
+        self._marks[phase] = time.monotonic() if start is None else start
+
+    def done(self, phase: str) -> float:
+        """
+            finish timing a phase started with mark
+        :param phase: str: one of PHASES
+        :return: float: duration or None if the phase wasn't started
+        """
+        started = self._marks.pop(phase, None)
+        if started is None:
+            return None
+        seconds = time.monotonic() - started
+        self.add(phase, seconds)
+        return seconds
+
+    def to_dict(self) -> Dict:
+        return {
+            "endpoint": self.endpoint,
+            "engine": self.engine,
+            "method": self.method,
+            "url": self.url,
+            "attempts": self.attempts,
+            "status": self.status,
+            "cached": self.cached,
+            "size": self.size,
+            "total": self.total,
+            **self.phases,
+        }
+
+
+def get_current_timing() -> RequestTiming:
+    """
+        get the timing of the sync request running on this thread
+    :return: RequestTiming or None
+    """
+    return getattr(_current, "timing", None)
+
+
+def set_current_timing(timing: RequestTiming):
+    """
+        set the timing of the sync request running on this thread
+    :param timing: RequestTiming: or None once the request is done
+    :return:
+    """
+    _current.timing = timing
+
+
+def build_trace_config():
+    """
+        build an aiohttp TraceConfig filling the RequestTiming passed as trace_request_ctx
+        aiohttp opens TLS while creating the connection, so tls is counted in connect
+    :return: aiohttp.TraceConfig
+    """
+    import aiohttp
+
+    def on(phase: str, end: bool):
+        async def handler(session, context, params):
+            timing = context.trace_request_ctx
+            if isinstance(timing, RequestTiming):
+                if end:
+                    timing.done(phase)
+                else:
+                    timing.mark(phase)
+
+        return handler
+
+    async def on_connection_create_end(session, context, params):
+        timing = context.trace_request_ctx
+        if isinstance(timing, RequestTiming):
+            connect = timing.done("connect")
+            dns = timing._marks.pop("dns_total", None)
+            # dns is resolved while the connection is created
+            if connect is not None and dns is not None:
+                timing.add("connect", -dns)
+
+    async def on_dns_resolvehost_end(session, context, params):
+        timing = context.trace_request_ctx
+        if isinstance(timing, RequestTiming):
+            dns = timing.done("dns")
+            if dns is not None:
+                timing._marks["dns_total"] = timing._marks.get("dns_total", 0) + dns
+
+    async def on_dns_cache_hit(session, context, params):
+        timing = context.trace_request_ctx
+        if isinstance(timing, RequestTiming):
+            timing.add("dns", 0.0)
+
+    async def on_request_sent(session, context, params):
+        timing = context.trace_request_ctx
+        if isinstance(timing, RequestTiming):
+            timing.mark("ttfb")
+
+    trace = aiohttp.TraceConfig()
+    trace.on_connection_queued_start.append(on("pool_wait", False))
+    trace.on_connection_queued_end.append(on("pool_wait", True))
+    trace.on_connection_create_start.append(on("connect", False))
+    trace.on_connection_create_end.append(on_connection_create_end)
+    trace.on_dns_resolvehost_start.append(on("dns", False))
+    trace.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+    trace.on_dns_cache_hit.append(on_dns_cache_hit)
+    # time to first byte runs from the request being sent to the response headers
+    if hasattr(trace, "on_request_headers_sent"):
+        trace.on_request_headers_sent.append(on_request_sent)
+    else:  # pragma: no cover - aiohttp < 3.8
+        trace.on_request_start.append(on_request_sent)
+    trace.on_request_end.append(on("ttfb", True))
+    return trace
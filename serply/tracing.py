@@ -0,0 +1,115 @@
+import contextlib
+from typing import Dict
+
+from .timing import RequestTiming
+
+# opentelemetry is optional and only imported when the first span is started, spans are
+# skipped when it isn't installed or tracing is disabled
+
+
+def get_tracer(tracer=None):
+    """
+        get the tracer spans are started with
+    :param tracer: opentelemetry.trace.Tracer: tracer to use, None for the global one, False to disable tracing
+    :return: opentelemetry.trace.Tracer or None when tracing is off
+    """
+    if tracer is False:
+        return None
+    if tracer is not None:
+        return tracer
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        return None
+    from . import __version__
+
+    # a no-op tracer until the application installs a tracer provider
+    return trace.get_tracer("serply", __version__)
+
+
+@contextlib.contextmanager
+def start_span(tracer, name: str, attributes: Dict = None, client: bool = False):
+    """
+        start a span made current for the duration of the block
+    :param tracer: opentelemetry.trace.Tracer: or None to skip the span
+    :param name: str: name of the span
+    :param attributes: dict: attributes known when the span starts
+    :param client: bool: the span covers a call to the API
+    :return: the span or None
+    """
+    if tracer is None:
+        yield None
+        return
+    from opentelemetry.trace import SpanKind
+
+    with tracer.start_as_current_span(
+        name,
+        kind=SpanKind.CLIENT if client else SpanKind.INTERNAL,
+        attributes=attributes,
+    ) as span:
+        yield span
+
+
+def open_span(tracer, name: str, attributes: Dict = None):
+    """
+        start a span ended by the caller, for generators that can't keep a span current across yields
+    :param tracer: opentelemetry.trace.Tracer: or None to skip the span
+    :param name: str: name of the span
+    :param attributes: dict: attributes known when the span starts
+    :return: the span or None
+    """
+    if tracer is None:
+        return None
+    return tracer.start_span(name, attributes=attributes)
+
+
+def use_span(span):
+    """
+        make a span opened with open_span current, e.g. in a worker thread, without ending it
+    :param span: the span or None
+    :return: context manager
+    """
+    if span is None:
+        return contextlib.nullcontext()
+    from opentelemetry import trace
+
+    return trace.use_span(span, end_on_exit=False)
+
+
+def end_span(span, error: BaseException = None):
+    """
+        end a span opened with open_span
+    :param span: the span or None
+    :param error: exception that ended the work, if any
+    :return:
+    """
+    if span is None:
+        return
+    if error is not None:
+        from opentelemetry.trace import Status, StatusCode
+
+        span.record_exception(error)
+        span.set_status(Status(StatusCode.ERROR, repr(error)))
+    span.end()
+
+
+def set_request_attributes(span, timing: RequestTiming):
+    """
+        describe the outcome of a call to the API on its span
+    :param span: the span or None
+    :param timing: RequestTiming: timing of the finished call
+    :return:
+    """
+    if span is None or not span.is_recording():
+        return
+    span.set_attribute("serply.attempts", timing.attempts)
+    span.set_attribute("serply.cache_hit", timing.cached)
+    if timing.status is not None:
+        span.set_attribute("http.response.status_code", timing.status)
+    if timing.size is not None:
+        span.set_attribute("serply.response_size", timing.size)
+    if timing.status is not None and timing.status != 200 and timing.error is None:
+        from opentelemetry.trace import Status, StatusCode
+
+        # errors returned as a result, raised ones are recorded by the span itself
+        span.set_status(Status(StatusCode.ERROR, f"status code {timing.status}"))
@@ -0,0 +1,101 @@
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.stub.handle(self)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        if length:
+            self.rfile.read(length)
+        self.server.stub.handle(self)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(object):
+    """
+        minimal local stand-in for the Serply API so transport behaviour can be tested offline
+    :param payload: dict or callable(path) -> dict: JSON body served for every request
+    :param status: int: status code served for every request
+    :param latency: float: seconds to sleep before answering
+    :param headers: dict: extra response headers
+    :param compress: bool: gzip the body when the client accepts it
+    """
+
+    def __init__(
+        self, payload=None, status=200, latency=0.0, headers=None, compress=False
+    ):
+        self.payload = payload if payload is not None else {"results": []}
+        self.status = status
+        self.latency = latency
+        self.headers = headers or {}
+        self.compress = compress
+        # queued (status, payload, headers) tuples served before falling back to the defaults
+        self.queue = []
+        self.requests = []
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    @property
+    def ports(self) -> set:
+        return {port for _, port, _ in self.requests}
+
+    def handle(self, handler: BaseHTTPRequestHandler):
+        with self.lock:
+            self.requests.append(
+                (handler.path, handler.client_address[1], dict(handler.headers))
+            )
+            if self.queue:
+                status, payload, headers = self.queue.pop(0)
+            else:
+                status, payload, headers = self.status, self.payload, self.headers
+
+        if self.latency:
+            time.sleep(self.latency)
+        if callable(payload):
+            payload = payload(handler.path)
+
+        body = json.dumps(payload).encode("utf-8")
+        gzipped = self.compress and "gzip" in handler.headers.get("Accept-Encoding", "")
+        if gzipped:
+            body = gzip.compress(body)
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        if gzipped:
+            handler.send_header("Content-Encoding", "gzip")
+        handler.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
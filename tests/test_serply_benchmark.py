@@ -0,0 +1,63 @@
+import json
+from benchmarks.run import MODES, main, percentile
+from benchmarks.stub_api import StubAPI, load_payloads
+from serply import Serply
+from serply.consts import ENDPOINTS
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) is None
+
+
+def test_stub_serves_every_endpoint():
+    payloads = load_payloads()
+    assert set(payloads) == set(ENDPOINTS)
+    with StubAPI() as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+        for endpoint in ("search", "news", "maps"):
+            results = getattr(serply, endpoint)(keyword="iphone")
+            for key, value in json.loads(payloads[endpoint]).items():
+                assert results[key] == value
+        results = serply.search(keyword="iphone", engine="bing")
+        assert results["results"] == json.loads(payloads["search"])["results"]
+        results = serply.serp(keyword="iphone", domain="apple.com")
+        assert results["results"] == json.loads(payloads["serp"])["results"]
+
+
+def test_stub_injects_errors():
+    with StubAPI(error_rate=1.0, error_status=500) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+        assert "error" in serply.news(keyword="iphone")
+
+
+def test_benchmark_report(tmp_path):
+    output = tmp_path / "benchmark.json"
+    report = main(
+        [
+            "--requests",
+            "20",
+            "--concurrency",
+            "4",
+            "--warmup",
+            "2",
+            "--latency",
+            "0",
+            "--error-rate",
+            "0.5",
+            "--output",
+            str(output),
+        ]
+    )
+    assert json.loads(output.read_text()) == report
+    assert set(report["results"]) == set(MODES)
+    for result in report["results"].values():
+        assert result["requests"] == 20
+        assert 0 < result["errors"] < 20
+        latency = result["latency_ms"]
+        assert latency["p50"] <= latency["p95"] <= latency["p99"] <= latency["max"]
+        assert result["throughput"] > 0
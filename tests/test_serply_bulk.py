@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from urllib.parse import parse_qs
+from serply import Serply
+from tests.stub import StubServer
+
+
+def echo_query(path: str) -> dict:
+    # respond with the keyword from the url so ordering can be checked
+    query = parse_qs(path.rsplit("/", 1)[-1])
+    return {"results": [{"title": query["q"][0]}]}
+
+
+def test_bulk_keeps_input_order():
+    with StubServer(payload=echo_query, latency=0.01) as stub:
+        serply = Serply(api_key="test")
+        serply.base_url = stub.base_url
+        keywords = [f"keyword {i}" for i in range(25)]
+
+        results = asyncio.run(serply.bulk("search", keywords, concurrency=4))
+        assert [r["results"][0]["title"] for r in results] == keywords
+        assert len(stub.requests) == 25
+
+
+def test_bulk_shared_and_item_params():
+    with StubServer() as stub:
+        serply = Serply(api_key="test")
+        serply.base_url = stub.base_url
+        items = ["iphone", {"keyword": "android", "gl": "de"}]
+
+        asyncio.run(serply.bulk("news", items, num=20, gl="us"))
+        paths = sorted(path for path, _, _ in stub.requests)
+        assert paths == [
+            "/v1/news/q=android&num=20&gl=de",
+            "/v1/news/q=iphone&num=20&gl=us",
+        ]
+
+
+def test_bulk_captures_errors_per_item():
+    with StubServer() as stub:
+        serply = Serply(api_key="test")
+        serply.base_url = stub.base_url
+        items = [
+            {"keyword": "iphone", "domain": "apple.com"},
+            # serp requires a domain or website
+            {"keyword": "iphone", "domain": ""},
+        ]
+
+        results = asyncio.run(serply.bulk("serp", items))
+        assert "results" in results[0]
+        assert "error" in results[1]
+
+
+def test_bulk_unsupported_endpoint():
+    serply = Serply(api_key="test")
+    with pytest.raises(ValueError):
+        asyncio.run(serply.bulk("asdf", ["iphone"]))
+
+
+def test_bulk_empty():
+    serply = Serply(api_key="test")
+    assert asyncio.run(serply.bulk("search", [])) == []
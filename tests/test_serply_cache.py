@@ -0,0 +1,101 @@
+import time
+import pickle
+import asyncio
+from serply import ResponseCache, Serply
+from serply.cache import make_cache_key
+from tests.stub import StubServer
+
+
+def test_cache_hit_and_miss():
+    cache = ResponseCache()
+    assert cache.get("a") is None
+    cache.set("a", {"results": []})
+    assert cache.get("a") == {"results": []}
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+
+def test_cache_lru_eviction():
+    cache = ResponseCache(maxsize=2)
+    cache.set("a", {})
+    cache.set("b", {})
+    # a becomes the most recently used
+    cache.get("a")
+    cache.set("c", {})
+    assert cache.get("b") is None
+    assert cache.get("a") == {}
+    assert cache.get("c") == {}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_ttl():
+    cache = ResponseCache(ttl=0.05, endpoint_ttls={"news": 10, "crawl": 0})
+    cache.set("a", {}, endpoint="search")
+    cache.set("b", {}, endpoint="news")
+    cache.set("c", {}, endpoint="crawl")
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.get("b") == {}
+    # a ttl of 0 disables caching for the endpoint
+    assert cache.get("c") is None
+
+
+def test_cache_pickle():
+    cache = ResponseCache(maxsize=3, ttl=5)
+    cache.set("a", {})
+    copy = pickle.loads(pickle.dumps(cache))
+    assert copy.maxsize == 3
+    assert copy.ttl == 5
+    assert len(copy) == 0
+
+
+def test_cache_key_headers():
+    url = "https://api.serply.io/v1/search/q=iphone"
+    assert make_cache_key(url, {"X-User-Agent": "mobile"}) != make_cache_key(
+        url, {"X-User-Agent": "desktop"}
+    )
+
+
+def test_cached_search():
+    with StubServer() as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url, cache=ResponseCache())
+
+        first = serply.search(keyword="iphone")
+        second = serply.search(keyword="iphone")
+        assert len(stub.requests) == 1
+        assert "cached" not in first
+        assert second["cached"]
+        assert second["results"] == first["results"]
+
+        serply.search(keyword="iphone", gl="de")
+        assert len(stub.requests) == 2
+
+
+def test_cached_results_are_copies():
+    payload = {"results": [{"title": "a"}, {"title": "b"}]}
+    with StubServer(payload=payload) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url, cache=ResponseCache())
+
+        serply.search(keyword="iphone")["results"].pop()
+        second = serply.search(keyword="iphone")
+        assert second["cached"]
+        assert second["results"] == payload["results"]
+        second["results"][0]["title"] = "changed"
+        assert serply.search(keyword="iphone")["results"] == payload["results"]
+
+
+def test_cached_search_async_first():
+    with StubServer() as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url, cache=ResponseCache())
+
+        asyncio.run(serply.news_async(keyword="iphone"))
+        assert serply.news(keyword="iphone")["cached"]
+        assert len(stub.requests) == 1
+
+
+def test_errors_not_cached():
+    with StubServer(status=500) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url, cache=ResponseCache())
+
+        assert "error" in serply.search(keyword="iphone")
+        assert "error" in serply.search(keyword="iphone")
+        assert len(stub.requests) == 2
@@ -0,0 +1,173 @@
+import asyncio
+import gzip
+import time
+import pytest
+from serply import Cassette, RetryPolicy, Serply
+from serply.cassette import CassetteMiss, get_cassette
+from tests.stub import StubServer
+
+PAYLOAD = {"results": [{"title": "iPhone 15", "link": "https://www.apple.com/"}]}
+
+
+def record(path: str, **kwargs) -> str:
+    with StubServer(payload=PAYLOAD, **kwargs) as stub:
+        serply = Serply(api_key="secret-key", base_url=stub.base_url, cassette=path)
+        serply.search(keyword="iphone")
+
+        async def run():
+            async with serply:
+                await serply.news_async(keyword="iphone")
+
+        asyncio.run(run())
+    assert len(serply.cassette) == 2
+    return stub.base_url
+
+
+def test_record_and_replay(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    base_url = record(path)
+    with open(path) as f:
+        content = f.read()
+    assert content.count("\n") == 2
+    assert "secret-key" not in content
+
+    # the stub is gone, responses come from the cassette
+    serply = Serply(
+        api_key="test", base_url=base_url, cassette=Cassette(path, mode="replay")
+    )
+    results = serply.search(keyword="iphone")
+    assert results["results"] == PAYLOAD["results"]
+    assert results["attempts"] == 1
+
+    async def run():
+        async with serply:
+            return await serply.news_async(keyword="iphone")
+
+    assert asyncio.run(run())["results"] == PAYLOAD["results"]
+
+    with pytest.raises(CassetteMiss):
+        serply.search(keyword="ipad")
+
+
+def test_replay_gzipped_and_streamed(tmp_path):
+    path = str(tmp_path / "cassette.jsonl.gz")
+    base_url = record(path, compress=True)
+    with StubServer(payload=PAYLOAD) as stub:
+        serply = Serply(api_key="test", base_url=base_url, cassette=path)
+        serply.base_url = base_url = stub.base_url
+        with serply.stream("search", "iphone") as response:
+            assert list(response) == PAYLOAD["results"]
+    with gzip.open(path, "rt") as f:
+        assert f.read().count("\n") == 3
+
+    serply = Serply(
+        api_key="test", base_url=base_url, cassette=Cassette(path, mode="replay")
+    )
+    with serply.stream("search", "iphone") as response:
+        assert list(response) == PAYLOAD["results"]
+
+
+def test_replay_in_order_with_latency(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    with StubServer(payload=PAYLOAD, latency=0.1) as stub:
+        stub.queue = [(503, {}, {})]
+        serply = Serply(
+            api_key="test",
+            base_url=stub.base_url,
+            cassette=Cassette(path, mode="record"),
+            retry=RetryPolicy(backoff=0.01),
+        )
+        assert serply.search(keyword="iphone")["attempts"] == 2
+
+    cassette = Cassette(path, mode="replay", simulate_latency=True)
+    serply = Serply(
+        api_key="test",
+        base_url=stub.base_url,
+        cassette=cassette,
+        retry=RetryPolicy(backoff=0.01),
+    )
+    start = time.monotonic()
+    results = serply.search(keyword="iphone")
+    assert time.monotonic() - start >= 0.2
+    assert results["attempts"] == 2
+    # the last response repeats
+    assert serply.search(keyword="iphone")["attempts"] == 1
+
+
+def test_auto_mode_sends_retries_of_a_recorded_failure(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    with StubServer(payload=PAYLOAD) as stub:
+        stub.queue = [(503, {}, {})]
+        serply = Serply(
+            api_key="test",
+            base_url=stub.base_url,
+            cassette=Cassette(path),
+            retry=RetryPolicy(backoff=0.01),
+        )
+        results = serply.search(keyword="iphone")
+        assert results["results"] == PAYLOAD["results"]
+        assert results["attempts"] == 2
+        assert len(stub.requests) == 2
+
+        # replayed in order, then sent again once used up
+        serply.cassette = Cassette(path)
+        assert serply.search(keyword="iphone")["attempts"] == 2
+        assert len(stub.requests) == 2
+        assert serply.search(keyword="iphone")["attempts"] == 1
+        assert len(stub.requests) == 3
+
+
+def test_device_type_and_proxy_location_recorded_separately(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    with StubServer(payload=PAYLOAD) as stub:
+        clients = [
+            Serply(api_key="test", base_url=stub.base_url, cassette=path),
+            Serply(
+                api_key="test",
+                base_url=stub.base_url,
+                cassette=path,
+                device_type="mobile",
+            ),
+            Serply(
+                api_key="test",
+                base_url=stub.base_url,
+                cassette=path,
+                proxy_location="DE",
+            ),
+        ]
+        for serply in clients:
+            serply.search(keyword="iphone")
+        assert len(stub.requests) == 3
+    assert len(clients[0].cassette) == 3
+
+    for serply in clients:
+        serply.cassette = Cassette(path, mode="replay")
+        assert serply.search(keyword="iphone")["results"] == PAYLOAD["results"]
+    with pytest.raises(CassetteMiss):
+        Serply(
+            api_key="test",
+            base_url=stub.base_url,
+            cassette=Cassette(path, mode="replay"),
+            device_type="mobile",
+            proxy_location="DE",
+        ).search(keyword="iphone")
+
+
+def test_cassette_from_environment(tmp_path, monkeypatch):
+    path = str(tmp_path / "env.jsonl")
+    monkeypatch.delenv("SERPLY_CASSETTE", raising=False)
+    assert get_cassette(None) is None
+    monkeypatch.setenv("SERPLY_CASSETTE", path)
+    with StubServer(payload=PAYLOAD) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+        serply.search(keyword="iphone")
+    assert serply.cassette.path == path
+    assert Serply(api_key="test").cassette is serply.cassette
+
+    monkeypatch.delenv("SERPLY_CASSETTE")
+    assert Serply(api_key="test").cassette is None
+
+
+def test_invalid_mode(tmp_path):
+    with pytest.raises(ValueError):
+        Cassette(str(tmp_path / "cassette.jsonl"), mode="rewind")
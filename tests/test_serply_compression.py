@@ -0,0 +1,119 @@
+import asyncio
+import json
+from serply import MetricsRegistry, Serply
+from serply.compression import get_accept_encoding
+from tests.stub import StubServer
+from tests.test_serply_decoder import load_payload
+
+PAYLOAD = json.loads(load_payload("crawl"))
+SIZE = len(json.dumps(PAYLOAD).encode("utf-8"))
+
+
+def test_accept_encoding_negotiated():
+    assert get_accept_encoding("requests").startswith("gzip, deflate")
+    assert get_accept_encoding("aiohttp").startswith("gzip, deflate")
+
+    with StubServer() as stub:
+        serply = Serply(api_key="test")
+        serply.base_url = stub.base_url
+        serply.search(keyword="iphone")
+
+        async def run():
+            async with serply:
+                await serply.search_async(keyword="iphone")
+
+        asyncio.run(run())
+
+        serply = Serply(api_key="test", compression=False)
+        serply.base_url = stub.base_url
+        serply.search(keyword="iphone")
+
+    encodings = [headers["Accept-Encoding"] for _, _, headers in stub.requests]
+    assert encodings == [
+        get_accept_encoding("requests"),
+        get_accept_encoding("aiohttp"),
+        "identity",
+    ]
+
+
+def test_accept_encoding_flags_looked_up_separately(monkeypatch):
+    from aiohttp import compression_utils
+
+    # e.g. an aiohttp version with brotli support but no zstd flag
+    monkeypatch.delattr(compression_utils, "HAS_ZSTD", raising=False)
+    monkeypatch.setattr(compression_utils, "HAS_BROTLI", True, raising=False)
+    get_accept_encoding.cache_clear()
+    try:
+        assert get_accept_encoding("aiohttp") == "gzip, deflate, br"
+    finally:
+        get_accept_encoding.cache_clear()
+
+
+def test_transfer_sizes_recorded():
+    with StubServer(payload=PAYLOAD, compress=True) as stub:
+        serply = Serply(api_key="test")
+        serply.base_url = stub.base_url
+
+        results = serply.crawl(keyword="iphone")
+        assert results["html"] == PAYLOAD["html"]
+        assert results["decompressed_size"] == SIZE
+        assert 0 < results["compressed_size"] < SIZE / 2
+
+        async def run():
+            async with serply:
+                return await serply.crawl_async(keyword="iphone")
+
+        results = asyncio.run(run())
+        assert results["decompressed_size"] == SIZE
+        assert 0 < results["compressed_size"] < SIZE / 2
+
+        serply.search(keyword="iphone")
+
+    stats = serply.transfer_stats.stats()
+    assert stats["crawl"]["responses"] == 2
+    assert stats["crawl"]["decompressed_bytes"] == SIZE * 2
+    assert stats["crawl"]["ratio"] > 2
+    assert stats["search"]["responses"] == 1
+
+    serply.transfer_stats.clear()
+    assert serply.transfer_stats.stats() == {}
+
+
+def test_uncompressed_transfer_sizes():
+    with StubServer(payload=PAYLOAD) as stub:
+        serply = Serply(api_key="test", compression=False)
+        serply.base_url = stub.base_url
+        results = serply.crawl(keyword="iphone")
+        assert results["compressed_size"] == results["decompressed_size"] == SIZE
+
+
+def test_streamed_transfer_sizes_recorded():
+    metrics = MetricsRegistry()
+    with StubServer(payload=PAYLOAD, compress=True) as stub:
+        serply = Serply(api_key="test", metrics=metrics)
+        serply.base_url = stub.base_url
+
+        results = serply.crawl(keyword="iphone", html_file=True)
+        assert results["html"].read() == PAYLOAD["html"]
+        assert results["decompressed_size"] == SIZE
+        assert 0 < results["compressed_size"] < SIZE / 2
+
+        async def run():
+            async with serply:
+                return await serply.crawl_async(keyword="iphone", html_file=True)
+
+        results = asyncio.run(run())
+        assert results["decompressed_size"] == SIZE
+        assert 0 < results["compressed_size"] < SIZE / 2
+
+        with serply.stream("crawl", "iphone") as response:
+            assert list(response) == PAYLOAD["results"]
+            assert response.fields["decompressed_size"] == SIZE
+
+    stats = serply.transfer_stats.stats()
+    assert stats["crawl"]["responses"] == 3
+    assert stats["crawl"]["decompressed_bytes"] == SIZE * 3
+    assert stats["crawl"]["ratio"] > 2
+    crawl = metrics.snapshot()["crawl"]["google"]
+    assert crawl["requests"] == 3
+    assert crawl["bytes"] == stats["crawl"]["compressed_bytes"]
@@ -0,0 +1,69 @@
+import asyncio
+import json
+import os
+import timeit
+import pytest
+from serply import Serply
+from serply.decoder import get_json_decoder, json_loads, orjson
+from tests.stub import StubServer
+
+PAYLOADS = os.path.join(os.path.dirname(__file__), "payloads")
+
+
+def load_payload(name: str) -> bytes:
+    with open(os.path.join(PAYLOADS, f"{name}.json"), "rb") as f:
+        return f.read()
+
+
+def test_default_decoder():
+    expected = orjson.loads if orjson is not None else json_loads
+    assert get_json_decoder() is expected
+    assert Serply(api_key="test").json_decoder is expected
+
+
+def test_stdlib_decoder_matches_orjson():
+    for name in ("search", "crawl"):
+        body = load_payload(name)
+        assert json_loads(body) == json.loads(body.decode("utf-8"))
+        if orjson is not None:
+            assert orjson.loads(body) == json_loads(body)
+
+
+def test_custom_decoder_used_by_both_paths():
+    calls = []
+
+    def decoder(body):
+        calls.append(body)
+        return json_loads(body)
+
+    with StubServer(payload={"results": [{"title": "iphone"}]}) as stub:
+        serply = Serply(api_key="test", json_decoder=decoder)
+        serply.base_url = stub.base_url
+
+        results = serply.search(keyword="iphone")
+        assert results["results"] == [{"title": "iphone"}]
+
+        async def run():
+            async with serply:
+                return await serply.search_async(keyword="iphone")
+
+        results = asyncio.run(run())
+        assert results["results"] == [{"title": "iphone"}]
+
+    assert len(calls) == 2
+    assert all(isinstance(body, bytes) for body in calls)
+
+
+@pytest.mark.skipif(orjson is None, reason="orjson is not installed")
+@pytest.mark.parametrize("name", ["search", "crawl"])
+def test_orjson_faster_than_stdlib(name):
+    body = load_payload(name)
+    number = 20
+
+    stdlib = min(timeit.repeat(lambda: json_loads(body), number=number, repeat=5))
+    fast = min(timeit.repeat(lambda: orjson.loads(body), number=number, repeat=5))
+    print(
+        f"{name}: {len(body)} bytes, json {stdlib / number * 1e6:.0f}us, "
+        f"orjson {fast / number * 1e6:.0f}us ({stdlib / fast:.1f}x)"
+    )
+    assert fast < stdlib
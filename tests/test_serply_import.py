@@ -0,0 +1,76 @@
+import json
+import re
+import subprocess
+import sys
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def get_import_times(stderr: str) -> dict:
+    # -X importtime lines: "import time: self [us] | cumulative | imported package"
+    times = {}
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)", line)
+        if match:
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+
+def test_import_does_not_load_transports():
+    code = (
+        "import sys, json, serply; "
+        "print(json.dumps([m for m in ('requests', 'aiohttp', 'asyncio') if m in sys.modules]))"
+    )
+    assert json.loads(run_python(code).stdout) == []
+
+
+def test_transports_loaded_on_first_use():
+    code = (
+        "import sys, json, serply; "
+        "client = serply.Serply(api_key='test'); "
+        "loaded = ['requests' in sys.modules]; "
+        "client.session; "
+        "loaded += ['requests' in sys.modules, 'aiohttp' in sys.modules]; "
+        "print(json.dumps(loaded))"
+    )
+    assert json.loads(run_python(code).stdout) == [False, True, False]
+
+
+def test_platform_computed_once():
+    code = (
+        "import platform, serply; "
+        "calls = []; original = platform.platform; "
+        "platform.platform = lambda: calls.append(1) or original(); "
+        "[serply.Serply(api_key='test') for _ in range(5)]; "
+        "print(len(calls))"
+    )
+    assert run_python(code).stdout.strip() == "1"
+
+
+def test_import_time_benchmark():
+    serply = min(
+        get_import_times(run_python("import serply", "-X", "importtime").stderr)[
+            "serply"
+        ]
+        for _ in range(3)
+    )
+    aiohttp = min(
+        get_import_times(run_python("import aiohttp", "-X", "importtime").stderr)[
+            "aiohttp"
+        ]
+        for _ in range(3)
+    )
+    print(f"import serply {serply / 1000:.1f}ms, import aiohttp {aiohttp / 1000:.1f}ms")
+    # the client costs less than the transport it no longer imports up front
+    assert serply < aiohttp
@@ -0,0 +1,151 @@
+import logging
+import threading
+import time
+from serply import Serply
+from tests.stub import StubServer
+
+
+class CountingKeyword(str):
+    formatted = 0
+
+    def __repr__(self):
+        CountingKeyword.formatted += 1
+        return super().__repr__()
+
+    def __str__(self):
+        CountingKeyword.formatted += 1
+        return super().__str__()
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.records = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.threads.add(threading.current_thread())
+        self.records.append((record, self.format(record)))
+
+
+def get_logger(name, level):
+    logger = logging.getLogger(f"serply.tests.{name}")
+    logger.setLevel(level)
+    logger.propagate = False
+    handler = RecordingHandler()
+    logger.addHandler(handler)
+    return logger, handler
+
+
+def test_nothing_formatted_when_debug_disabled():
+    logger, handler = get_logger("disabled", logging.WARNING)
+    with StubServer() as stub:
+        serply = Serply(api_key="test", logger=logger)
+        serply.base_url = stub.base_url
+        CountingKeyword.formatted = 0
+        serply.search(keyword=CountingKeyword("iphone"))
+        assert CountingKeyword.formatted == 0
+    assert handler.records == []
+
+
+def test_plain_messages():
+    logger, handler = get_logger("plain", logging.DEBUG)
+    with StubServer(status=500) as stub:
+        serply = Serply(api_key="test", logger=logger)
+        serply.base_url = stub.base_url
+        serply.news(keyword="iphone")
+
+    messages = [message for _, message in handler.records]
+    url = f"{stub.base_url}v1/news/q=iphone&num=10"
+    assert f"Performing news with {url}" in messages
+    assert f"Error making request to get {url} status code: 500" in messages
+    assert any(message.startswith("Request took ") for message in messages)
+
+
+def test_structured_messages():
+    logger, handler = get_logger("structured", logging.DEBUG)
+    with StubServer() as stub:
+        serply = Serply(api_key="test", logger=logger, structured_logging=True)
+        serply.base_url = stub.base_url
+        serply.maps(keyword="coffee shops")
+
+    url = f"{stub.base_url}v1/maps/q=coffee+shops&num=10&gl=us&lr=lang_en&hl=lang_en"
+    records = {
+        record.serply_event: (record, message) for record, message in handler.records
+    }
+    record, message = records["perform"]
+    # values holding spaces, quotes or = are quoted
+    assert message == f'event=perform endpoint=maps url="{url}"'
+    assert record.serply_fields == {"endpoint": "maps", "url": url}
+    record, message = records["request"]
+    assert message.startswith(f'event=request method=get url="{url}" request_time=')
+    assert record.serply_fields["attempts"] == 1
+
+
+def test_queue_logging_off_request_thread():
+    logger, handler = get_logger("queue", logging.DEBUG)
+    with StubServer() as stub:
+        serply = Serply(api_key="test", logger=logger, log_queue=True)
+        serply.base_url = stub.base_url
+        serply.search(keyword="iphone")
+
+    deadline = time.time() + 5
+    while len(handler.records) < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(handler.records) >= 3
+    assert threading.current_thread() not in handler.threads
+    serply.close()
+    # the logger is left as it was
+    assert logger.handlers == [handler]
+    assert not logger.propagate
+
+
+def test_queue_logging_only_for_its_client():
+    logger, handler = get_logger("own_queue", logging.DEBUG)
+    with StubServer() as stub:
+        queued = Serply(api_key="test", logger=logger, log_queue=True)
+        queued.base_url = stub.base_url
+        # the init record of the queued client arrives from the queue
+        deadline = time.time() + 5
+        while not handler.records and time.time() < deadline:
+            time.sleep(0.01)
+        direct = Serply(api_key="test", logger=logger)
+        direct.base_url = stub.base_url
+
+        handler.threads.clear()
+        direct.search(keyword="iphone")
+        assert handler.threads == {threading.current_thread()}
+
+        handler.threads.clear()
+        count = len(handler.records)
+        queued.search(keyword="iphone")
+        # close hands the queued records to the handlers before returning
+        queued.close()
+        assert len(handler.records) > count
+        assert threading.current_thread() not in handler.threads
+        assert not queued._queue_logger
+
+        # afterwards records are handled on the calling thread
+        handler.threads.clear()
+        queued.search(keyword="iphone")
+        assert handler.threads == {threading.current_thread()}
+
+
+def test_queue_logging_reaches_handlers_added_later():
+    parent = logging.getLogger("serply.tests.later")
+    parent.propagate = False
+    logger = logging.getLogger("serply.tests.later.client")
+    logger.setLevel(logging.DEBUG)
+    with StubServer() as stub:
+        serply = Serply(api_key="test", logger=logger, log_queue=True)
+        serply.base_url = stub.base_url
+        # e.g. logging.basicConfig called once the client exists
+        handler = RecordingHandler()
+        parent.addHandler(handler)
+        serply.search(keyword="iphone")
+
+    deadline = time.time() + 5
+    while len(handler.records) < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(handler.records) >= 3
+    assert threading.current_thread() not in handler.threads
@@ -0,0 +1,56 @@
+import threading
+from serply import Serply
+from tests.stub import StubServer
+from tests.test_serply_bulk import echo_query
+
+
+def test_map_keeps_input_order():
+    with StubServer(payload=echo_query, latency=0.01) as stub:
+        serply = Serply(api_key="test")
+        serply.base_url = stub.base_url
+        keywords = [f"keyword {i}" for i in range(25)]
+
+        results = list(serply.map("search", keywords, max_workers=4))
+        assert [r["results"][0]["title"] for r in results] == keywords
+        # one pooled connection per worker at most
+        assert len(stub.ports) <= 4
+
+
+def test_map_unordered():
+    with StubServer(payload=echo_query) as stub:
+        serply = Serply(api_key="test")
+        serply.base_url = stub.base_url
+        keywords = [f"keyword {i}" for i in range(10)]
+
+        results = dict(serply.map("news", keywords, max_workers=3, ordered=False))
+        assert sorted(results) == list(range(10))
+        for index, result in results.items():
+            assert result["results"][0]["title"] == keywords[index]
+
+
+def test_map_worker_sessions():
+    with StubServer() as stub:
+        serply = Serply(api_key="test")
+        serply.base_url = stub.base_url
+        sessions = set()
+
+        def record(*args, **kwargs):
+            sessions.add((threading.get_ident(), id(serply.__get_session__())))
+            return {"results": []}
+
+        serply.search = record
+        list(serply.map("search", range(20), max_workers=4))
+        assert all(session != id(serply.session) for _, session in sessions)
+        # the caller thread keeps using the shared session
+        assert serply.__get_session__() is serply.session
+
+
+def test_map_captures_errors_per_item():
+    with StubServer() as stub:
+        serply = Serply(api_key="test")
+        serply.base_url = stub.base_url
+        items = [{"keyword": "iphone", "domain": "apple.com"}, {"keyword": "iphone"}]
+
+        results = list(serply.map("serp", items, max_workers=2))
+        assert "results" in results[0]
+        assert "error" in results[1]
@@ -0,0 +1,120 @@
+import asyncio
+import pickle
+import time
+import pytest
+from serply import MetricsRegistry, ResponseCache, RetryPolicy, Serply
+from serply.timing import RequestTiming
+from tests.stub import StubServer
+
+
+def test_metrics_counted():
+    with StubServer() as stub:
+        serply = Serply(
+            api_key="test",
+            base_url=stub.base_url,
+            cache=ResponseCache(),
+            retry=RetryPolicy(backoff=0.01),
+        )
+        serply.search(keyword="iphone")
+        serply.search(keyword="iphone")
+        serply.search(keyword="iphone", engine="bing")
+        stub.queue = [(503, {}, {})]
+        serply.news(keyword="iphone")
+        stub.queue = [(404, {}, {})]
+        serply.news(keyword="ipad")
+
+        async def run():
+            async with serply:
+                await serply.news_async(keyword="ipod")
+
+        asyncio.run(run())
+
+    snapshot = serply.metrics.snapshot()
+    google = snapshot["search"]["google"]
+    assert google["requests"] == 2
+    assert google["cache_hits"] == 1
+    assert google["errors"] == {}
+    assert google["bytes"] == len(b'{"results": []}')
+    assert google["latency"]["count"] == 2
+    assert google["latency"]["buckets"][float("inf")] == 2
+    assert snapshot["search"]["bing"]["requests"] == 1
+
+    news = snapshot["news"]["google"]
+    assert news["requests"] == 3
+    assert news["retries"] == 1
+    assert news["errors"] == {"404": 1}
+
+
+def test_metrics_exception_errors():
+    with StubServer() as stub:
+        base_url = stub.base_url
+    serply = Serply(api_key="test", base_url=base_url)
+    with pytest.raises(Exception) as error:
+        serply.search(keyword="iphone")
+    assert serply.metrics.snapshot()["search"]["google"]["errors"] == {
+        error.type.__name__: 1
+    }
+
+
+def test_prometheus_text():
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    timing = RequestTiming("search", "get", "url", "bing")
+    timing.status = 500
+    timing.attempts = 3
+    timing.size = 10
+    timing.end = timing.start + 0.5
+    registry.observe(timing)
+
+    text = registry.to_prometheus()
+    assert "# TYPE serply_requests_total counter\n" in text
+    assert 'serply_requests_total{endpoint="search",engine="bing"} 1\n' in text
+    assert (
+        'serply_errors_total{endpoint="search",engine="bing",status="500"} 1\n' in text
+    )
+    assert 'serply_retries_total{endpoint="search",engine="bing"} 2\n' in text
+    assert 'serply_response_bytes_total{endpoint="search",engine="bing"} 10\n' in text
+    assert "# TYPE serply_request_duration_seconds histogram\n" in text
+    for bound, count in (("0.1", 0), ("1.0", 1), ("+Inf", 1)):
+        assert (
+            f'serply_request_duration_seconds_bucket{{endpoint="search",engine="bing",le="{bound}"}} {count}\n'
+            in text
+        )
+    assert (
+        'serply_request_duration_seconds_sum{endpoint="search",engine="bing"} 0.5'
+        in text
+    )
+    assert (
+        'serply_request_duration_seconds_count{endpoint="search",engine="bing"} 1\n'
+        in text
+    )
+
+    registry.clear()
+    assert registry.snapshot() == {}
+
+
+def test_metrics_shared_disabled_and_pickled():
+    registry = MetricsRegistry()
+    with StubServer() as stub:
+        for _ in range(2):
+            Serply(api_key="test", base_url=stub.base_url, metrics=registry).search(
+                keyword="iphone"
+            )
+        serply = Serply(api_key="test", base_url=stub.base_url, metrics=False)
+        serply.search(keyword="iphone")
+    assert registry.snapshot()["search"]["google"]["requests"] == 2
+    assert serply.metrics is None
+
+    copy = pickle.loads(pickle.dumps(registry))
+    assert copy.buckets == registry.buckets
+    assert copy.snapshot() == {}
+
+
+def test_observe_overhead():
+    registry = MetricsRegistry()
+    timing = RequestTiming("search", "get", "url")
+    timing.end = timing.start + 0.2
+    start = time.perf_counter()
+    for _ in range(10000):
+        registry.observe(timing)
+    # a few microseconds per call
+    assert (time.perf_counter() - start) / 10000 < 50e-6
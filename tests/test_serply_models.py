@@ -0,0 +1,107 @@
+import asyncio
+import pickle
+import tracemalloc
+import pytest
+from serply import NewsArticle, SearchResult, Serply
+from tests.stub import StubServer
+from tests.test_serply_decoder import load_payload
+from serply.decoder import json_loads
+
+
+def test_result_fields_and_raw():
+    data = {
+        "title": "iPhone 15",
+        "link": "https://www.apple.com/iphone-15/",
+        "description": "The new iPhone.",
+        "realPosition": 1,
+        "cite": {"domain": "https://www.apple.com"},
+    }
+    result = SearchResult.from_dict(data)
+    assert result.title == "iPhone 15"
+    assert result.position == 1
+    assert result.cite == {"domain": "https://www.apple.com"}
+    assert result.additional_links is None
+    # still usable as the dict it replaces
+    assert result["link"] == data["link"]
+    assert result.get("missing", "x") == "x"
+    assert "cite" in result
+    assert result.raw == data
+    assert result == data
+    assert dict(result) == data
+    assert not hasattr(result, "__dict__")
+    assert pickle.loads(pickle.dumps(result)) == result
+
+
+def test_result_slots_and_nested_values():
+    data = {
+        "title": "iPhone 15",
+        "description": None,
+        "realPosition": 2,
+        "additional_links": [{"text": "Specs", "href": "https://www.apple.com/"}],
+        "favicon": "https://www.apple.com/favicon.ico",
+    }
+    result = SearchResult(data)
+    # top-level values sit decoded in their own slot
+    assert result._title == "iPhone 15"
+    assert result._position == 2
+    assert isinstance(result._additional_links, bytes)
+    # a null value is kept apart from a missing key
+    assert "description" in result and result.description is None
+    assert "link" not in result and result.link is None
+    with pytest.raises(KeyError):
+        result["link"]
+    # keys without a field are kept too
+    assert result["favicon"] == data["favicon"]
+    assert len(result) == 5
+    assert set(result) == set(data)
+    # nested values are decoded on every access, changing one doesn't change the result
+    result.additional_links.append({})
+    assert result.additional_links == data["additional_links"]
+    copy = pickle.loads(pickle.dumps(result))
+    assert copy == data
+    assert copy._additional_links == result._additional_links
+
+
+def test_models_option():
+    payload = {"entries": [{"title": "bitcoin", "link": "https://example.com/"}]}
+    with StubServer(payload=payload) as stub:
+        serply = Serply(api_key="test", models=True)
+        serply.base_url = stub.base_url
+
+        results = serply.news(keyword="bitcoin")
+        article = results["entries"][0]
+        assert isinstance(article, NewsArticle)
+        assert article.title == "bitcoin"
+
+        async def run():
+            async with serply:
+                return await serply.news_async(keyword="bitcoin")
+
+        results = asyncio.run(run())
+        assert isinstance(results["entries"][0], NewsArticle)
+
+        serply = Serply(api_key="test")
+        serply.base_url = stub.base_url
+        assert type(serply.news(keyword="bitcoin")["entries"][0]) is dict
+
+
+def test_models_smaller_than_dicts():
+    body = load_payload("search")
+
+    def measure(build):
+        tracemalloc.start()
+        kept = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del kept
+        return size
+
+    as_dicts = measure(lambda: [json_loads(body)["results"] for _ in range(20)])
+    as_models = measure(
+        lambda: [
+            [SearchResult.from_dict(r) for r in json_loads(body)["results"]]
+            for _ in range(20)
+        ]
+    )
+    print(f"dicts {as_dicts} bytes, models {as_models} bytes")
+    assert as_models < as_dicts * 0.5
@@ -0,0 +1,122 @@
+import time
+import asyncio
+import pytest
+from urllib.parse import parse_qs
+from serply import Serply
+from tests.stub import StubServer
+
+TOTAL = 35
+
+
+def paged(path: str) -> dict:
+    # serve TOTAL numbered results, honouring start and num
+    query = parse_qs(path.rsplit("/", 1)[-1])
+    start = int(query.get("start", ["0"])[0])
+    num = int(query["num"][0])
+    results = [{"position": i} for i in range(start, min(start + num, TOTAL))]
+    return {"results": results, "entries": results}
+
+
+def test_iter_results_until_short_page():
+    with StubServer(payload=paged) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+
+        results = list(serply.iter_results("search", "iphone", max_results=100))
+        assert [r["position"] for r in results] == list(range(TOTAL))
+        assert len(stub.requests) == 4
+
+
+def test_iter_results_max_results():
+    with StubServer(payload=paged) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+
+        results = list(
+            serply.iter_results("news", "iphone", max_results=15, page_size=5, start=10)
+        )
+        assert [r["position"] for r in results] == list(range(10, 25))
+        # no page is fetched past max_results
+        assert len(stub.requests) == 3
+
+
+def test_iter_results_prefetch():
+    with StubServer(payload=paged) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+
+        results = serply.iter_results("search", "iphone")
+        next(results)
+        time.sleep(0.2)
+        # the second page was requested while the first one was being consumed
+        assert len(stub.requests) == 2
+        results.close()
+
+
+def test_iter_results_raises_on_error():
+    with StubServer(status=500) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+        with pytest.raises(RuntimeError):
+            list(serply.iter_results("search", "iphone"))
+
+    def failing(path):
+        if "start=10" in path:
+            return {"error": "quota exceeded"}
+        return paged(path)
+
+    with StubServer(payload=failing) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+        results = serply.iter_results("search", "iphone", max_results=30)
+        assert len([next(results) for _ in range(10)]) == 10
+        with pytest.raises(RuntimeError) as info:
+            next(results)
+        assert info.value.args[0] == "quota exceeded"
+
+
+def test_iter_results_unsupported_endpoint():
+    serply = Serply(api_key="test")
+    with pytest.raises(ValueError):
+        list(serply.iter_results("serp", "iphone"))
+
+
+def test_aiter_results_in_order():
+    with StubServer(payload=paged, latency=0.05) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+
+        async def run():
+            return [
+                r["position"]
+                async for r in serply.aiter_results("search", "iphone", lookahead=3)
+            ]
+
+        assert asyncio.run(run()) == list(range(TOTAL))
+        # pages past the short one may have been in flight already
+        assert 4 <= len(stub.requests) <= 6
+
+
+def test_aiter_results_lookahead():
+    with StubServer(payload=paged, latency=0.1) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+
+        async def run():
+            results = serply.aiter_results("news", "iphone", page_size=5, lookahead=4)
+            await results.__anext__()
+            # the first page came back while the next three were in flight
+            assert len(stub.requests) == 4
+            await results.aclose()
+
+        asyncio.run(run())
+
+
+def test_aiter_results_max_results():
+    with StubServer(payload=paged) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+
+        async def run():
+            return [
+                r["position"]
+                async for r in serply.aiter_results(
+                    "search", "iphone", max_results=12, start=5, lookahead=5
+                )
+            ]
+
+        assert asyncio.run(run()) == list(range(5, 17))
+        # only the pages covering max_results are requested
+        assert len(stub.requests) == 2
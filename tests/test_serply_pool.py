@@ -0,0 +1,46 @@
+from requests.adapters import HTTPAdapter
+from serply import Serply
+from tests.stub import StubServer
+
+
+def test_sync_pool_options():
+    serply = Serply(
+        api_key="test", pool_connections=2, pool_maxsize=32, pool_block=True
+    )
+    adapter = serply.session.get_adapter("https://api.serply.io/")
+    assert adapter is serply.adapter
+    assert adapter._pool_connections == 2
+    assert adapter._pool_maxsize == 32
+    assert adapter._pool_block is True
+
+
+def test_sync_custom_adapter():
+    adapter = HTTPAdapter(pool_maxsize=3)
+    serply = Serply(api_key="test", adapter=adapter)
+    assert serply.session.get_adapter("https://api.serply.io/") is adapter
+    assert serply.session.get_adapter("http://localhost/") is adapter
+
+
+def test_sync_keep_alive_reuses_connection():
+    with StubServer() as stub:
+        with Serply(api_key="test", base_url=stub.base_url) as serply:
+            for _ in range(3):
+                serply.search(keyword="iphone")
+        assert len(stub.ports) == 1
+
+
+def test_sync_keep_alive_disabled():
+    with StubServer() as stub:
+        with Serply(api_key="test", base_url=stub.base_url, keep_alive=False) as serply:
+            for _ in range(3):
+                serply.search(keyword="iphone")
+        assert len(stub.ports) == 3
+        assert all(headers["Connection"] == "close" for _, _, headers in stub.requests)
+
+
+def test_map_reuses_large_enough_pool():
+    with StubServer() as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url, pool_maxsize=16)
+        list(serply.map("search", ["a", "b", "c"], max_workers=4))
+        # the worker sessions went through the client pool, which is still open
+        assert serply.adapter.poolmanager.pools
@@ -0,0 +1,88 @@
+import time
+import pickle
+import asyncio
+import pytest
+from serply import RateLimiter, Serply
+from tests.stub import StubServer
+
+
+def test_rate_limiter_burst_then_steady():
+    limiter = RateLimiter(rate=20, burst=3)
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.acquire()
+    # the burst goes through straight away
+    assert time.monotonic() - start < 0.05
+    for _ in range(4):
+        limiter.acquire()
+    # the next 4 requests are paced at 20 per second
+    assert time.monotonic() - start >= 0.19
+
+
+def test_rate_limiter_async():
+    limiter = RateLimiter(rate=20)
+
+    async def run():
+        await asyncio.gather(*(limiter.acquire_async() for _ in range(5)))
+
+    start = time.monotonic()
+    asyncio.run(run())
+    assert time.monotonic() - start >= 0.19
+
+
+def test_rate_limiter_invalid_rate():
+    with pytest.raises(ValueError):
+        RateLimiter(rate=0)
+
+
+def test_rate_limiter_pickle_and_split():
+    limiter = pickle.loads(pickle.dumps(RateLimiter(rate=10, burst=4)))
+    assert limiter.rate == 10
+    assert limiter.burst == 4
+
+    share = limiter.split(4)
+    assert share.rate == 2.5
+    assert share.burst == 1
+
+
+def test_get_endpoint():
+    serply = Serply(api_key="test")
+    url = serply.__generate_url__(keyword="iphone", engine="bing")
+    assert serply.__get_endpoint__(url) == "search"
+    url = serply.__generate_url__(keyword="iphone", endpoint="job")
+    assert serply.__get_endpoint__(url) == "job"
+    url = serply.__generate_url__(keyword="iphone", endpoint="product")
+    assert serply.__get_endpoint__(url) == "product"
+    assert serply.__get_endpoint__("https://example.com/v1/search/q=a") == ""
+
+
+def test_rate_limit_shared_by_sync_and_async():
+    with StubServer() as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url, rate_limit=20)
+
+        async def run():
+            await asyncio.gather(*(serply.search_async("iphone") for _ in range(3)))
+
+        start = time.monotonic()
+        for _ in range(3):
+            serply.search(keyword="iphone")
+        asyncio.run(run())
+        assert time.monotonic() - start >= 0.24
+        assert len(stub.requests) == 6
+
+
+def test_endpoint_rate_limit():
+    with StubServer() as stub:
+        serply = Serply(
+            api_key="test", base_url=stub.base_url, endpoint_rate_limits={"crawl": 10}
+        )
+
+        start = time.monotonic()
+        for _ in range(3):
+            serply.search(keyword="iphone")
+        # searches are not limited
+        assert time.monotonic() - start < 0.2
+
+        for _ in range(3):
+            serply.crawl(keyword="iphone")
+        assert time.monotonic() - start >= 0.19
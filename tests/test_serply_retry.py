@@ -0,0 +1,111 @@
+import time
+import socket
+import asyncio
+import pytest
+import requests
+from email.utils import formatdate
+from aiohttp.client_exceptions import ClientResponseError
+from serply import RetryPolicy, Serply
+from serply.retry import parse_retry_after
+from tests.stub import StubServer
+
+
+def test_retry_delay_full_jitter():
+    policy = RetryPolicy(backoff=1, max_backoff=5)
+    for attempt in range(1, 6):
+        delay = policy.get_delay(attempt)
+        assert 0 <= delay <= min(5, 2 ** (attempt - 1))
+
+
+def test_retry_delay_retry_after():
+    policy = RetryPolicy()
+    assert policy.get_delay(1, "7") == 7
+    assert 0 < policy.get_delay(1, formatdate(time.time() + 10, usegmt=True)) <= 10
+    assert RetryPolicy(respect_retry_after=False, backoff=0.1).get_delay(1, "7") <= 0.1
+
+
+def test_parse_retry_after_invalid():
+    assert parse_retry_after("soon") is None
+
+
+def test_retry_should_retry():
+    policy = RetryPolicy(max_attempts=2)
+    assert policy.should_retry_status(503, 1)
+    assert not policy.should_retry_status(503, 2)
+    assert not policy.should_retry_status(404, 1)
+    assert policy.should_retry_exception(requests.ConnectionError(), 1)
+    assert not policy.should_retry_exception(ValueError(), 1)
+
+
+def test_retry_status_sync():
+    with StubServer() as stub:
+        stub.queue = [(503, {}, {}), (429, {}, {"Retry-After": "0"})]
+        serply = Serply(
+            api_key="test", base_url=stub.base_url, retry=RetryPolicy(backoff=0.01)
+        )
+
+        results = serply.search(keyword="iphone")
+        assert "results" in results
+        assert results["attempts"] == 3
+        assert len(stub.requests) == 3
+
+
+def test_retry_exhausted_sync():
+    with StubServer(status=502) as stub:
+        serply = Serply(
+            api_key="test",
+            base_url=stub.base_url,
+            retry=RetryPolicy(max_attempts=2, backoff=0.01),
+        )
+
+        results = serply.search(keyword="iphone")
+        assert "error" in results
+        assert results["attempts"] == 2
+
+
+def test_no_retry_by_default():
+    with StubServer(status=503) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+
+        results = serply.search(keyword="iphone")
+        assert "error" in results
+        assert results["attempts"] == 1
+
+
+def test_retry_connection_error():
+    # grab a free port with nothing listening on it
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    serply = Serply(
+        api_key="test",
+        base_url=f"http://127.0.0.1:{port}/",
+        retry=RetryPolicy(max_attempts=2, backoff=0.01),
+    )
+    with pytest.raises(requests.ConnectionError):
+        serply.search(keyword="iphone")
+
+
+def test_retry_status_async():
+    with StubServer() as stub:
+        stub.queue = [(502, {}, {}), (503, {}, {})]
+        serply = Serply(
+            api_key="test", base_url=stub.base_url, retry=RetryPolicy(backoff=0.01)
+        )
+
+        results = asyncio.run(serply.search_async(keyword="iphone"))
+        assert "results" in results
+        assert results["attempts"] == 3
+
+
+def test_retry_exhausted_async():
+    with StubServer(status=503) as stub:
+        serply = Serply(
+            api_key="test",
+            base_url=stub.base_url,
+            retry=RetryPolicy(max_attempts=2, backoff=0.01),
+        )
+
+        with pytest.raises(ClientResponseError):
+            asyncio.run(serply.search_async(keyword="iphone"))
+        assert len(stub.requests) == 2
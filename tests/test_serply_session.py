@@ -0,0 +1,65 @@
+import asyncio
+from serply import Serply
+from tests.stub import StubServer
+
+
+def test_async_session_reuses_connections():
+    with StubServer() as stub:
+        serply = Serply(api_key="test")
+        serply.base_url = stub.base_url
+
+        async def run():
+            async with serply:
+                await serply.search_async(keyword="iphone")
+                await serply.news_async(keyword="iphone")
+                await serply.maps_async(keyword="iphone")
+
+        asyncio.run(run())
+        assert len(stub.requests) == 3
+        # all requests went over a single keep-alive connection
+        assert len(stub.ports) == 1
+
+
+def test_async_session_closed_on_exit():
+    with StubServer() as stub:
+        serply = Serply(api_key="test")
+        serply.base_url = stub.base_url
+
+        async def run():
+            async with serply:
+                await serply.search_async(keyword="iphone")
+                session = serply._async_session
+                assert session is not None
+            return session
+
+        session = asyncio.run(run())
+        assert session.closed
+        assert serply._async_session is None
+
+
+def test_async_session_across_event_loops():
+    with StubServer() as stub:
+        serply = Serply(api_key="test")
+        serply.base_url = stub.base_url
+
+        results = asyncio.run(serply.search_async(keyword="iphone"))
+        assert "results" in results
+        first = serply._async_session
+        # asyncio.run closes the pooled session when its loop shuts down
+        assert first.closed
+
+        results = asyncio.run(serply.search_async(keyword="iphone"))
+        assert "results" in results
+        assert serply._async_session is not first
+
+
+def test_async_session_pool_limits():
+    serply = Serply(api_key="test", pool_limit=5, pool_limit_per_host=2)
+
+    async def run():
+        session = await serply.__get_async_session__()
+        assert session.connector.limit == 5
+        assert session.connector.limit_per_host == 2
+        await serply.aclose()
+
+    asyncio.run(run())
@@ -0,0 +1,79 @@
+import time
+import threading
+from serply import Serply
+from tests.stub import StubServer
+from tests.test_serply_bulk import echo_query
+
+
+def test_run_sharded_keeps_input_order():
+    with StubServer(payload=echo_query) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+        keywords = [f"keyword {i}" for i in range(20)]
+
+        results = list(
+            serply.run_sharded("search", keywords, processes=2, shard_size=3)
+        )
+        assert [r["results"][0]["title"] for r in results] == keywords
+        assert len(stub.requests) == 20
+
+
+def test_run_sharded_from_file(tmp_path):
+    with StubServer(payload=echo_query) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+        keywords = [f"keyword {i}" for i in range(7)]
+        path = tmp_path / "keywords.txt"
+        path.write_text("\n".join(keywords + [""]), encoding="utf-8")
+
+        results = list(serply.run_sharded("news", str(path), processes=2, num=5))
+        assert [r["results"][0]["title"] for r in results] == keywords
+        assert all("num=5" in path for path, _, _ in stub.requests)
+
+
+def test_run_sharded_rate_limit():
+    with StubServer() as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+
+        start = time.monotonic()
+        results = list(
+            serply.run_sharded(
+                "search",
+                [str(i) for i in range(12)],
+                processes=2,
+                rate_limit=20,
+                shard_size=6,
+            )
+        )
+        # 12 requests at 20 per second take at least 0.5 seconds in total
+        assert time.monotonic() - start >= 0.5
+        assert len(results) == 12
+        assert all("results" in result for result in results)
+
+
+def test_run_sharded_concurrency_budget():
+    lock = threading.Lock()
+    in_flight = [0, 0]
+
+    def payload(path):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight[1], in_flight[0])
+        time.sleep(0.2)
+        with lock:
+            in_flight[0] -= 1
+        return {"results": []}
+
+    with StubServer(payload=payload) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+
+        results = list(
+            serply.run_sharded(
+                "search",
+                [str(i) for i in range(8)],
+                processes=4,
+                concurrency=2,
+                shard_size=1,
+            )
+        )
+        assert len(results) == 8
+        # at most two requests in flight, not one per process
+        assert in_flight[1] <= 2
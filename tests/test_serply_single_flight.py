@@ -0,0 +1,57 @@
+import asyncio
+from aiohttp.client_exceptions import ClientResponseError
+from serply import Serply
+from tests.stub import StubServer
+
+
+def test_single_flight_async():
+    with StubServer(latency=0.2) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url, single_flight=True)
+
+        async def run():
+            return await asyncio.gather(
+                *(serply.search_async(keyword="iphone") for _ in range(5)),
+                serply.search_async(keyword="android"),
+            )
+
+        results = asyncio.run(run())
+        assert len(stub.requests) == 2
+        assert all("results" in result for result in results)
+        # every caller gets its own copy, nested results included
+        assert len({id(result) for result in results}) == 6
+        results[0]["results"].append({"title": "changed"})
+        assert all(result["results"] == [] for result in results[1:])
+
+
+def test_single_flight_async_errors():
+    with StubServer(status=500, latency=0.1) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url, single_flight=True)
+
+        async def run():
+            return await asyncio.gather(
+                *(serply.search_async(keyword="iphone") for _ in range(3)),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+        assert len(stub.requests) == 1
+        assert all(isinstance(result, ClientResponseError) for result in results)
+
+
+def test_single_flight_threads():
+    with StubServer(latency=0.2) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url, single_flight=True)
+
+        results = list(serply.map("search", ["iphone"] * 5, max_workers=5))
+        assert len(stub.requests) == 1
+        assert all("results" in result for result in results)
+        assert not serply._inflight
+        assert len({id(result["results"]) for result in results}) == 5
+
+
+def test_single_flight_off_by_default():
+    with StubServer(latency=0.1) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+
+        list(serply.map("search", ["iphone"] * 3, max_workers=3))
+        assert len(stub.requests) == 3
@@ -0,0 +1,91 @@
+import asyncio
+import gc
+import json
+import os
+import time
+import pytest
+from serply import Serply, SpooledFile
+from tests.stub import StubServer
+from tests.test_serply_decoder import load_payload
+
+PAYLOAD = json.loads(load_payload("crawl"))
+
+
+def test_crawl_html_to_temporary_file():
+    with StubServer(payload=PAYLOAD) as stub:
+        serply = Serply(api_key="test")
+        serply.base_url = stub.base_url
+
+        results = serply.crawl(keyword="iphone", html_file=True)
+        html = results["html"]
+        assert isinstance(html, SpooledFile)
+        assert results["results"] == PAYLOAD["results"]
+        assert results["total"] == PAYLOAD["total"]
+        assert html.read() == PAYLOAD["html"]
+        assert len(html) == len(PAYLOAD["html"].encode("utf-8"))
+        with html.mmap() as mapped:
+            assert mapped[:15] == b"<!doctype html>"
+            assert mapped.find(b"</html>") == len(html) - 7
+
+        path = html.path
+        assert os.path.exists(path)
+        del results, html
+        gc.collect()
+        # temporary files go away with their handle
+        assert not os.path.exists(path)
+
+
+def test_crawl_html_to_target_file(tmp_path):
+    target = tmp_path / "page.html"
+    with StubServer(payload=PAYLOAD) as stub:
+        serply = Serply(api_key="test")
+        serply.base_url = stub.base_url
+
+        async def run():
+            async with serply:
+                return await serply.crawl_async(keyword="iphone", html_file=target)
+
+        results = asyncio.run(run())
+        assert results["html"].path == str(target)
+        assert results["results"] == PAYLOAD["results"]
+        del results
+        gc.collect()
+        assert target.read_text(encoding="utf-8") == PAYLOAD["html"]
+
+
+def test_crawl_html_file_error():
+    with StubServer(status=500) as stub:
+        serply = Serply(api_key="test")
+        serply.base_url = stub.base_url
+
+        results = serply.crawl(keyword="iphone", html_file=True)
+        assert "error" in results
+        assert "html" not in results
+
+
+def test_crawl_empty_html_file(tmp_path):
+    target = tmp_path / "page.html"
+    with StubServer(payload=dict(PAYLOAD, html="")) as stub:
+        serply = Serply(api_key="test")
+        serply.base_url = stub.base_url
+
+        results = serply.crawl(keyword="iphone", html_file=True)
+        assert results["html"].read() == ""
+        assert len(results["html"]) == 0
+        with pytest.raises(ValueError):
+            results["html"].mmap()
+
+        results = serply.crawl(keyword="iphone", html_file=str(target))
+        assert results["html"].path == str(target)
+        assert target.read_text(encoding="utf-8") == ""
+
+
+def test_streamed_request_time_includes_body():
+    with StubServer(payload=PAYLOAD) as stub:
+        serply = Serply(api_key="test")
+        serply.base_url = stub.base_url
+
+        response = serply.stream("crawl", "iphone")
+        time.sleep(0.2)
+        results = response.to_dict()
+        assert results["request_time"] >= 0.2
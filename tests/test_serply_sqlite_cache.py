@@ -0,0 +1,125 @@
+import time
+import pickle
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from serply import ResponseCache, Serply, SQLiteCache, TieredCache
+from tests.stub import StubServer
+
+
+def fill(path: str, start: int) -> int:
+    cache = SQLiteCache(path)
+    for i in range(start, start + 50):
+        cache.set(f"key {i}", {"results": [i]})
+    return sum(cache.get(f"key {i}") is not None for i in range(start, start + 50))
+
+
+def test_sqlite_cache_get_set(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+    assert cache.get("a") is None
+    cache.set("a", {"results": [{"title": "iphone"}]})
+    assert cache.get("a") == {"results": [{"title": "iphone"}]}
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+    connection = sqlite3.connect(str(tmp_path / "cache.db"))
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_sqlite_cache_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    SQLiteCache(path).set("a", {"results": []})
+    assert SQLiteCache(path).get("a") == {"results": []}
+
+
+def test_sqlite_cache_ttl(tmp_path):
+    cache = SQLiteCache(
+        str(tmp_path / "cache.db"), ttl=0.05, endpoint_ttls={"news": 10, "crawl": 0}
+    )
+    cache.set("a", {}, endpoint="search")
+    cache.set("b", {}, endpoint="news")
+    cache.set("c", {}, endpoint="crawl")
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.get("b") == {}
+    assert cache.get("c") is None
+
+
+def test_sqlite_cache_compressed(tmp_path):
+    path = str(tmp_path / "cache.db")
+    value = {"html": "<html>" + "iphone " * 1000 + "</html>"}
+    SQLiteCache(path, compress=True).set("a", value)
+    # readers decompress based on the row, whatever their own setting
+    assert SQLiteCache(path).get("a") == value
+
+    connection = sqlite3.connect(path)
+    size = connection.execute("SELECT length(payload) FROM responses").fetchone()[0]
+    assert size < len(value["html"]) / 10
+
+
+def test_sqlite_cache_eviction(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), max_entries=20)
+    for i in range(30):
+        cache.set(f"key {i}", {})
+    cache.evict()
+    assert len(cache) == 20
+    assert cache.get("key 0") is None
+    assert cache.get("key 29") == {}
+
+
+def test_sqlite_cache_concurrent_writers(tmp_path):
+    path = str(tmp_path / "cache.db")
+    with ThreadPoolExecutor(4) as executor:
+        assert list(executor.map(fill, [path] * 4, range(0, 200, 50))) == [50] * 4
+    with ProcessPoolExecutor(4) as executor:
+        assert list(executor.map(fill, [path] * 4, range(200, 400, 50))) == [50] * 4
+    assert len(SQLiteCache(path)) == 400
+
+
+def test_sqlite_cache_pickle(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), compress=True)
+    cache.set("a", {})
+    copy = pickle.loads(pickle.dumps(cache))
+    assert copy.compress
+    assert copy.get("a") == {}
+
+
+def test_tiered_cache(tmp_path):
+    memory = ResponseCache()
+    disk = SQLiteCache(str(tmp_path / "cache.db"))
+    cache = TieredCache(memory, disk)
+    disk.set("a", {"results": []})
+
+    assert cache.get("a") == {"results": []}
+    # the disk hit was copied in memory
+    assert memory.get("a") == {"results": []}
+    cache.set("b", {})
+    assert memory.get("b") == {} and disk.get("b") == {}
+
+
+def test_tiered_cache_endpoint_ttls(tmp_path):
+    memory = ResponseCache(endpoint_ttls={"news": 0})
+    disk = SQLiteCache(str(tmp_path / "cache.db"))
+    cache = TieredCache(memory, disk)
+    disk.set("a", {"results": []}, endpoint="news")
+    disk.set("b", {"results": []}, endpoint="search")
+
+    assert cache.get("a", "news") == {"results": []}
+    assert cache.get("b", "search") == {"results": []}
+    # news isn't cached in memory, so it isn't copied there either
+    assert memory.get("a") is None
+    assert memory.get("b") == {"results": []}
+
+
+def test_cached_search_on_disk(tmp_path):
+    path = str(tmp_path / "cache.db")
+    with StubServer() as stub:
+        serply = Serply(
+            api_key="test",
+            base_url=stub.base_url,
+            cache=[ResponseCache(), SQLiteCache(path)],
+        )
+        serply.search(keyword="iphone")
+
+        # a new client, as after a restart, is served from disk
+        serply = Serply(api_key="test", base_url=stub.base_url, cache=SQLiteCache(path))
+        assert serply.search(keyword="iphone")["cached"]
+        assert len(stub.requests) == 1
@@ -0,0 +1,135 @@
+import json
+import asyncio
+import pytest
+from serply import ResponseCache, Serply
+from serply.stream import JSONStreamParser
+from tests.stub import StubServer
+from tests.test_serply_decoder import load_payload
+
+CRAWL = {
+    "searchParameters": {"q": "iphone", "num": 3},
+    "results": [
+        {"title": 'iPhone é "quoted"', "link": "https://www.apple.com/iphone/"},
+        {"title": "emoji \U0001f600", "link": "https://example.com/\\path"},
+        {"title": "third", "position": 3.5},
+    ],
+    "html": '<html lang="en">\n<body>é \U0001f600 \\ "quotes"</body></html>' * 2000,
+    "total": 12345,
+}
+
+
+def parse(data: bytes, size: int):
+    parser = JSONStreamParser("results", ["html"])
+    items, fields, html = [], {}, []
+    events = []
+    for i in range(0, len(data), size):
+        events.extend(parser.feed(data[i : i + size]))
+    events.extend(parser.close())
+    for event in events:
+        if event[0] == "item":
+            items.append(event[1])
+        elif event[0] == "field":
+            fields[event[1]] = event[2]
+        elif event[0] == "data":
+            html.append(event[2])
+    return items, fields, "".join(html)
+
+
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+@pytest.mark.parametrize("size", [1, 5, 4096])
+def test_stream_parser_chunk_boundaries(ensure_ascii, size):
+    data = json.dumps(CRAWL, ensure_ascii=ensure_ascii).encode("utf-8")
+    items, fields, html = parse(data, size)
+    assert items == CRAWL["results"]
+    assert html == CRAWL["html"]
+    assert fields == {"searchParameters": CRAWL["searchParameters"], "total": 12345}
+
+
+@pytest.mark.parametrize("name", ["search", "crawl"])
+def test_stream_parser_recorded_payloads_byte_by_byte(name):
+    data = load_payload(name)
+    expected = json.loads(data)
+    items, fields, html = parse(data, 1)
+    assert items == expected.pop("results")
+    assert html == expected.pop("html", "")
+    assert fields == expected
+    assert fields["ts"] == 2.49
+
+
+def test_stream_parser_number_at_chunk_boundary():
+    parser = JSONStreamParser("results")
+    assert parser.feed(b'{"results": [], "ts": 2.') == []
+    assert parser.feed(b"5") == []
+    assert parser.feed(b"}") == [("field", "ts", 2.5)]
+    assert parser.close() == []
+
+
+def test_stream_parser_incomplete():
+    parser = JSONStreamParser("results")
+    parser.feed(b'{"results": [{"title": "a"}')
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_stream_parser_not_an_object():
+    with pytest.raises(ValueError):
+        JSONStreamParser("results").feed(b"[1, 2]")
+
+
+def test_stream_crawl():
+    with StubServer(payload=CRAWL) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+
+        with serply.stream("crawl", "iphone") as response:
+            assert list(response) == CRAWL["results"]
+            assert response.fields["total"] == 12345
+            assert response.fields["attempts"] == 1
+            assert response.html.read() == CRAWL["html"]
+            assert "html" not in response.fields
+
+
+def test_stream_html_before_results():
+    with StubServer(payload=CRAWL) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+
+        response = serply.stream("crawl", "iphone")
+        assert response.html.read() == CRAWL["html"]
+        # results read while looking for the html are kept
+        assert list(response) == CRAWL["results"]
+        response.close()
+
+
+def test_stream_error():
+    with StubServer(status=500) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+
+        response = serply.stream("search", "iphone")
+        assert "error" in response.fields
+        assert list(response) == []
+
+
+def test_stream_not_cached():
+    with StubServer(payload=CRAWL) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url, cache=ResponseCache())
+
+        for _ in range(2):
+            with serply.stream("crawl", "iphone") as response:
+                list(response)
+        assert len(stub.requests) == 2
+
+
+def test_stream_async():
+    with StubServer(payload=CRAWL) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url)
+
+        async def run():
+            async with serply:
+                async with await serply.stream_async("crawl", "iphone") as response:
+                    items = [item async for item in response]
+                    html = await response.get_stream_async("html")
+                    return items, html.read(), response.fields
+
+        items, html, fields = asyncio.run(run())
+        assert items == CRAWL["results"]
+        assert html == CRAWL["html"]
+        assert fields["total"] == 12345
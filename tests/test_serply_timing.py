@@ -0,0 +1,115 @@
+import asyncio
+import pytest
+from serply import ResponseCache, Serply
+from serply.timing import PHASES, RequestTiming, get_current_timing
+from tests.stub import StubServer
+
+
+def make_client(stub: StubServer, **kwargs):
+    started, ended = [], []
+    serply = Serply(
+        api_key="test",
+        on_request_start=started.append,
+        on_request_end=ended.append,
+        **kwargs,
+    )
+    # a host name so the client resolves it
+    serply.base_url = stub.base_url.replace("127.0.0.1", "localhost")
+    return serply, started, ended
+
+
+def check_phases(timing: RequestTiming):
+    for phase in PHASES:
+        value = timing.phases[phase]
+        assert value is None or value >= 0, phase
+    known = sum(value for value in timing.phases.values() if value is not None)
+    assert known <= timing.total
+
+
+def test_sync_timing():
+    with StubServer(latency=0.05) as stub:
+        serply, started, ended = make_client(stub)
+        serply.search(keyword="iphone")
+        serply.search(keyword="ipad")
+
+    assert len(started) == len(ended) == 2
+    first, second = ended
+    assert first is started[0]
+    assert (first.endpoint, first.method, first.status, first.attempts) == (
+        "search",
+        "get",
+        200,
+        1,
+    )
+    assert first.phases["dns"] is not None
+    assert first.phases["connect"] is not None
+    assert first.phases["ttfb"] >= 0.05
+    assert first.phases["body"] is not None
+    assert first.phases["decode"] is not None
+    assert first.total >= first.phases["ttfb"]
+    check_phases(first)
+    # the second request reuses the pooled connection
+    assert second.phases["connect"] is None
+    assert second.phases["ttfb"] >= 0.05
+    check_phases(second)
+    assert get_current_timing() is None
+    assert first.to_dict()["ttfb"] == first.phases["ttfb"]
+
+
+def test_async_timing():
+    with StubServer(latency=0.05) as stub:
+        serply, started, ended = make_client(stub)
+
+        async def run():
+            async with serply:
+                await serply.search_async(keyword="iphone")
+                await serply.search_async(keyword="ipad")
+
+        asyncio.run(run())
+
+    assert len(started) == len(ended) == 2
+    first, second = ended
+    assert (first.endpoint, first.status, first.attempts) == ("search", 200, 1)
+    assert first.phases["dns"] is not None
+    assert first.phases["connect"] is not None
+    assert first.phases["ttfb"] >= 0.05
+    assert first.phases["body"] is not None
+    assert first.phases["decode"] is not None
+    check_phases(first)
+    assert second.phases["connect"] is None
+    check_phases(second)
+
+
+def test_timing_cached_and_errors():
+    with StubServer() as stub:
+        serply, started, ended = make_client(stub, cache=ResponseCache())
+        serply.search(keyword="iphone")
+        serply.search(keyword="iphone")
+        assert [timing.cached for timing in ended] == [False, True]
+        assert ended[1].phases["ttfb"] is None
+
+    serply, started, ended = make_client(stub)
+    with pytest.raises(Exception):
+        serply.search(keyword="iphone")
+    assert len(ended) == 1
+    assert ended[0].error is not None
+    assert get_current_timing() is None
+
+
+def test_failing_hook_does_not_fail_request():
+    def hook(timing):
+        raise ValueError("broken hook")
+
+    with StubServer() as stub:
+        serply = Serply(api_key="test", on_request_end=hook)
+        serply.base_url = stub.base_url
+        assert serply.search(keyword="iphone")["results"] == []
+
+
+def test_no_instrumentation_without_hooks():
+    with StubServer() as stub:
+        serply = Serply(api_key="test")
+        serply.base_url = stub.base_url
+        serply.search(keyword="iphone")
+    assert type(serply.adapter).__name__ == "HTTPAdapter"
+    assert get_current_timing() is None
@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+from serply import Serply
+from tests.stub import StubServer
+
+pytest.importorskip("opentelemetry.sdk")
+
+from opentelemetry.sdk.trace import TracerProvider  # noqa: E402
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor  # noqa: E402
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (  # noqa: E402
+    InMemorySpanExporter,
+)
+from opentelemetry.trace import SpanKind, StatusCode  # noqa: E402
+
+
+def make_tracer():
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    return provider.get_tracer("test"), exporter
+
+
+def test_request_spans():
+    tracer, exporter = make_tracer()
+    with StubServer() as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url, tracer=tracer)
+        serply.search(keyword="iphone", engine="bing")
+        stub.queue = [(500, {}, {})]
+        serply.news(keyword="iphone")
+
+        async def run():
+            async with serply:
+                await serply.maps_async(keyword="iphone")
+
+        asyncio.run(run())
+
+    search, news, maps = exporter.get_finished_spans()
+    assert search.name == "serply.search"
+    assert search.kind == SpanKind.CLIENT
+    assert search.attributes["serply.endpoint"] == "search"
+    assert search.attributes["serply.engine"] == "bing"
+    assert search.attributes["http.request.method"] == "GET"
+    assert search.attributes["http.response.status_code"] == 200
+    assert search.attributes["serply.attempts"] == 1
+    assert search.attributes["serply.cache_hit"] is False
+    assert search.attributes["serply.response_size"] == len(b'{"results": []}')
+    assert search.status.status_code == StatusCode.UNSET
+
+    assert news.attributes["http.response.status_code"] == 500
+    assert news.status.status_code == StatusCode.ERROR
+
+    assert maps.name == "serply.maps"
+    assert maps.attributes["http.response.status_code"] == 200
+
+
+def test_raised_errors_recorded():
+    tracer, exporter = make_tracer()
+    with StubServer() as stub:
+        base_url = stub.base_url
+    serply = Serply(api_key="test", base_url=base_url, tracer=tracer)
+    with pytest.raises(Exception):
+        serply.search(keyword="iphone")
+    (span,) = exporter.get_finished_spans()
+    assert span.status.status_code == StatusCode.ERROR
+    assert span.events[0].name == "exception"
+
+
+def test_helper_spans_parent_calls():
+    tracer, exporter = make_tracer()
+
+    def payload(path):
+        return {"results": [{"title": path}] * 10}
+
+    with StubServer(payload=payload) as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url, tracer=tracer)
+        assert len(list(serply.iter_results("search", "iphone", max_results=20))) == 20
+        assert len(list(serply.map("search", ["a", "b"], max_workers=2))) == 2
+
+        async def run():
+            async with serply:
+                await serply.bulk("search", ["a", "b"])
+                return [
+                    item
+                    async for item in serply.aiter_results(
+                        "search", "iphone", max_results=20
+                    )
+                ]
+
+        assert len(asyncio.run(run())) == 20
+
+    spans = exporter.get_finished_spans()
+    helpers = {span.name: span for span in spans}
+    for helper in ("serply.iter_results", "serply.map", "serply.bulk"):
+        parent = helpers[helper].context.span_id
+        children = [
+            span
+            for span in spans
+            if span.parent is not None and span.parent.span_id == parent
+        ]
+        assert len(children) == 2
+        assert all(span.name == "serply.search" for span in children)
+    parent = helpers["serply.aiter_results"].context.span_id
+    assert any(
+        span.parent is not None and span.parent.span_id == parent for span in spans
+    )
+
+
+def test_tracing_disabled():
+    with StubServer() as stub:
+        serply = Serply(api_key="test", base_url=stub.base_url, tracer=False)
+        serply.search(keyword="iphone")
+    assert serply.__get_tracer__() is None
@@ -0,0 +1,102 @@
+import itertools
+import timeit
+import pytest
+from urllib.parse import unquote, urlencode
+from serply import Serply
+from serply.consts import ENDPOINTS
+
+
+def legacy_generate_url(serply, keyword, num=10, endpoint="search", **kwargs):
+    # the if-chain __generate_url__ used before the route table, kept as reference
+    params = {"q": unquote(keyword), "num": num}
+    for name in ("start", "gl", "lr", "hl", "cr", "loc", "domain", "website"):
+        if name in kwargs and kwargs[name]:
+            params[name] = kwargs[name]
+    prefix = f"{serply.base_url}{serply.api_version}/"
+    if endpoint == "job":
+        return f"{prefix}job/search/{urlencode(params)}"
+    elif endpoint == "product":
+        del params["num"]
+        return f"{prefix}product/search/{urlencode(params)}"
+    elif endpoint == "serp":
+        if "domain" not in params and "website" not in params:
+            raise ValueError("domain or website is required for the SERP endpoint.")
+    elif endpoint == "search":
+        if "engine" in kwargs and kwargs["engine"].lower() in ["bing", "b"]:
+            return f"{prefix}b/search/{urlencode(params)}"
+    return f"{prefix}{endpoint}/{urlencode(params)}"
+
+
+def test_urls_match_legacy_builder():
+    serply = Serply(api_key="test")
+    options = [
+        {},
+        {"start": 33},
+        {"gl": "de", "hl": "lang_de", "lr": "lang_de"},
+        {"cr": "countryCA", "loc": "new york, ny"},
+        {"domain": "apple.com"},
+        {"website": "https://www.apple.com/"},
+        {"engine": "bing", "start": 0, "gl": ""},
+        {"engine": "google", "domain": "apple.com", "start": 10},
+    ]
+    keywords = ["iphone", "iphone 15%20pro", "café & crème/?=+", "日本 ~a.b_c-d"]
+    for endpoint, kwargs, num, keyword in itertools.product(
+        ENDPOINTS, options, (10, 100), keywords
+    ):
+        try:
+            expected = legacy_generate_url(
+                serply, keyword, num=num, endpoint=endpoint, **kwargs
+            )
+        except ValueError:
+            with pytest.raises(ValueError):
+                serply.__generate_url__(
+                    keyword=keyword, num=num, endpoint=endpoint, **kwargs
+                )
+            continue
+        url = serply.__generate_url__(
+            keyword=keyword, num=num, endpoint=endpoint, **kwargs
+        )
+        assert url == expected
+
+
+def test_routes_follow_base_url():
+    serply = Serply(api_key="test")
+    assert serply.__generate_url__(keyword="iphone").startswith(
+        "https://api.serply.io/v1/search/"
+    )
+    serply.base_url = "http://127.0.0.1:8000/"
+    serply.api_version = "v2"
+    assert (
+        serply.__generate_url__(keyword="iphone", endpoint="news")
+        == "http://127.0.0.1:8000/v2/news/q=iphone&num=10"
+    )
+
+
+def test_generate_url_benchmark():
+    serply = Serply(api_key="test")
+    kwargs = {"keyword": "iphone", "num": 100, "gl": "us", "hl": "lang_en"}
+    number = 20000
+
+    table = legacy = float("inf")
+    # alternate the two so load on the machine slows both alike
+    for _ in range(5):
+        table = min(
+            table,
+            timeit.timeit(
+                lambda: serply.__generate_url__(endpoint="news", **kwargs),
+                number=number,
+            ),
+        )
+        legacy = min(
+            legacy,
+            timeit.timeit(
+                lambda: legacy_generate_url(serply, endpoint="news", **kwargs),
+                number=number,
+            ),
+        )
+    print(
+        f"__generate_url__ {table / number * 1e6:.2f}us per call, "
+        f"if-chain {legacy / number * 1e6:.2f}us per call"
+    )
+    # relative to the if-chain it replaced, absolute timings depend on the machine
+    assert table < legacy * 1.5